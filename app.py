@@ -1,15 +1,36 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from datetime import datetime
+import logging
 import re
+import time
 from utils import (
     initialize_pinecone,
     initialize_gemini,
-    clone_repository,
-    get_main_files_content,
-    store_in_pinecone,
-    query_pinecone,
-    generate_response,
-    get_repo_name
+    checkout_repository,
+    create_vector_store,
+    index_repository,
+    hybrid_query,
+    fanout_query,
+    get_lexical_index,
+    list_namespaces,
+    assemble_context,
+    rerank_matches,
+    stream_response,
+    embed_query,
+    get_answer_cache,
+    get_telemetry,
+    get_repo_namespace,
+    INDEX_NAME,
+    MAX_CHUNK_TOKENS,
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_CANDIDATES,
+    VECTOR_BACKENDS,
+    ANSWER_CACHE_THRESHOLD,
+    RERANK_CANDIDATES,
+    RERANK_LATENCY_BUDGET_MS,
+    WARMUP_ENABLED,
+    start_warmup
 )
 
 # Initialize session state
@@ -19,12 +40,44 @@ if 'uploaded_files' not in st.session_state:
     st.session_state.uploaded_files = []
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
+if 'index_stats' not in st.session_state:
+    st.session_state.index_stats = {}
+
+class StreamlitLogHandler(logging.Handler):
+    """Show library warnings and errors in the page that triggered them"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if get_script_run_ctx(suppress_warning=True) is None:
+            return  # worker threads have no page to write to
+        if record.levelno >= logging.ERROR:
+            st.error(self.format(record))
+        else:
+            st.warning(self.format(record))
+
+@st.cache_resource(show_spinner=False)
+def install_log_handler() -> None:
+    """Route utils log records to the page once per process"""
+    handler = StreamlitLogHandler(level=logging.WARNING)
+    logging.getLogger('utils').addHandler(handler)
+
+@st.cache_resource(show_spinner=False)
+def get_pinecone_client(api_key: str):
+    """Process-wide Pinecone client per API key"""
+    return initialize_pinecone(api_key)
+
+@st.cache_resource(show_spinner=False)
+def configure_gemini(api_key: str) -> bool:
+    """Configure Gemini once per API key"""
+    initialize_gemini(api_key)
+    return True
 
 def initialize_apis():
-    """Initialize APIs and return Pinecone client"""
+    """Initialize APIs and return Pinecone client (None for the local backend)"""
     try:
-        pc = initialize_pinecone(st.session_state.api_keys['pinecone'])
-        initialize_gemini(st.session_state.api_keys['gemini'])
+        pc = None
+        if st.session_state.vector_backend == 'pinecone':
+            pc = get_pinecone_client(st.session_state.api_keys['pinecone'])
+        configure_gemini(st.session_state.api_keys['gemini'])
         return pc, True
     except Exception as e:
         st.error(f"API initialization error: {str(e)}")
@@ -32,19 +85,31 @@ def initialize_apis():
 
 # UI Setup
 st.set_page_config(page_title="Codebase RAG", page_icon="🤖", layout="wide")
+install_log_handler()
+if WARMUP_ENABLED:
+    start_warmup()  # returns at once; the model loads while the page renders
 
 # Sidebar
 with st.sidebar:
     st.title("Settings")
     pinecone_key = st.text_input("Pinecone API Key", type="password")
     gemini_key = st.text_input("Gemini API Key", type="password")
-    if pinecone_key and gemini_key:
+    if gemini_key:
         st.session_state.api_keys['pinecone'] = pinecone_key
         st.session_state.api_keys['gemini'] = gemini_key
     
     st.subheader("Configuration")
-    st.slider("Chunk Size", 500, 2000, key="chunk_size")
-    st.slider("Chunk Overlap", 100, 500, key="chunk_overlap")
+    st.selectbox("Vector Store", VECTOR_BACKENDS, key="vector_backend",
+                 help="'local' keeps embeddings on this machine and needs no Pinecone key")
+    st.slider("Max Chunk Tokens", 64, MAX_CHUNK_TOKENS, MAX_CHUNK_TOKENS, key="max_chunk_tokens")
+    st.slider("Context Token Budget", 500, 16000, CONTEXT_TOKEN_BUDGET, step=500, key="context_token_budget")
+    st.checkbox("Re-rank", key="use_rerank",
+                help=f"Score {RERANK_CANDIDATES} candidates with a local cross-encoder and keep the best few")
+    st.slider("Re-rank Budget (ms)", 50, 2000, int(RERANK_LATENCY_BUDGET_MS), step=50, key="rerank_budget_ms",
+              help="Lower-ranked candidates are skipped when scoring them would exceed this budget")
+    st.checkbox("Answer Cache", value=True, key="use_answer_cache",
+                help="Reuse answers to near-identical questions until the repository is re-indexed")
+    st.slider("Answer Cache Similarity", 0.80, 1.0, ANSWER_CACHE_THRESHOLD, step=0.01, key="answer_cache_threshold")
     st.checkbox("Debug Mode", key="debug_mode")
 
 # Main Content
@@ -57,35 +122,79 @@ pc, api_initialized = initialize_apis()
 # Repository Analysis
 st.subheader("Repository Analysis")
 repo_url = st.text_input("Enter GitHub repository URL", placeholder="https://github.com/user/repo")
+store = create_vector_store(st.session_state.vector_backend, INDEX_NAME, pc) if api_initialized else None
+namespace = None
 
 if repo_url and api_initialized:
     if not re.match(r"^https://github\.com/[^/]+/[^/]+/?$", repo_url):
         st.error("Invalid GitHub URL format")
     else:
-        index_name = get_repo_name(repo_url)
-        namespace = index_name
+        namespace = get_repo_namespace(repo_url)
         
         if st.button("Analyze Repository"):
-            with st.spinner("Processing repository..."):
-                repo_path = clone_repository(repo_url)
+            with st.spinner("Processing repository..."), checkout_repository(repo_url) as repo_path:
                 if repo_path:
-                    files_content = get_main_files_content(repo_path)
-                    if store_in_pinecone(files_content, index_name, namespace, pc):
-                        st.success("Analysis complete!")
-                        st.session_state.uploaded_files.extend(files_content)
+                    stats = index_repository(repo_path, store, namespace, st.session_state.max_chunk_tokens)
+                    if stats is not None:
+                        st.success(f"Analysis complete! {stats['added']} added, {stats['modified']} modified, "
+                                   f"{stats['removed']} removed, {stats['unchanged']} unchanged files.")
+                        st.session_state.uploaded_files.extend(stats['changed_files'])
+                        st.session_state.index_stats = {k: v for k, v in stats.items() if k != 'changed_files'}
 
 # Chat Interface
 st.subheader("Chat")
+indexed = list_namespaces(store.name) if store is not None else []
+repositories = st.multiselect("Repositories", sorted(set(indexed) | ({namespace} if namespace else set())),
+                              default=[namespace] if namespace else [],
+                              help="Questions about several repositories are searched across all of them at once")
 question = st.text_area("Ask a question about the codebase", height=100, 
                        placeholder="Type your question here...")
 
-if st.button("Submit Question", key="submit_question") and question and 'index_name' in locals() and api_initialized:
-    with st.spinner("Generating response..."):
-        context_chunks = query_pinecone(question, index_name, namespace, pc)
-        response = generate_response(question, context_chunks)
+if st.button("Submit Question", key="submit_question") and question and repositories and api_initialized:
+    start = time.perf_counter()
+    answer_cache = get_answer_cache()
+    question_embedding = embed_query(question)
+    cached = None
+    single = len(repositories) == 1
+    namespace = repositories[0]
+    if st.session_state.use_answer_cache and single:
+        cached = answer_cache.lookup(store.name, namespace, question_embedding,
+                                     st.session_state.answer_cache_threshold)
+    if cached is not None:
+        response = cached['answer']
+        st.write(response)
+        st.session_state.chat_history.append({
+            'question': question,
+            'response': response,
+            'cache': {'similarity': round(cached['similarity'], 3), 'matched_question': cached['question'],
+                      'lookup_ms': round((time.perf_counter() - start) * 1000, 1)},
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+    else:
+        with st.spinner("Retrieving context..."):
+            candidates = RERANK_CANDIDATES if st.session_state.use_rerank else CONTEXT_CANDIDATES
+            if single:
+                matches = hybrid_query(question, store, namespace, get_lexical_index(store.name, namespace),
+                                       candidates, candidates, candidates)
+            else:
+                matches = fanout_query(question, store, repositories, top_k=candidates)
+            if st.session_state.use_rerank:
+                matches = rerank_matches(question, matches, budget_ms=st.session_state.rerank_budget_ms)
+            context_chunks = assemble_context(matches, st.session_state.context_token_budget)
+            retrieval_ms = (time.perf_counter() - start) * 1000
+        generation_stats = {}
+        response = st.write_stream(stream_response(question, context_chunks, stats=generation_stats))
+        if st.session_state.use_answer_cache and single and not generation_stats['error']:
+            answer_cache.put(store.name, namespace, question, question_embedding, response,
+                             retrieval_ms + generation_stats['total_ms'])
         st.session_state.chat_history.append({
             'question': question,
             'response': response,
+            'repositories': repositories,
+            'sources': sorted({f"{chunk.get('namespace', namespace)}:{chunk['metadata']['file_name']}"
+                               for chunk in context_chunks}),
+            'retrieval_ms': round(retrieval_ms, 1),
+            'generation': generation_stats,
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         })
 
@@ -95,6 +204,8 @@ if st.session_state.chat_history:
     for chat in reversed(st.session_state.chat_history):
         with st.expander(f"Q: {chat['question']} ({chat['timestamp']})"):
             st.write(f"A: {chat['response']}")
+            if chat.get('sources'):
+                st.caption("Sources: " + ", ".join(chat['sources']))
             if st.button("Export", key=f"export_{chat['timestamp']}"):
                 markdown_content = f"# Q&A\n\n**Question:** {chat['question']}\n\n**Answer:** {chat['response']}\n\n*Timestamp: {chat['timestamp']}*"
                 st.download_button(
@@ -109,7 +220,14 @@ if st.session_state.debug_mode:
     st.subheader("Debug")
     st.json({
         'files': st.session_state.uploaded_files,
+        'index_stats': st.session_state.index_stats,
+        'retrieval_ms': [chat.get('retrieval_ms') for chat in st.session_state.chat_history[-10:]],
+        'generation': [chat.get('generation') for chat in st.session_state.chat_history[-10:]],
+        'telemetry': get_telemetry().snapshot(),
+        'answer_cache': dict(get_answer_cache().stats(),
+                             recent_hits=[chat.get('cache') for chat in st.session_state.chat_history[-10:]]),
         'api_status': {
+            'vector_backend': st.session_state.vector_backend,
             'pinecone': bool(st.session_state.api_keys['pinecone']),
             'gemini': bool(st.session_state.api_keys['gemini'])
         }
@@ -0,0 +1,60 @@
+"""Compare single-process and multi-process embedding throughput.
+
+Both sides encode every text; the on-disk embedding cache is bypassed.
+
+Usage:
+    python -m benchmarks.embedding_workers --texts 4096 --workers 8 --torch-threads 4
+"""
+import argparse
+import json
+import os
+import random
+import string
+import time
+
+from utils.embeddings import MODEL_NAME, get_embeddings_batch, get_model
+from utils.embedding_pool import EmbeddingPool
+
+def make_texts(count: int, words: int, seed: int = 0) -> list:
+    """Generate pseudo-code snippets of roughly ``words`` tokens each."""
+    rng = random.Random(seed)
+    vocab = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(2000)]
+    return [' '.join(rng.choices(vocab, k=words)) for _ in range(count)]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--texts', type=int, default=2048, help='number of texts to embed')
+    parser.add_argument('--words', type=int, default=150, help='words per text')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 4))
+    parser.add_argument('--torch-threads', type=int, default=4, help='torch threads per worker')
+    parser.add_argument('--model', default=MODEL_NAME)
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts, args.words)
+    get_model(args.model).encode(texts[:8])
+    start = time.perf_counter()
+    single = get_embeddings_batch(texts, model_name=args.model, use_cache=False)
+    single_seconds = time.perf_counter() - start
+
+    pool = EmbeddingPool(args.workers, args.torch_threads, args.model)
+    try:
+        pool.encode(texts[:args.workers])
+        start = time.perf_counter()
+        multi = pool.encode(texts)
+        multi_seconds = time.perf_counter() - start
+    finally:
+        pool.close()
+
+    print(json.dumps({
+        'texts': len(texts),
+        'model': args.model,
+        'workers': args.workers,
+        'torch_threads': args.torch_threads,
+        'single_process_texts_per_sec': len(texts) / single_seconds,
+        'multi_process_texts_per_sec': len(texts) / multi_seconds,
+        'speedup': single_seconds / multi_seconds,
+        'max_abs_diff': float(abs(single - multi).max())
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""End-to-end indexing and query benchmark on a synthetic repository.
+
+Runs walk/read -> chunk -> embed -> upsert -> query -> (rerank ->) generate
+against an in-memory vector store and a fake LLM, then prints a JSON report
+with per-stage wall time, vectors/sec, peak RSS and query latency percentiles.
+Save reports with ``--output`` and diff two runs with ``--compare``.
+
+Usage:
+    python -m benchmarks.end_to_end --files 1000 --queries 200 --output before.json
+    python -m benchmarks.end_to_end --files 1000 --queries 200 --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.fakes import FakeCrossEncoder, FakeLLM, FakeVectorStore, HashingEncoder
+from benchmarks.synthetic import DEFAULT_MIX, generate_repository, parse_mix
+from utils.chunking import MAX_CHUNK_TOKENS, chunk_file
+from utils.context import CONTEXT_CANDIDATES, assemble_context
+from utils.embedding_cache import EmbeddingCache, set_embedding_cache
+from utils.embeddings import EMBEDDING_DIMENSION, MODEL_NAME, count_tokens, get_embeddings_batch, set_model
+from utils.lexical import LexicalIndex
+from utils.llm import stream_response
+from utils.pipeline import IngestionPipeline
+from utils.repository import get_main_files_content, read_files
+from utils.rerank import RERANK_CANDIDATES, RERANK_MODEL_NAME, rerank_matches, set_reranker
+from utils.retrieval import hybrid_query
+from utils.vector_store import query_store
+
+TINY_MODEL = 'sentence-transformers/paraphrase-MiniLM-L3-v2'
+NAMESPACE = 'benchmark'
+IDENTIFIER_PATTERN = re.compile(r"(?:def|function|func|class) (\w+)")
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    if not samples_ms:
+        return {}
+    p50, p95, p99 = np.percentile(samples_ms, [50, 95, 99])
+    return {'p50_ms': round(float(p50), 2), 'p95_ms': round(float(p95), 2), 'p99_ms': round(float(p99), 2),
+            'mean_ms': round(float(np.mean(samples_ms)), 2), 'count': len(samples_ms)}
+
+def timed(report: Dict[str, Any], stage: str, fn: Callable[[], Any], items: int = 0) -> Any:
+    """Run a stage, recording wall seconds, peak RSS and optional items/sec."""
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    entry = {'seconds': round(seconds, 4), 'peak_rss_mb': round(peak_rss_mb(), 1)}
+    count = items or (len(result) if hasattr(result, '__len__') else 0)
+    if count:
+        entry.update(items=count, items_per_sec=round(count / seconds, 1) if seconds else None)
+    report['stages'][stage] = entry
+    return result
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def install_embedder(kind: str) -> None:
+    """Serve the default model name from the chosen embedder."""
+    if kind == 'hashing':
+        set_model(HashingEncoder(EMBEDDING_DIMENSION))
+    elif kind == 'tiny':
+        from sentence_transformers import SentenceTransformer
+        set_model(SentenceTransformer(TINY_MODEL))
+
+def context_tokens(chunks: List[Dict[str, Any]]) -> int:
+    return sum(count_tokens([chunk['metadata']['text'] for chunk in chunks]))
+
+def make_questions(files: List[Dict[str, Any]], count: int, seed: int) -> List[str]:
+    """Questions naming identifiers that exist in the repository."""
+    rng = random.Random(seed)
+    identifiers = [name for file in files for name in IDENTIFIER_PATTERN.findall(file['content'])]
+    templates = ["Where is {} defined?", "What does {} do?", "How is {} used?"]
+    return [rng.choice(templates).format(rng.choice(identifiers)) for _ in range(count)]
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'config': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        'stages': {}
+    }
+    install_embedder(args.embedder)
+    if args.reranker == 'fake':
+        set_reranker(FakeCrossEncoder(args.rerank_pair_ms))
+    if not args.embedding_cache:
+        set_embedding_cache(None)
+
+    with tempfile.TemporaryDirectory() as repo_path, tempfile.TemporaryDirectory() as cache_path:
+        if args.embedding_cache and args.embedder != 'model':
+            # Fake embedders serve MODEL_NAME; keep their vectors out of the user's cache
+            set_embedding_cache(EmbeddingCache(os.path.join(cache_path, 'embedding_cache.sqlite3')))
+        timed(report, 'generate_repo', lambda: generate_repository(
+            repo_path, args.files, parse_mix(args.mix), args.lines, args.seed))
+        files = timed(report, 'walk_read', lambda: get_main_files_content(repo_path))
+        chunked = timed(report, 'chunk', lambda: [
+            (file['name'], chunk_file(file['name'], file['content'], args.max_chunk_tokens)) for file in files
+        ])
+        records = [{'id': f"{name}_{i}", 'metadata': {'file_name': name, 'chunk_index': i, 'text': text}}
+                   for name, chunks in chunked for i, text in enumerate(chunks)]
+        texts = [record['metadata']['text'] for record in records]
+        embeddings = timed(report, 'embed', lambda: get_embeddings_batch(texts, use_cache=args.embedding_cache),
+                           items=len(texts))
+        for record, values in zip(records, embeddings):
+            record['values'] = values.tolist()
+        store = FakeVectorStore(latency_ms=args.store_latency_ms)
+        timed(report, 'upsert', lambda: store.upsert(records, NAMESPACE), items=len(records))
+
+        pipeline_store = FakeVectorStore(latency_ms=args.store_latency_ms)
+        pipeline = IngestionPipeline(pipeline_store, NAMESPACE)
+        file_paths = [os.path.join(repo_path, file['name']) for file in files]
+        pipeline_stats = timed(report, 'pipeline', lambda: pipeline.run(read_files(file_paths, repo_path)),
+                               items=len(records))
+        report['stages']['pipeline']['stages'] = pipeline_stats['stages']
+
+    lexical_index = LexicalIndex()
+    timed(report, 'lexical_index', lambda: lexical_index.add(
+        [r['id'] for r in records], texts, [r['metadata'] for r in records]), items=len(records))
+
+    questions = make_questions(files, args.queries, args.seed)
+    dense_ms, hybrid_ms, assemble_ms, rerank_ms = [], [], [], []
+    contexts, tokens, reranked_tokens = [], [], []
+    for question in questions:
+        start = time.perf_counter()
+        query_store(question, store, NAMESPACE, top_k=CONTEXT_CANDIDATES)
+        dense_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        matches = hybrid_query(question, store, NAMESPACE, lexical_index, top_k=CONTEXT_CANDIDATES)
+        hybrid_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        contexts.append(assemble_context(matches))
+        assemble_ms.append((time.perf_counter() - start) * 1000)
+        tokens.append(context_tokens(contexts[-1]))
+        if args.rerank:
+            candidates = hybrid_query(question, store, NAMESPACE, lexical_index, RERANK_CANDIDATES,
+                                      RERANK_CANDIDATES, RERANK_CANDIDATES)
+            start = time.perf_counter()
+            matches = rerank_matches(question, candidates, budget_ms=args.rerank_budget_ms)
+            rerank_ms.append((time.perf_counter() - start) * 1000)
+            contexts[-1] = assemble_context(matches)
+            reranked_tokens.append(context_tokens(contexts[-1]))
+
+    llm = FakeLLM(args.llm_ttft_ms, args.llm_tokens_per_sec, args.llm_output_tokens)
+    ttft_ms, total_ms = [], []
+    for question, context in list(zip(questions, contexts))[:args.generations]:
+        stats: Dict[str, Any] = {}
+        for _ in stream_response(question, context, llm=llm, stats=stats):
+            pass
+        ttft_ms.append(stats['ttft_ms'])
+        total_ms.append(stats['total_ms'])
+
+    vectors = len(records)
+    embed_seconds = report['stages']['embed']['seconds']
+    report['summary'] = {
+        'files': len(files),
+        'vectors': vectors,
+        'sequential_vectors_per_sec': round(vectors / sum(report['stages'][s]['seconds'] for s in
+                                                          ('walk_read', 'chunk', 'embed', 'upsert')), 1),
+        'pipeline_vectors_per_sec': round(pipeline_stats['vectors_per_sec'], 1),
+        'embed_vectors_per_sec': round(vectors / embed_seconds, 1) if embed_seconds else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'mean_context_tokens': round(float(np.mean(tokens)), 1) if tokens else 0.0
+    }
+    if args.rerank:
+        report['summary']['mean_reranked_context_tokens'] = round(float(np.mean(reranked_tokens)), 1)
+    report['latency'] = {
+        'dense_query': percentiles(dense_ms),
+        'hybrid_query': percentiles(hybrid_ms),
+        'assemble_context': percentiles(assemble_ms),
+        'rerank': percentiles(rerank_ms),
+        'generate_ttft': percentiles(ttft_ms),
+        'generate_total': percentiles(total_ms)
+    }
+    return report
+
+def flatten(report: Dict[str, Any], prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Per-metric baseline, current value and ratio for the stages, summary and latency sections."""
+    before = flatten({k: baseline.get(k, {}) for k in ('stages', 'summary', 'latency')})
+    after = flatten({k: current.get(k, {}) for k in ('stages', 'summary', 'latency')})
+    return {
+        name: {'baseline': before[name], 'current': value,
+               'ratio': round(value / before[name], 3) if before[name] else None}
+        for name, value in after.items() if name in before
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=500, help='files in the synthetic repository')
+    parser.add_argument('--lines', type=int, default=200, help='mean lines per file')
+    parser.add_argument('--mix', default=','.join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                        help='language mix as ext=weight,...')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--embedder', choices=('hashing', 'tiny', 'model'), default='hashing',
+                        help=f"hashing: offline feature hashing; tiny: {TINY_MODEL}; model: {MODEL_NAME}")
+    parser.add_argument('--embedding-cache', action='store_true',
+                        help='use the on-disk embedding cache (a throwaway one unless --embedder model)')
+    parser.add_argument('--max-chunk-tokens', type=int, default=MAX_CHUNK_TOKENS)
+    parser.add_argument('--store-latency-ms', type=float, default=0.0, help='simulated vector store latency')
+    parser.add_argument('--rerank', action='store_true', help='re-rank wider candidate sets before generation')
+    parser.add_argument('--reranker', choices=('fake', 'model'), default='fake',
+                        help=f"fake: token overlap at --rerank-pair-ms per pair; model: {RERANK_MODEL_NAME}")
+    parser.add_argument('--rerank-pair-ms', type=float, default=2.0)
+    parser.add_argument('--rerank-budget-ms', type=float, default=100.0)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--generations', type=int, default=10, help='questions answered by the fake LLM')
+    parser.add_argument('--llm-ttft-ms', type=float, default=300.0)
+    parser.add_argument('--llm-tokens-per-sec', type=float, default=100.0)
+    parser.add_argument('--llm-output-tokens', type=int, default=50)
+    parser.add_argument('--output', help='write the report to this file')
+    parser.add_argument('--compare', help='baseline report to compare against')
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            report['comparison'] = compare(json.load(f), report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Offline stand-ins for the embedding model, vector store, re-ranker and LLM.
+
+They implement the same interfaces as the real backends so benchmarks
+exercise the project's own code paths without network access.
+"""
+import hashlib
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+class _RegexTokenizer:
+    def __call__(self, texts: Sequence[str], add_special_tokens: bool = True, **kwargs) -> Dict[str, List[List[str]]]:
+        return {'input_ids': [TOKEN_PATTERN.findall(text) for text in texts]}
+
+class HashingEncoder:
+    """Feature-hashing embedder with SentenceTransformer's ``encode``/``tokenizer``.
+
+    Tokens are hashed into ``dimension`` buckets and the counts are
+    L2-normalized, so texts sharing identifiers are similar. It needs no
+    model download and costs a fraction of a transformer forward pass.
+    """
+
+    def __init__(self, dimension: int = 768):
+        self.dimension = dimension
+        self.max_seq_length = 384
+        self.tokenizer = _RegexTokenizer()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in TOKEN_PATTERN.findall(text.lower())[:self.max_seq_length]:
+            bucket = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest(), 'little')
+            vector[bucket % self.dimension] += 1.0 if bucket & 1 << 31 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences: Union[str, Sequence[str]], batch_size: int = 32,
+               **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            return self._encode_one(sentences)
+        if not sentences:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.stack([self._encode_one(text) for text in sentences])
+
+class FakeVectorStore:
+    """In-memory exact-search VectorStore with optional simulated latency."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.name = f"fake:{id(self)}"
+        self.latency = latency_ms / 1000
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, Dict[str, Any]] = {}
+
+    def _namespace(self, namespace: str) -> Dict[str, Any]:
+        return self._namespaces.setdefault(namespace, {'rows': {}, 'ids': [], 'vectors': [], 'metadata': [],
+                                                       'matrix': None})
+
+    def upsert(self, vectors: Iterable[Dict[str, Any]], namespace: str) -> Dict[str, Any]:
+        count = 0
+        for vector in vectors:
+            time.sleep(self.latency / 100)
+            with self._lock:
+                ns = self._namespace(namespace)
+                row = ns['rows'].get(vector['id'])
+                if row is None:
+                    ns['rows'][vector['id']] = len(ns['ids'])
+                    ns['ids'].append(vector['id'])
+                    ns['vectors'].append(np.asarray(vector['values'], dtype=np.float32))
+                    ns['metadata'].append(vector['metadata'])
+                else:
+                    ns['vectors'][row] = np.asarray(vector['values'], dtype=np.float32)
+                    ns['metadata'][row] = vector['metadata']
+                ns['matrix'] = None
+            count += 1
+        return {'vectors': count, 'batches': 1, 'retries': 0, 'seconds': 0.0}
+
+    def query(self, vector: Sequence[float], top_k: int, namespace: str) -> List[Dict[str, Any]]:
+        time.sleep(self.latency)
+        with self._lock:
+            ns = self._namespace(namespace)
+            if not ns['ids']:
+                return []
+            if ns['matrix'] is None:
+                matrix = np.stack(ns['vectors'])
+                ns['matrix'] = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            matrix, ids, metadata = ns['matrix'], list(ns['ids']), list(ns['metadata'])
+        query = np.asarray(vector, dtype=np.float32)
+        scores = matrix @ (query / (np.linalg.norm(query) or 1.0))
+        top = np.argsort(-scores)[:top_k]
+        return [{'id': ids[row], 'score': float(scores[row]), 'metadata': metadata[row]} for row in top]
+
+    def delete(self, ids: Sequence[str], namespace: str) -> None:
+        with self._lock:
+            ns = self._namespace(namespace)
+            doomed = {ns['rows'][id_] for id_ in ids if id_ in ns['rows']}
+            keep = [row for row in range(len(ns['ids'])) if row not in doomed]
+            ns['ids'] = [ns['ids'][row] for row in keep]
+            ns['vectors'] = [ns['vectors'][row] for row in keep]
+            ns['metadata'] = [ns['metadata'][row] for row in keep]
+            ns['rows'] = {id_: row for row, id_ in enumerate(ns['ids'])}
+            ns['matrix'] = None
+
+class FakeCrossEncoder:
+    """Cross-encoder with CrossEncoder's ``predict``: token-overlap scores at a fixed cost per pair."""
+
+    def __init__(self, pair_ms: float = 2.0):
+        self.pair_seconds = pair_ms / 1000
+
+    def predict(self, pairs: Sequence[Sequence[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        time.sleep(self.pair_seconds * len(pairs))
+        return np.array([len(set(TOKEN_PATTERN.findall(query.lower())) & set(TOKEN_PATTERN.findall(text.lower())))
+                         for query, text in pairs], dtype=np.float32)
+
+class FakeLLM:
+    """LLM that streams a canned answer with a fixed time to first token and token rate."""
+
+    def __init__(self, ttft_ms: float = 300.0, tokens_per_sec: float = 100.0, output_tokens: int = 200):
+        self.ttft = ttft_ms / 1000
+        self.token_delay = 1 / tokens_per_sec if tokens_per_sec > 0 else 0.0
+        self.output_tokens = output_tokens
+
+    def generate(self, prompt: str) -> str:
+        return ''.join(self.stream(prompt))
+
+    def stream(self, prompt: str, usage: Optional[Dict[str, int]] = None) -> Iterator[str]:
+        time.sleep(self.ttft)
+        for i in range(self.output_tokens):
+            if i:
+                time.sleep(self.token_delay)
+            yield f"token{i} "
+        if usage is not None:
+            usage['output_tokens'] = self.output_tokens
@@ -0,0 +1,86 @@
+"""Guard the import-time budget of the library with ``python -X importtime``.
+
+Each check imports a statement in a fresh interpreter, parses the
+importtime report and fails when a forbidden package (the embedding
+model, vector store or LLM client libraries, Streamlit) was imported or
+when the import took longer than the budget. Modules the interpreter
+imports at startup (``site``, encodings) are not counted, and the
+fastest of ``--repeat`` runs counts, so bytecode compilation of the
+first run does not. tests/test_import_time.py runs the same checks in
+the test suite.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-scale 2 --top 15
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Any, Dict, List, Set, Tuple
+
+HEAVY_PACKAGES = ('sentence_transformers', 'torch', 'transformers', 'pinecone', 'google.generativeai', 'git',
+                  'streamlit')
+CHECKS = [
+    # (statement, budget in ms, forbidden packages)
+    ('import utils', 25, HEAVY_PACKAGES),
+    ('from utils import get_repo_namespace, list_namespaces, INDEX_NAME', 200, HEAVY_PACKAGES),
+    ('from utils import hybrid_query, fanout_query, index_repository, create_vector_store, assemble_context, '
+     'stream_response, rerank_matches, start_warmup', 300, HEAVY_PACKAGES),
+]
+LINE_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def run_importtime(statement: str) -> List[Tuple[str, int, int, int]]:
+    """Import a statement in a fresh interpreter.
+
+    Returns:
+        List of (module, self microseconds, cumulative microseconds, depth)
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{result.stderr[-2000:]}")
+    modules = []
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return modules
+
+def measure(statement: str, budget_ms: float, forbidden: Tuple[str, ...], repeat: int, top: int,
+            startup: Set[str]) -> Dict[str, Any]:
+    """Run one check and report its total time, violations and slowest imports."""
+    runs = [[module for module in run_importtime(statement) if module[0] not in startup] for _ in range(repeat)]
+    totals = [sum(cumulative for _, _, cumulative, depth in run if depth == 0) / 1000 for run in runs]
+    best = runs[totals.index(min(totals))]
+    loaded = {name for name, _, _, _ in best}
+    violations = sorted(package for package in forbidden
+                        if any(name == package or name.startswith(package + '.') for name in loaded))
+    slowest = sorted(((name, cumulative) for name, _, cumulative, depth in best if depth == 0),
+                     key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'statement': statement,
+        'total_ms': round(min(totals), 1),
+        'budget_ms': budget_ms,
+        'forbidden_imported': violations,
+        'ok': not violations and min(totals) <= budget_ms,
+        'slowest_top_level_ms': {name: round(cumulative / 1000, 1) for name, cumulative in slowest}
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=8, help='slowest top-level imports to report per check')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='multiply every budget, e.g. on slow CI hosts')
+    args = parser.parse_args()
+
+    startup = {name for name, _, _, _ in run_importtime('pass')}
+    results = [measure(statement, budget_ms * args.budget_scale, forbidden, args.repeat, args.top, startup)
+               for statement, budget_ms, forbidden in CHECKS]
+    print(json.dumps(results, indent=2))
+    return 0 if all(result['ok'] for result in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Recall, latency and memory of the local store's compact code options.
+
+Vectors are synthetic: clustered points in a low-rank subspace plus
+isotropic noise, which resembles the anisotropy of sentence embeddings.
+
+Usage:
+    python -m benchmarks.quantization --vectors 200000 --configs float32 int16 int8 int8:256
+"""
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from utils.local_store import LocalVectorStore
+
+NAMESPACE = 'benchmark'
+
+def make_vectors(count: int, dimension: int, rank: int = 64, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Unit vectors drawn around cluster centers in a random ``rank``-dimensional subspace."""
+    rng = np.random.default_rng(seed)
+    basis = rng.standard_normal((rank, dimension)).astype(np.float32)
+    centers = rng.standard_normal((clusters, rank)).astype(np.float32)
+    latent = centers[rng.integers(clusters, size=count)] + 0.5 * rng.standard_normal((count, rank)).astype(np.float32)
+    vectors = latent @ basis + 0.5 * rng.standard_normal((count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def parse_config(config: str):
+    """'int8:256' -> ('int8', 256); 'int16' -> ('int16', None)."""
+    kind, _, pca = config.partition(':')
+    return kind, int(pca) if pca else None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vectors', type=int, default=100_000)
+    parser.add_argument('--dimension', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--rescore-multiplier', type=int, default=4)
+    parser.add_argument('--ivf', action='store_true', help='also use the IVF index (default: exhaustive scan)')
+    parser.add_argument('--configs', nargs='+', default=['float32', 'int16', 'int8', 'int8:256', 'int16:192'],
+                        help='quantization[:pca_dimension]')
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.vectors, args.dimension)
+    records = [{'id': str(i), 'values': vector, 'metadata': {}} for i, vector in enumerate(vectors)]
+    results = []
+    for config in args.configs:
+        kind, pca_dimension = parse_config(config)
+        with tempfile.TemporaryDirectory() as path:
+            store = LocalVectorStore(path, dimension=args.dimension, quantization=kind, pca_dimension=pca_dimension,
+                                     ivf_min_vectors=1 if args.ivf else args.vectors + 1,
+                                     rescore_multiplier=args.rescore_multiplier)
+            store.upsert(records, NAMESPACE)
+            start = time.perf_counter()
+            store.query(vectors[0], args.top_k, NAMESPACE)
+            build_seconds = time.perf_counter() - start
+            recall = store.measure_recall(NAMESPACE, args.queries, args.top_k)
+            state = store._namespace(NAMESPACE)
+            scanned = state.quantizer['codes'] if state.quantizer is not None else None
+            bytes_per_vector = scanned.itemsize * scanned.shape[1] if scanned is not None else args.dimension * 4
+        results.append({
+            'config': config,
+            'recall_at_k': round(recall['recall_at_k'], 4),
+            'mean_query_ms': round(recall['mean_query_ms'], 3),
+            'scanned_bytes_per_vector': bytes_per_vector,
+            'scanned_mb': round(bytes_per_vector * args.vectors / 2 ** 20, 1),
+            'first_query_seconds': round(build_seconds, 3)
+        })
+    print(json.dumps({'vectors': args.vectors, 'dimension': args.dimension, 'top_k': args.top_k,
+                      'rescore_multiplier': args.rescore_multiplier, 'ivf': args.ivf, 'results': results}, indent=2))
+
+if __name__ == '__main__':
+    main()
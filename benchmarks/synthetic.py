@@ -0,0 +1,125 @@
+"""Generate synthetic repositories for benchmarks.
+
+Usage:
+    python -m benchmarks.synthetic /tmp/synthetic-repo --files 2000 --mix py=0.5,js=0.3,md=0.2
+"""
+import argparse
+import json
+import os
+import random
+import string
+from typing import Dict, List
+
+DEFAULT_MIX = {'py': 0.4, 'js': 0.2, 'ts': 0.1, 'go': 0.1, 'md': 0.1, 'ipynb': 0.1}
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse an ``ext=weight,...`` language mix."""
+    pairs = (item.split('=') for item in mix.split(',') if item)
+    return {ext.strip().lstrip('.'): float(weight) for ext, weight in pairs}
+
+class _Names:
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(800)]
+
+    def snake(self, parts: int = 2) -> str:
+        return '_'.join(self.rng.choices(self.words, k=parts))
+
+    def camel(self, parts: int = 2) -> str:
+        return ''.join(word.capitalize() for word in self.rng.choices(self.words, k=parts))
+
+    def sentence(self, words: int = 12) -> str:
+        return ' '.join(self.rng.choices(self.words, k=words)).capitalize() + '.'
+
+def _python(names: _Names, lines: int) -> str:
+    out: List[str] = ['import os', 'import json', '']
+    while len(out) < lines:
+        if names.rng.random() < 0.3:
+            out += [f"class {names.camel()}:", f'    """{names.sentence()}"""', '']
+            for _ in range(names.rng.randint(1, 4)):
+                out += [f"    def {names.snake()}(self, {names.snake(1)}):",
+                        f"        return self.{names.snake()}({names.snake(1)}) + {names.rng.randint(0, 99)}", '']
+        else:
+            args = ', '.join(names.snake(1) for _ in range(names.rng.randint(0, 3)))
+            out += [f"def {names.snake()}({args}):", f'    """{names.sentence()}"""']
+            for _ in range(names.rng.randint(2, 12)):
+                out.append(f"    {names.snake()} = {names.snake()}({names.snake(1)}, {names.rng.randint(0, 999)})")
+            out += [f"    return {names.snake(1)}", '', '']
+    return '\n'.join(out)
+
+def _brace(names: _Names, lines: int, ext: str) -> str:
+    out: List[str] = []
+    while len(out) < lines:
+        name = names.camel() if ext == 'go' else names.snake(1) + names.camel(1)
+        header = f"func {name}(value int) int {{" if ext == 'go' else f"export function {name}(value) {{"
+        out += [f"// {names.sentence()}", header]
+        for _ in range(names.rng.randint(2, 12)):
+            out.append(f"    value = {names.snake(1)}{names.camel(1)}(value, {names.rng.randint(0, 999)})")
+        out += ['    return value', '}', '']
+    return '\n'.join(out)
+
+def _markdown(names: _Names, lines: int) -> str:
+    out: List[str] = [f"# {names.camel()}", '']
+    while len(out) < lines:
+        out += [f"## {names.sentence(4)}", '', names.sentence(30), '']
+    return '\n'.join(out)
+
+def _notebook(names: _Names, lines: int) -> str:
+    cells = []
+    while sum(len(cell['source']) for cell in cells) < lines:
+        cells.append({'cell_type': 'markdown', 'metadata': {}, 'source': [names.sentence() + '\n']})
+        source = _python(names, names.rng.randint(5, 20)).splitlines(keepends=True)
+        cells.append({'cell_type': 'code', 'metadata': {}, 'execution_count': 1, 'source': source,
+                      'outputs': [{'output_type': 'stream', 'name': 'stdout', 'text': [names.sentence()]}]})
+    return json.dumps({'cells': cells, 'metadata': {}, 'nbformat': 4, 'nbformat_minor': 5}, indent=1)
+
+def generate_repository(path: str, files: int = 500, mix: Dict[str, float] = DEFAULT_MIX,
+                        lines_per_file: int = 200, seed: int = 0) -> List[str]:
+    """Write a deterministic synthetic repository.
+
+    Args:
+        path: Directory to create the files in
+        files: Number of files
+        mix: Extension -> relative weight
+        lines_per_file: Mean lines per file (actual sizes vary 0.25x-2x)
+        seed: Random seed
+
+    Returns:
+        Repository-relative paths of the generated files
+    """
+    rng = random.Random(seed)
+    names = _Names(rng)
+    extensions, weights = zip(*mix.items())
+    directories = [os.path.join(*rng.choices(names.words, k=rng.randint(1, 3))) for _ in range(max(1, files // 20))]
+    paths = []
+    for i in range(files):
+        ext = rng.choices(extensions, weights)[0]
+        lines = max(5, int(lines_per_file * rng.uniform(0.25, 2.0)))
+        if ext == 'py':
+            content = _python(names, lines)
+        elif ext == 'md':
+            content = _markdown(names, lines)
+        elif ext == 'ipynb':
+            content = _notebook(names, lines)
+        else:
+            content = _brace(names, lines, ext)
+        rel_path = os.path.join(rng.choice(directories), f"{names.snake()}_{i}.{ext}")
+        os.makedirs(os.path.join(path, os.path.dirname(rel_path)), exist_ok=True)
+        with open(os.path.join(path, rel_path), 'w', encoding='utf-8') as f:
+            f.write(content)
+        paths.append(rel_path)
+    return paths
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help='directory to write the repository to')
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--lines', type=int, default=200, help='mean lines per file')
+    parser.add_argument('--mix', default=','.join(f"{k}={v}" for k, v in DEFAULT_MIX.items()))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    paths = generate_repository(args.path, args.files, parse_mix(args.mix), args.lines, args.seed)
+    print(f"Wrote {len(paths)} files to {args.path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""Index many repositories headlessly, e.g. from a nightly job.
+
+Reads GitHub URLs (one per line, ``#`` comments allowed) and runs a
+configurable number of repository jobs concurrently. Each job clones or
+refreshes the cached checkout and incrementally indexes it into the
+shared index; all jobs share one warm embedding model. Finished
+repositories are recorded in a checkpoint file, so an interrupted or
+partly failed run resumes where it stopped. The checkpoint belongs to
+one run: it is discarded when the URL file changes, when the run id
+(today's UTC date by default) changes or when it is older than
+``--max-age-hours``, so a permanently failing repository cannot make
+later nightly runs skip everything else.
+
+Usage:
+    python bulk_index.py repos.txt --jobs 4
+    python bulk_index.py repos.txt --jobs 8 --backend local --embedding-workers 4
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from utils import (
+    initialize_pinecone,
+    checkout_repository,
+    create_vector_store,
+    index_repository,
+    get_model,
+    get_repo_namespace,
+    start_embedding_workers,
+    stop_embedding_workers,
+    INDEX_NAME,
+    MAX_CHUNK_TOKENS,
+    VECTOR_BACKENDS
+)
+from utils.config import DATA_DIR
+
+# Constants
+DEFAULT_JOBS = 4
+CLONE_CONCURRENCY = int(os.environ.get('CODEBASE_RAG_GITHUB_CONCURRENCY', '4'))
+CHECKPOINT_PATH = os.path.join(DATA_DIR, 'bulk_index_checkpoint.json')
+CHECKPOINT_MAX_AGE_HOURS = 24
+
+logger = logging.getLogger('bulk_index')
+
+def read_urls(path: str) -> List[str]:
+    """Read repository URLs, skipping blank lines, comments and duplicates."""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = (line.split('#', 1)[0].strip() for line in f)
+        return list(dict.fromkeys(line for line in lines if line))
+
+def urls_digest(urls: List[str]) -> str:
+    """Identity of a URL list, independent of comments and blank lines."""
+    return hashlib.sha256('\n'.join(urls).encode('utf-8')).hexdigest()
+
+class Checkpoint:
+    """Job results of one run, persisted atomically after every job.
+
+    Finished and failed repositories are kept apart: only finished ones
+    are skipped on resume, and failed ones are retried.
+    """
+
+    def __init__(self, path: str, run: Dict[str, str], max_age_hours: float = CHECKPOINT_MAX_AGE_HOURS,
+                 restart: bool = False):
+        """Open the checkpoint of a run, discarding one left by a different run.
+
+        Args:
+            path: Checkpoint file
+            run: Run identity: 'urls' (digest of the URL list) and 'run_id'
+            max_age_hours: Age after which a checkpoint of the same run is discarded
+            restart: Discard any existing checkpoint
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.state: Dict[str, Any] = {'run': dict(run, started=time.time()), 'done': {}, 'failed': {}}
+        previous = self._read() if not restart else None
+        if previous is not None:
+            reason = self._stale_reason(previous, run, max_age_hours)
+            if reason is None:
+                self.state = previous
+            else:
+                logger.info("Discarding checkpoint %s: %s", path, reason)
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", self.path, e)
+            return None
+
+    @staticmethod
+    def _stale_reason(previous: Dict[str, Any], run: Dict[str, str], max_age_hours: float) -> Optional[str]:
+        previous_run = previous.get('run') or {}
+        if previous_run.get('urls') != run['urls']:
+            return "the URL file changed"
+        if previous_run.get('run_id') != run['run_id']:
+            return f"it belongs to run {previous_run.get('run_id')!r}"
+        if time.time() - previous_run.get('started', 0) > max_age_hours * 3600:
+            return f"it is older than {max_age_hours:g} hours"
+        return None
+
+    @property
+    def failed(self) -> Dict[str, Dict[str, Any]]:
+        return self.state['failed']
+
+    def done(self, url: str) -> bool:
+        return url in self.state['done']
+
+    def record(self, url: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            finished = entry['status'] == 'done'
+            self.state['done' if finished else 'failed'][url] = entry
+            self.state['failed' if finished else 'done'].pop(url, None)
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, indent=1)
+            os.replace(self.path + '.tmp', self.path)
+
+    def remove(self) -> None:
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+def index_one(url: str, store, max_chunk_tokens: int, clone_slots: threading.Semaphore,
+              checkpoint: Checkpoint) -> Dict[str, Any]:
+    """Clone and index one repository and record the result in the checkpoint.
+
+    Returns:
+        Checkpoint entry with status, timings and indexing stats
+    """
+    start = time.perf_counter()
+    entry: Dict[str, Any] = {'status': 'failed', 'namespace': None, 'error': None}
+    try:
+        entry['namespace'] = namespace = get_repo_namespace(url)
+        with contextlib.ExitStack() as stack:
+            with clone_slots:
+                repo_path = stack.enter_context(checkout_repository(url))
+            if not repo_path:
+                raise RuntimeError("Repository cloning failed")
+            clone_seconds = time.perf_counter() - start
+            stats = index_repository(repo_path, store, namespace, max_chunk_tokens)
+        if stats is None:
+            raise RuntimeError("Indexing failed")
+        entry.update(status='done', clone_seconds=round(clone_seconds, 2),
+                     stats={k: v for k, v in stats.items() if k not in ('changed_files', 'stages')})
+    except Exception as e:
+        entry['error'] = str(e)
+    entry.update(seconds=round(time.perf_counter() - start, 2), finished=time.time())
+    checkpoint.record(url, entry)
+    return entry
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('urls_file', help='file with one GitHub repository URL per line')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help='repositories indexed concurrently')
+    parser.add_argument('--backend', choices=VECTOR_BACKENDS,
+                        help="vector store (default: pinecone when PINECONE_API_KEY is set, else local)")
+    parser.add_argument('--index-name', default=INDEX_NAME)
+    parser.add_argument('--max-chunk-tokens', type=int, default=MAX_CHUNK_TOKENS)
+    parser.add_argument('--clone-concurrency', type=int, default=CLONE_CONCURRENCY)
+    parser.add_argument('--embedding-workers', type=int, default=0,
+                        help='encode in this many worker processes (0: in-process)')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+    parser.add_argument('--run-id', default=time.strftime('%Y-%m-%d', time.gmtime()),
+                        help='resume only a checkpoint of this run (default: the UTC date)')
+    parser.add_argument('--max-age-hours', type=float, default=CHECKPOINT_MAX_AGE_HOURS,
+                        help='discard a checkpoint of the same run older than this')
+    parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint')
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    logger.setLevel(logging.INFO)
+    load_dotenv()
+    backend = args.backend or os.environ.get('CODEBASE_RAG_VECTOR_BACKEND') or \
+        ('pinecone' if os.environ.get('PINECONE_API_KEY') else 'local')
+    if backend == 'pinecone' and not os.environ.get('PINECONE_API_KEY'):
+        parser.error("PINECONE_API_KEY is not set")
+    pc = initialize_pinecone(os.environ['PINECONE_API_KEY']) if backend == 'pinecone' else None
+    store = create_vector_store(backend, args.index_name, pc)
+
+    urls = read_urls(args.urls_file)
+    checkpoint = Checkpoint(args.checkpoint, {'urls': urls_digest(urls), 'run_id': args.run_id},
+                            args.max_age_hours, restart=args.restart)
+    pending = [url for url in urls if not checkpoint.done(url)]
+    logger.info("%d repositories, %d already indexed according to %s", len(urls), len(urls) - len(pending),
+                args.checkpoint)
+
+    pool = start_embedding_workers(args.embedding_workers) if args.embedding_workers > 0 else None
+    get_model()
+    clone_slots = threading.BoundedSemaphore(args.clone_concurrency)
+    start = time.perf_counter()
+    totals = {'done': 0, 'failed': 0, 'files': 0, 'vectors': 0}
+    executor = ThreadPoolExecutor(max_workers=args.jobs, thread_name_prefix='repo-job')
+    try:
+        futures = {executor.submit(index_one, url, store, args.max_chunk_tokens, clone_slots, checkpoint): url
+                   for url in pending}
+        for future in as_completed(futures):
+            url, entry = futures[future], future.result()
+            totals[entry['status']] += 1
+            stats = entry.get('stats') or {}
+            totals['files'] += stats.get('added', 0) + stats.get('modified', 0)
+            totals['vectors'] += stats.get('vectors', 0)
+            progress = f"[{totals['done'] + totals['failed']}/{len(pending)}]"
+            if entry['status'] == 'done':
+                logger.info("%s %s: %d vectors from %d changed files in %.1fs", progress, entry['namespace'],
+                            stats['vectors'], stats['added'] + stats['modified'], entry['seconds'])
+            else:
+                logger.error("%s %s failed: %s", progress, url, entry['error'])
+    except KeyboardInterrupt:
+        logger.warning("Interrupted; running jobs finish and are checkpointed, rerun the same command to resume")
+        executor.shutdown(wait=True, cancel_futures=True)
+        return 130
+    finally:
+        executor.shutdown(wait=True)
+        if pool is not None:
+            stop_embedding_workers(pool)
+
+    seconds = time.perf_counter() - start
+    summary = dict(totals, skipped=len(urls) - len(pending), seconds=round(seconds, 1),
+                   vectors_per_sec=round(totals['vectors'] / seconds, 1) if seconds else 0.0,
+                   repos_per_min=round(len(pending) / seconds * 60, 1) if seconds else 0.0)
+    print(json.dumps(summary))
+    if totals['failed']:
+        logger.error("%d repositories failed (%s); rerun to retry them", totals['failed'],
+                     ', '.join(sorted(checkpoint.failed)))
+        return 1
+    checkpoint.remove()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
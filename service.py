@@ -0,0 +1,326 @@
+"""HTTP service for indexing repositories and answering questions.
+
+Run with ``uvicorn service:app``. Credentials come from the environment
+(``PINECONE_API_KEY``, ``GEMINI_API_KEY``, or a ``.env`` file). Indexing
+runs as background jobs on a bounded worker pool; queries run their
+blocking retrieval and generation calls in threads so the event loop
+keeps serving other requests.
+"""
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from utils import (
+    initialize_pinecone,
+    initialize_gemini,
+    checkout_repository,
+    create_vector_store,
+    index_repository,
+    hybrid_query,
+    fanout_query,
+    get_lexical_index,
+    list_namespaces,
+    assemble_context,
+    rerank_matches,
+    stream_response,
+    embed_query,
+    get_answer_cache,
+    get_telemetry,
+    get_repo_namespace,
+    INDEX_NAME,
+    MAX_CHUNK_TOKENS,
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_CANDIDATES,
+    VECTOR_BACKENDS,
+    ANSWER_CACHE_THRESHOLD,
+    RERANK_CANDIDATES,
+    RERANK_LATENCY_BUDGET_MS,
+    WARMUP_ENABLED,
+    start_warmup
+)
+
+load_dotenv()
+
+# Constants
+INDEX_WORKERS = int(os.environ.get('CODEBASE_RAG_INDEX_WORKERS', '2'))
+UPSTREAM_LIMITS = {
+    'github': int(os.environ.get('CODEBASE_RAG_GITHUB_CONCURRENCY', '4')),
+    'vector_store': int(os.environ.get('CODEBASE_RAG_VECTOR_STORE_CONCURRENCY', '16')),
+    'llm': int(os.environ.get('CODEBASE_RAG_LLM_CONCURRENCY', '8')),
+    'rerank': int(os.environ.get('CODEBASE_RAG_RERANK_CONCURRENCY', '2'))
+}
+MAX_JOBS = 1000
+ANALYSIS_QUESTIONS = {
+    'code-review': "Perform a code review of this repository.",
+    'complexity': "Analyze the code complexity of this repository.",
+    'dependencies': "Analyze the dependencies of this repository."
+}
+
+class IndexRequest(BaseModel):
+    github_url: str
+    backend: Optional[str] = None
+    max_chunk_tokens: int = MAX_CHUNK_TOKENS
+
+class QueryRequest(BaseModel):
+    github_url: str
+    question: str
+    backend: Optional[str] = None
+    context_token_budget: int = CONTEXT_TOKEN_BUDGET
+    use_answer_cache: bool = True
+    rerank: bool = False
+    rerank_budget_ms: float = RERANK_LATENCY_BUDGET_MS
+
+class MultiQueryRequest(BaseModel):
+    question: str
+    github_urls: Optional[List[str]] = None
+    backend: Optional[str] = None
+    context_token_budget: int = CONTEXT_TOKEN_BUDGET
+    rerank: bool = False
+    rerank_budget_ms: float = RERANK_LATENCY_BUDGET_MS
+
+class AnalyzeRequest(BaseModel):
+    github_url: str
+    backend: Optional[str] = None
+
+_jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_jobs_lock = threading.Lock()
+_index_executor = ThreadPoolExecutor(max_workers=INDEX_WORKERS, thread_name_prefix='index-job')
+_clone_slots = threading.BoundedSemaphore(UPSTREAM_LIMITS['github'])
+_upstreams: Dict[str, asyncio.Semaphore] = {}
+_pinecone = None
+
+def _default_backend() -> str:
+    if os.environ.get('CODEBASE_RAG_VECTOR_BACKEND'):
+        return os.environ['CODEBASE_RAG_VECTOR_BACKEND']
+    return 'pinecone' if os.environ.get('PINECONE_API_KEY') else 'local'
+
+def _get_shared_store(backend: Optional[str]):
+    """Resolve the shared vector store that holds one namespace per repository."""
+    backend = backend or _default_backend()
+    if backend not in VECTOR_BACKENDS:
+        raise HTTPException(status_code=400, detail=f"Unknown backend '{backend}'")
+    if backend == 'pinecone' and _pinecone is None:
+        raise HTTPException(status_code=503, detail="PINECONE_API_KEY is not configured")
+    return create_vector_store(backend, INDEX_NAME, _pinecone)
+
+def _get_namespace(github_url: str) -> str:
+    try:
+        return get_repo_namespace(github_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _get_store(github_url: str, backend: Optional[str]):
+    """Resolve the vector store and namespace of a repository."""
+    namespace = _get_namespace(github_url)
+    return _get_shared_store(backend), namespace
+
+def _job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    view = {k: v for k, v in job.items() if k != 'pipeline'}
+    pipeline = job.get('pipeline')
+    if pipeline is not None:
+        view['progress'] = dict(pipeline.stats(), files_total=job['files_total'])
+    return view
+
+def _run_index_job(job: Dict[str, Any], store, namespace: str, max_chunk_tokens: int) -> None:
+    def progress(pipeline, files_total):
+        job.update(status='indexing', pipeline=pipeline, files_total=files_total)
+
+    job.update(status='cloning', started=time.time())
+    try:
+        with ExitStack() as stack:
+            with _clone_slots:
+                repo_path = stack.enter_context(checkout_repository(job['github_url']))
+            if not repo_path:
+                raise RuntimeError("Repository cloning failed")
+            job['status'] = 'diffing'
+            stats = index_repository(repo_path, store, namespace, max_chunk_tokens, progress=progress)
+        if stats is None:
+            raise RuntimeError("Indexing failed")
+        job.update(status='done', stats={k: v for k, v in stats.items() if k != 'changed_files'})
+    except Exception as e:
+        job.update(status='failed', error=str(e))
+    finally:
+        job.update(finished=time.time(), pipeline=None)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _pinecone
+    _upstreams.update({name: asyncio.Semaphore(limit) for name, limit in UPSTREAM_LIMITS.items()})
+    if os.environ.get('PINECONE_API_KEY'):
+        _pinecone = initialize_pinecone(os.environ['PINECONE_API_KEY'])
+    if os.environ.get('GEMINI_API_KEY'):
+        initialize_gemini(os.environ['GEMINI_API_KEY'])
+    if WARMUP_ENABLED:
+        start_warmup()
+    yield
+    _index_executor.shutdown(wait=False, cancel_futures=True)
+
+app = FastAPI(title="Codebase RAG", lifespan=lifespan)
+
+@app.post("/index", status_code=202)
+async def index(request: IndexRequest) -> Dict[str, Any]:
+    """Enqueue an indexing job; an identical queued or running job is reused.
+
+    Only finished jobs are forgotten to make room for new ones, oldest
+    first; when all ``MAX_JOBS`` jobs are still queued or running, the
+    request is rejected with 503.
+    """
+    store, namespace = _get_store(request.github_url, request.backend)
+    with _jobs_lock:
+        for job in _jobs.values():
+            active = job['status'] not in ('done', 'failed')
+            if active and (job['store'], job['namespace']) == (store.name, namespace):
+                return _job_view(job)
+        if len(_jobs) >= MAX_JOBS:
+            finished = [job_id for job_id, job in _jobs.items() if job['status'] in ('done', 'failed')]
+            for job_id in finished[:len(_jobs) - MAX_JOBS + 1]:
+                del _jobs[job_id]
+        if len(_jobs) >= MAX_JOBS:
+            raise HTTPException(status_code=503, detail=f"{MAX_JOBS} indexing jobs are queued or running; retry later")
+        job = {
+            'id': uuid.uuid4().hex,
+            'github_url': request.github_url,
+            'store': store.name,
+            'namespace': namespace,
+            'status': 'queued',
+            'created': time.time(),
+            'started': None,
+            'finished': None,
+            'stats': None,
+            'error': None
+        }
+        _jobs[job['id']] = job
+    _index_executor.submit(_run_index_job, job, store, namespace, request.max_chunk_tokens)
+    return _job_view(job)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """Poll an indexing job; running jobs report live pipeline progress."""
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return _job_view(job)
+
+def _generate(question: str, context_chunks: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+    stats: Dict[str, Any] = {}
+    return ''.join(stream_response(question, context_chunks, stats=stats)), stats
+
+async def _rerank(question: str, matches: List[Dict[str, Any]], budget_ms: float) -> List[Dict[str, Any]]:
+    async with _upstreams['rerank']:
+        return await asyncio.to_thread(rerank_matches, question, matches, budget_ms=budget_ms)
+
+async def _answer(store, namespace: str, question: str, context_token_budget: int,
+                  use_answer_cache: bool, rerank_budget_ms: Optional[float] = None) -> Dict[str, Any]:
+    lexical_index = await asyncio.to_thread(get_lexical_index, store.name, namespace)
+    if lexical_index.size == 0:
+        raise HTTPException(status_code=404, detail="Repository is not indexed; POST /index first")
+    start = time.perf_counter()
+    answer_cache = get_answer_cache()
+    question_embedding = await asyncio.to_thread(embed_query, question)
+    if use_answer_cache:
+        cached = await asyncio.to_thread(answer_cache.lookup, store.name, namespace, question_embedding,
+                                         ANSWER_CACHE_THRESHOLD)
+        if cached is not None:
+            return {'answer': cached['answer'], 'cached': True, 'sources': cached['sources'],
+                    'timings': {'total_ms': round((time.perf_counter() - start) * 1000, 1)}}
+
+    candidates = CONTEXT_CANDIDATES if rerank_budget_ms is None else RERANK_CANDIDATES
+    async with _upstreams['vector_store']:
+        matches = await asyncio.to_thread(hybrid_query, question, store, namespace, lexical_index,
+                                          candidates, candidates, candidates)
+    if rerank_budget_ms is not None:
+        matches = await _rerank(question, matches, rerank_budget_ms)
+    context_chunks = await asyncio.to_thread(assemble_context, matches, context_token_budget)
+    retrieval_ms = (time.perf_counter() - start) * 1000
+    async with _upstreams['llm']:
+        answer, generation = await asyncio.to_thread(_generate, question, context_chunks)
+    if generation['error']:
+        raise HTTPException(status_code=502, detail="LLM error")
+    total_ms = (time.perf_counter() - start) * 1000
+    sources = sorted({chunk['metadata']['file_name'] for chunk in context_chunks})
+    if use_answer_cache:
+        await asyncio.to_thread(answer_cache.put, store.name, namespace, question, question_embedding, answer,
+                                total_ms, sources=sources)
+    return {'answer': answer, 'cached': False, 'sources': sources,
+            'timings': {'retrieval_ms': round(retrieval_ms, 1), 'total_ms': round(total_ms, 1),
+                        'ttft_ms': generation['ttft_ms']}}
+
+@app.post("/query")
+async def query(request: QueryRequest) -> Dict[str, Any]:
+    """Answer a question about an indexed repository."""
+    store, namespace = _get_store(request.github_url, request.backend)
+    return await _answer(store, namespace, request.question, request.context_token_budget,
+                         request.use_answer_cache, request.rerank_budget_ms if request.rerank else None)
+
+@app.post("/query/multi")
+async def query_multi(request: MultiQueryRequest) -> Dict[str, Any]:
+    """Answer a question across several indexed repositories (all of them if none are given)."""
+    store = _get_shared_store(request.backend)
+    if request.github_urls:
+        namespaces = [_get_namespace(url) for url in request.github_urls]
+    else:
+        namespaces = await asyncio.to_thread(list_namespaces, store.name)
+    if not namespaces:
+        raise HTTPException(status_code=404, detail="No repositories are indexed; POST /index first")
+    start = time.perf_counter()
+    candidates = RERANK_CANDIDATES if request.rerank else CONTEXT_CANDIDATES
+    async with _upstreams['vector_store']:
+        matches = await asyncio.to_thread(fanout_query, request.question, store, namespaces, candidates)
+    if request.rerank:
+        matches = await _rerank(request.question, matches, request.rerank_budget_ms)
+    context_chunks = await asyncio.to_thread(assemble_context, matches, request.context_token_budget)
+    retrieval_ms = (time.perf_counter() - start) * 1000
+    async with _upstreams['llm']:
+        answer, generation = await asyncio.to_thread(_generate, request.question, context_chunks)
+    if generation['error']:
+        raise HTTPException(status_code=502, detail="LLM error")
+    sources = sorted({(chunk['namespace'], chunk['metadata']['file_name']) for chunk in context_chunks})
+    return {'answer': answer, 'repositories': len(namespaces),
+            'sources': [{'repository': namespace, 'file_name': file_name} for namespace, file_name in sources],
+            'timings': {'retrieval_ms': round(retrieval_ms, 1),
+                        'total_ms': round((time.perf_counter() - start) * 1000, 1),
+                        'ttft_ms': generation['ttft_ms']}}
+
+@app.get("/repositories")
+async def repositories(backend: Optional[str] = None) -> Dict[str, Any]:
+    """List the indexed repositories of the shared index."""
+    store = _get_shared_store(backend)
+    return {'index': INDEX_NAME, 'repositories': await asyncio.to_thread(list_namespaces, store.name)}
+
+@app.post("/analyze/{analysis_type}")
+async def analyze(analysis_type: str, request: AnalyzeRequest) -> Dict[str, Any]:
+    """Run a canned analysis (code-review, complexity, dependencies) of an indexed repository."""
+    question = ANALYSIS_QUESTIONS.get(analysis_type)
+    if question is None:
+        raise HTTPException(status_code=404, detail=f"Unknown analysis '{analysis_type}'")
+    store, namespace = _get_store(request.github_url, request.backend)
+    return await _answer(store, namespace, question, CONTEXT_TOKEN_BUDGET, True)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    """Per-stage latency histograms and counters in the Prometheus text format."""
+    cache = get_answer_cache().stats()
+    lines = [
+        "# TYPE codebase_rag_answer_cache_hits_total counter",
+        f"codebase_rag_answer_cache_hits_total {cache['hits']}",
+        "# TYPE codebase_rag_answer_cache_misses_total counter",
+        f"codebase_rag_answer_cache_misses_total {cache['misses']}"
+    ]
+    return get_telemetry().prometheus() + '\n'.join(lines) + '\n'
+
+@app.get("/health")
+async def health() -> Dict[str, Any]:
+    with _jobs_lock:
+        active = sum(job['status'] not in ('done', 'failed') for job in _jobs.values())
+    return {'status': 'ok', 'active_jobs': active, 'answer_cache': get_answer_cache().stats()}
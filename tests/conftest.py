@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep caches, manifests and stores of the tests out of ~/.codebase_rag; utils reads this at import time.
+os.environ['CODEBASE_RAG_HOME'] = tempfile.mkdtemp(prefix='codebase_rag_tests_')
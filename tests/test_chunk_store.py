@@ -0,0 +1,69 @@
+import os
+
+from utils import chunk_store
+from utils.chunk_store import ChunkStore, hydrate_matches
+
+def segments(path):
+    return sorted(name for name in os.listdir(path) if name.startswith('segment-'))
+
+def test_round_trip(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    texts = {f"chunk-{i}": f"def function_{i}():\n    return {i}\n" * 20 for i in range(100)}
+    texts['unicode'] = 'naïve – ünïcode ✓'
+    texts['empty'] = ''
+    store.add(list(texts), list(texts.values()))
+    store.save()
+
+    assert store.get_many(list(texts) + ['missing']) == texts
+    assert store.stats()['compression_ratio'] > 1
+    reopened = ChunkStore(str(tmp_path))
+    assert reopened.size == len(texts)
+    assert reopened.get_many(list(texts)) == texts
+
+def test_overwrite_and_delete(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    store.add(['a', 'b'], ['first a', 'first b'])
+    store.add(['a'], ['second a'])
+    store.delete(['b', 'missing'])
+    store.save()
+    assert store.get_many(['a', 'b']) == {'a': 'second a'}
+    assert store.stats()['garbage_bytes'] > 0
+    assert ChunkStore(str(tmp_path)).get_many(['a', 'b']) == {'a': 'second a'}
+
+def test_segments_roll_over(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunk_store, 'SEGMENT_MAX_BYTES', 1024)
+    store = ChunkStore(str(tmp_path))
+    texts = {f"chunk-{i}": os.urandom(300).hex() for i in range(20)}
+    store.add(list(texts), list(texts.values()))
+    store.save()
+    assert len(segments(tmp_path)) > 1
+    assert ChunkStore(str(tmp_path)).get_many(list(texts)) == texts
+
+def test_compaction_reclaims_garbage(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunk_store, 'COMPACT_MIN_BYTES', 0)
+    store = ChunkStore(str(tmp_path))
+    texts = {f"chunk-{i}": os.urandom(200).hex() for i in range(50)}
+    store.add(list(texts), list(texts.values()))
+    store.save()
+    old_segments = segments(tmp_path)
+    doomed = list(texts)[:40]
+    store.delete(doomed)
+    store.save()  # garbage now dominates, so save compacts
+
+    live = {id_: text for id_, text in texts.items() if id_ not in doomed}
+    assert store.stats()['garbage_bytes'] == 0
+    assert not set(old_segments) & set(segments(tmp_path))
+    assert sum(os.path.getsize(tmp_path / name) for name in segments(tmp_path)) == store.stats()['stored_bytes']
+    assert store.get_many(list(texts)) == live
+    assert ChunkStore(str(tmp_path)).get_many(list(texts)) == live
+
+def test_hydrate_matches(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    store.add(['a'], ['stored text'])
+    matches = [{'id': 'a', 'score': 0.9, 'metadata': {}},
+               {'id': 'b', 'score': 0.8, 'metadata': {'text': 'inline text'}},
+               {'id': 'c', 'score': 0.7, 'metadata': {}}]
+    hydrated = hydrate_matches(matches, store)
+    assert [(match['id'], match['metadata']['text']) for match in hydrated] == [('a', 'stored text'),
+                                                                              ('b', 'inline text')]
+    assert 'text' not in matches[0]['metadata']
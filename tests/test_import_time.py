@@ -0,0 +1,13 @@
+import pytest
+
+from benchmarks.import_time import CHECKS, measure, run_importtime
+
+@pytest.fixture(scope='module')
+def startup():
+    return {name for name, _, _, _ in run_importtime('pass')}
+
+@pytest.mark.parametrize('statement, budget_ms, forbidden', CHECKS, ids=[statement for statement, _, _ in CHECKS])
+def test_import_budget(statement, budget_ms, forbidden, startup):
+    result = measure(statement, budget_ms, forbidden, repeat=3, top=8, startup=startup)
+    assert not result['forbidden_imported'], result
+    assert result['total_ms'] <= budget_ms, result
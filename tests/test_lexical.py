@@ -0,0 +1,82 @@
+import pytest
+
+from benchmarks.fakes import FakeVectorStore
+from utils import vector_store
+from utils.lexical import LexicalIndex, tokenize_code
+from utils.retrieval import RRF_K, hybrid_query, reciprocal_rank_fusion
+
+DOCUMENTS = {
+    'store': 'def store_in_pinecone(files_content, index_name):\n    upsert_vectors(index, vectors)',
+    'query': 'def query_pinecone(question, index_name):\n    return index.query(question)',
+    'http': 'class HttpClient:\n    def getHTTPResponse(self, url):\n        return self.session.get(url)',
+    'readme': 'Index a repository and ask questions about the code. The index is stored in Pinecone.',
+}
+
+def build_index(path=None):
+    index = LexicalIndex(path)
+    index.add(list(DOCUMENTS), list(DOCUMENTS.values()), [{'text': text} for text in DOCUMENTS.values()])
+    return index
+
+def ids(matches):
+    return [match['id'] for match in matches]
+
+def test_tokenize_code_splits_identifiers():
+    terms = tokenize_code('store_in_pinecone getHTTPResponse x2')
+    assert {'store_in_pinecone', 'store', 'pinecone', 'gethttpresponse', 'http', 'response', 'x2'} <= set(terms)
+
+def test_bm25_ranks_exact_identifier_first():
+    index = build_index()
+    assert ids(index.query('store_in_pinecone', 10))[0] == 'store'
+    assert ids(index.query('HTTP response', 10)) == ['http']
+    assert index.query('nonexistent_symbol', 10) == []
+
+def test_bm25_prefers_rare_terms():
+    index = build_index()
+    # 'pinecone' appears in three documents, 'upsert' only in one
+    assert ids(index.query('pinecone upsert', 1)) == ['store']
+    scores = {match['id']: match['score'] for match in index.query('pinecone', 10)}
+    assert set(scores) == {'store', 'query', 'readme'}
+
+def test_delete_compact_and_reload(tmp_path):
+    index = build_index(str(tmp_path / 'index.pkl'))
+    index.delete(['store'])
+    assert 'store' not in ids(index.query('store_in_pinecone pinecone', 10))
+    before = index.query('pinecone index', 10)
+    index.compact()
+    assert index.query('pinecone index', 10) == before
+    index.save()
+    assert LexicalIndex(str(tmp_path / 'index.pkl')).query('pinecone index', 10) == before
+
+def test_add_replaces_previous_version():
+    index = build_index()
+    index.add(['store'], ['def renamed_function(): pass'], [{'text': 'renamed'}])
+    assert index.size == len(DOCUMENTS)
+    assert 'store' not in ids(index.query('store_in_pinecone', 10))
+    assert ids(index.query('renamed_function', 10)) == ['store']
+
+def test_reciprocal_rank_fusion():
+    dense = [{'id': 'a', 'metadata': {'source': 'dense'}}, {'id': 'b', 'metadata': {}}]
+    lexical = [{'id': 'b', 'metadata': {'source': 'lexical'}}, {'id': 'c', 'metadata': {}}]
+    fused = reciprocal_rank_fusion([dense, lexical], top_k=10)
+    assert ids(fused) == ['b', 'a', 'c']
+    assert fused[0]['score'] == pytest.approx(1 / (RRF_K + 2) + 1 / (RRF_K + 1))
+    assert fused[0]['metadata'] == {}
+    assert ids(reciprocal_rank_fusion([dense, lexical], top_k=1)) == ['b']
+
+def test_reciprocal_rank_fusion_keeps_namespaces_apart():
+    fused = reciprocal_rank_fusion([[{'id': 'a', 'namespace': 'one', 'metadata': {}}],
+                                    [{'id': 'a', 'namespace': 'two', 'metadata': {}}]], top_k=10)
+    assert sorted(match['namespace'] for match in fused) == ['one', 'two']
+
+def test_hybrid_query_finds_symbols_the_dense_search_misses(monkeypatch):
+    store = FakeVectorStore()
+    vectors = {'store': [0.0, 1.0], 'query': [1.0, 0.0], 'http': [0.9, 0.1], 'readme': [0.8, 0.2]}
+    store.upsert([{'id': id_, 'values': values, 'metadata': {'text': DOCUMENTS[id_]}}
+                  for id_, values in vectors.items()], 'ns')
+    monkeypatch.setattr(vector_store, 'embed_query', lambda question: [1.0, 0.0])
+
+    question = 'where is store_in_pinecone'
+    assert 'store' not in ids(store.query([1.0, 0.0], 2, 'ns'))
+    matches = hybrid_query(question, store, 'ns', build_index(), top_k=3, dense_top_k=2)
+    assert 'store' in ids(matches)
+    assert all(match['metadata']['text'] for match in matches)
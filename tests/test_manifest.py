@@ -0,0 +1,63 @@
+import os
+import subprocess
+
+import pytest
+
+from utils import manifest
+from utils.manifest import (diff_manifest, get_blob_shas, git_blob_sha, list_namespaces, load_manifest,
+                            save_manifest)
+
+@pytest.fixture(autouse=True)
+def manifest_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest, 'MANIFEST_DIR', str(tmp_path / 'manifests'))
+
+def write_files(root, files):
+    for path, text in files.items():
+        os.makedirs(os.path.dirname(os.path.join(root, path)), exist_ok=True)
+        with open(os.path.join(root, path), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+def git(root, *args):
+    subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args], cwd=root,
+                   check=True, capture_output=True)
+
+def test_diff_manifest():
+    files = {'a.py': {'sha': '1', 'chunks': []}, 'b.py': {'sha': '2', 'chunks': []},
+             'c.py': {'sha': '3', 'chunks': []}}
+    added, modified, removed = diff_manifest(files, {'a.py': '1', 'b.py': '20', 'd.py': '4'})
+    assert (added, modified, removed) == (['d.py'], ['b.py'], ['c.py'])
+
+def test_diff_manifest_of_unchanged_files_is_empty():
+    files = {'a.py': {'sha': '1', 'chunks': ['x']}}
+    assert diff_manifest(files, {'a.py': '1'}) == ([], [], [])
+
+def test_save_and_load_round_trip():
+    files = {'a.py': {'sha': '1', 'chunks': ['a.py:0']}}
+    version = save_manifest('store', 'owner/repo', files, {'chunk_size': 512})
+    loaded = load_manifest('store', 'owner/repo')
+    assert loaded['files'] == files
+    assert loaded['settings'] == {'chunk_size': 512}
+    assert loaded['version'] == version
+    assert save_manifest('store', 'owner/repo', files, {'chunk_size': 256}) != version
+    assert list_namespaces('store') == ['owner/repo']
+    assert load_manifest('store', 'other') == {'files': {}, 'settings': {}, 'version': ''}
+
+def test_blob_shas_match_git(tmp_path):
+    write_files(tmp_path, {'main.py': 'print(1)\n', 'pkg/util.py': 'x = 1\n', 'node_modules/dep.js': 'x'})
+    git(tmp_path, 'init', '-q')
+    git(tmp_path, 'add', '-A')
+    git(tmp_path, 'commit', '-q', '-m', 'initial')
+    expected = subprocess.run(['git', 'ls-tree', '-r', 'HEAD'], cwd=tmp_path, check=True, capture_output=True,
+                              text=True).stdout
+    shas = get_blob_shas(str(tmp_path))
+    assert shas == {line.split('\t')[1]: line.split()[2] for line in expected.splitlines()
+                    if not line.endswith('node_modules/dep.js')}
+
+def test_blob_shas_of_plain_directory(tmp_path):
+    write_files(tmp_path, {'main.py': 'print(1)\n', 'node_modules/dep.js': 'x'})
+    assert get_blob_shas(str(tmp_path)) == {'main.py': git_blob_sha(b'print(1)\n')}
+
+def test_blob_shas_of_repository_without_commits(tmp_path):
+    write_files(tmp_path, {'main.py': 'print(1)\n'})
+    git(tmp_path, 'init', '-q')
+    assert get_blob_shas(str(tmp_path)) == {'main.py': git_blob_sha(b'print(1)\n')}
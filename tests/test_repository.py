@@ -0,0 +1,39 @@
+import contextlib
+import os
+import shutil
+
+import pytest
+
+from utils import repository
+
+@pytest.fixture
+def checkout(tmp_path, monkeypatch):
+    """Serve a fake cached checkout and record whether its lease is held."""
+    path = tmp_path / 'cache' / 'repo'
+    (path / 'pkg').mkdir(parents=True)
+    (path / 'pkg' / 'main.py').write_text('print(1)\n')
+    leased = []
+
+    @contextlib.contextmanager
+    def checkout_repository(repo_url):
+        leased.append(True)
+        try:
+            yield str(path)
+        finally:
+            leased.pop()
+
+    monkeypatch.setattr(repository, 'checkout_repository', checkout_repository)
+    return path, leased
+
+def test_clone_repository_returns_a_copy_owned_by_the_caller(checkout):
+    path, leased = checkout
+    with pytest.warns(DeprecationWarning):
+        copy_path = repository.clone_repository('https://github.com/owner/repo')
+    try:
+        assert not leased
+        assert os.path.realpath(copy_path) != os.path.realpath(path)
+        shutil.rmtree(path)  # the cache evicts the checkout once the lease ends
+        with open(os.path.join(copy_path, 'pkg', 'main.py'), encoding='utf-8') as f:
+            assert f.read() == 'print(1)\n'
+    finally:
+        shutil.rmtree(copy_path, ignore_errors=True)
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('dotenv')
+
+import service
+from fastapi import HTTPException
+
+class FakeStore:
+    name = 'fake'
+
+class FakeExecutor:
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, job, *args):
+        self.jobs.append(job)
+
+@pytest.fixture
+def executor(monkeypatch):
+    fake = FakeExecutor()
+    monkeypatch.setattr(service, '_index_executor', fake)
+    monkeypatch.setattr(service, '_jobs', service.OrderedDict())
+    monkeypatch.setattr(service, 'MAX_JOBS', 3)
+    monkeypatch.setattr(service, '_get_store', lambda url, backend: (FakeStore(), url.rsplit('/', 1)[-1]))
+    return fake
+
+def enqueue(name):
+    return asyncio.run(service.index(service.IndexRequest(github_url=f"https://github.com/owner/{name}")))
+
+def test_identical_active_job_is_reused(executor):
+    assert enqueue('a')['id'] == enqueue('a')['id']
+    assert len(executor.jobs) == 1
+
+def test_only_finished_jobs_are_evicted(executor):
+    first, second, third = enqueue('a'), enqueue('b'), enqueue('c')
+    service._jobs[second['id']]['status'] = 'done'
+    fourth = enqueue('d')
+    assert list(service._jobs) == [first['id'], third['id'], fourth['id']]
+    assert asyncio.run(service.get_job(first['id']))['status'] == 'queued'
+
+def test_new_jobs_are_rejected_while_every_slot_is_active(executor):
+    for name in 'abc':
+        enqueue(name)
+    with pytest.raises(HTTPException) as error:
+        enqueue('d')
+    assert error.value.status_code == 503
+    assert len(service._jobs) == 3
@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+
+import pytest
+
+from utils import vector_store
+from utils.vector_store import iter_upsert_batches, upsert_vectors
+
+class FakeIndex:
+    """In-process stand-in for a Pinecone index handle.
+
+    Records every upsert call, fails the first ``failures`` calls, and
+    optionally blocks each call until ``release`` is set.
+    """
+
+    def __init__(self, failures: int = 0, delay: float = 0.0, release: threading.Event = None):
+        self.failures = failures
+        self.delay = delay
+        self.release = release
+        self.calls = []
+        self.vectors = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors, namespace):
+        with self._lock:
+            self.calls.append((namespace, len(vectors)))
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError('transient failure')
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.release is not None:
+                self.release.wait(5)
+            if self.delay:
+                time.sleep(self.delay)
+            with self._lock:
+                self.vectors.update({vector['id']: vector for vector in vectors})
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+def make_vectors(count, text='x'):
+    return [{'id': f"chunk-{i}", 'values': [0.0] * 4, 'metadata': {'text': text}} for i in range(count)]
+
+def record_bytes(vector):
+    return len(vector['id']) + len(json.dumps(vector['metadata']))
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting."""
+    recorded = []
+    monkeypatch.setattr(vector_store.time, 'sleep', recorded.append)
+    monkeypatch.setattr(vector_store.random, 'random', lambda: 0.0)
+    return recorded
+
+def test_batches_are_bounded_by_count():
+    batches = list(iter_upsert_batches(make_vectors(250), batch_size=100))
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+
+def test_batches_are_bounded_by_bytes():
+    vectors = make_vectors(50, text='y' * 100_000)
+    max_batch_bytes = 1024 * 1024
+    batches = list(iter_upsert_batches(vectors, batch_size=100, max_batch_bytes=max_batch_bytes))
+    assert len(batches) > 1
+    assert sum(len(batch) for batch in batches) == 50
+    for batch in batches:
+        assert sum(record_bytes(vector) for vector in batch) <= max_batch_bytes
+
+def test_oversized_record_is_sent_alone():
+    vectors = make_vectors(3, text='z' * 2_000_000)
+    batches = list(iter_upsert_batches(vectors, max_batch_bytes=1024 * 1024))
+    assert [len(batch) for batch in batches] == [1, 1, 1]
+
+    index = FakeIndex()
+    stats = upsert_vectors(index, vectors, 'ns', max_batch_bytes=1024 * 1024)
+    assert stats['vectors'] == 3
+    assert sorted(index.vectors) == ['chunk-0', 'chunk-1', 'chunk-2']
+
+def test_transient_failure_is_retried_with_backoff(sleeps):
+    index = FakeIndex(failures=2)
+    stats = upsert_vectors(index, make_vectors(10), 'ns', batch_size=10, max_workers=1, max_retries=3)
+    assert stats['vectors'] == 10
+    assert len(index.calls) == 3
+    assert sleeps == [vector_store.UPSERT_BACKOFF_SECONDS, vector_store.UPSERT_BACKOFF_SECONDS * 2]
+
+def test_failure_is_raised_after_max_retries(sleeps):
+    index = FakeIndex(failures=10)
+    with pytest.raises(ConnectionError):
+        upsert_vectors(index, make_vectors(10), 'ns', batch_size=10, max_workers=1, max_retries=2)
+    assert len(index.calls) == 3
+    assert len(sleeps) == 2
+
+def test_in_flight_batches_are_bounded():
+    workers = 2
+    release = threading.Event()
+    index = FakeIndex(release=release)
+    pulled = []
+
+    def produce():
+        for vector in make_vectors(50):
+            pulled.append(vector['id'])
+            yield vector
+
+    thread = threading.Thread(target=upsert_vectors, args=(index, produce(), 'ns'),
+                              kwargs={'batch_size': 1, 'max_workers': workers})
+    thread.start()
+    time.sleep(0.3)
+    # 2 * workers batches are pending; the producer stops after yielding the next batch
+    assert 2 * workers <= len(pulled) <= 2 * workers + 2
+    assert index.max_in_flight == workers
+    release.set()
+    thread.join(5)
+    assert len(index.vectors) == 50
+
+def test_throughput_is_reported():
+    index = FakeIndex(delay=0.01)
+    stats = upsert_vectors(index, make_vectors(200), 'ns', batch_size=50, max_workers=2)
+    assert stats['vectors'] == 200
+    assert stats['batches'] == 4
+    assert stats['seconds'] > 0
+    assert stats['vectors_per_sec'] == pytest.approx(200 / stats['seconds'])
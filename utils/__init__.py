@@ -1,33 +1,127 @@
-from .embeddings import get_embeddings
-from .repository import (
-    clone_repository,
-    get_main_files_content,
-    get_repo_name,
-    SUPPORTED_EXTENSIONS,
-    IGNORED_DIRS
-)
-from .vector_store import (
-    initialize_pinecone,
-    store_in_pinecone,
-    query_pinecone,
-    CHUNK_SIZE,
-    CHUNK_OVERLAP
-)
-from .llm import initialize_gemini, generate_response
+"""Public API of the codebase RAG library.
+
+Submodules are imported on first attribute access, so ``import utils``
+and ``from utils import get_repo_namespace`` do not load the embedding
+model, vector store or LLM client libraries.
+"""
+import importlib
+from typing import Any, List
+
+_SUBMODULE_EXPORTS = {
+    'embeddings': ('get_embeddings', 'get_embeddings_batch', 'get_model', 'embed_query'),
+    'embedding_cache': ('EmbeddingCache', 'get_embedding_cache', 'set_embedding_cache'),
+    'embedding_pool': ('EmbeddingPool', 'start_embedding_workers', 'stop_embedding_workers'),
+    'clone_cache': ('CloneCache', 'get_clone_cache'),
+    'repository': (
+        'clone_repository', 'checkout_repository', 'get_main_files_content', 'iter_files_content',
+        'get_repo_name', 'get_repo_namespace', 'SUPPORTED_EXTENSIONS', 'IGNORED_DIRS'
+    ),
+    'vector_store': (
+        'VectorStore', 'PineconeVectorStore', 'initialize_pinecone', 'create_vector_store', 'store_chunks',
+        'query_store', 'store_in_pinecone', 'query_pinecone', 'VECTOR_BACKENDS', 'INDEX_NAME', 'CHUNK_SIZE',
+        'CHUNK_OVERLAP'
+    ),
+    'local_store': ('LocalVectorStore',),
+    'chunking': ('chunk_file', 'MAX_CHUNK_TOKENS'),
+    'indexing': ('index_repository',),
+    'manifest': ('list_namespaces',),
+    'lexical': ('LexicalIndex', 'get_lexical_index', 'tokenize_code'),
+    'chunk_store': ('ChunkStore', 'get_chunk_store', 'hydrate_matches'),
+    'retrieval': ('hybrid_query', 'fanout_query', 'reciprocal_rank_fusion'),
+    'rerank': ('rerank_matches', 'get_reranker', 'set_reranker', 'RERANK_CANDIDATES', 'RERANK_LATENCY_BUDGET_MS'),
+    'answer_cache': ('AnswerCache', 'get_answer_cache', 'ANSWER_CACHE_THRESHOLD'),
+    'telemetry': ('Telemetry', 'get_telemetry', 'span'),
+    'context': ('assemble_context', 'CONTEXT_TOKEN_BUDGET', 'CONTEXT_CANDIDATES'),
+    'pipeline': ('IngestionPipeline',),
+    'llm': (
+        'LLM', 'GeminiLLM', 'initialize_gemini', 'get_generative_model', 'build_prompt', 'generate_response',
+        'stream_response'
+    ),
+    'warmup': ('start_warmup', 'WARMUP_ENABLED'),
+}
+_EXPORTS = {name: module for module, names in _SUBMODULE_EXPORTS.items() for name in names}
 
 __all__ = [
     'get_embeddings',
+    'get_embeddings_batch',
+    'get_model',
+    'embed_query',
+    'EmbeddingCache',
+    'get_embedding_cache',
+    'set_embedding_cache',
+    'EmbeddingPool',
+    'start_embedding_workers',
+    'stop_embedding_workers',
     'clone_repository',
+    'checkout_repository',
+    'CloneCache',
+    'get_clone_cache',
     'get_main_files_content',
+    'iter_files_content',
     'get_repo_name',
+    'get_repo_namespace',
+    'list_namespaces',
+    'VectorStore',
+    'PineconeVectorStore',
+    'LocalVectorStore',
     'initialize_pinecone',
+    'create_vector_store',
+    'store_chunks',
+    'query_store',
     'store_in_pinecone',
     'query_pinecone',
+    'index_repository',
+    'assemble_context',
+    'Telemetry',
+    'get_telemetry',
+    'span',
+    'AnswerCache',
+    'get_answer_cache',
+    'ANSWER_CACHE_THRESHOLD',
+    'LexicalIndex',
+    'get_lexical_index',
+    'tokenize_code',
+    'ChunkStore',
+    'get_chunk_store',
+    'hydrate_matches',
+    'hybrid_query',
+    'fanout_query',
+    'reciprocal_rank_fusion',
+    'rerank_matches',
+    'get_reranker',
+    'set_reranker',
+    'RERANK_CANDIDATES',
+    'RERANK_LATENCY_BUDGET_MS',
+    'chunk_file',
+    'IngestionPipeline',
     'initialize_gemini',
+    'get_generative_model',
+    'LLM',
+    'GeminiLLM',
+    'build_prompt',
     'generate_response',
+    'stream_response',
     'SUPPORTED_EXTENSIONS',
     'IGNORED_DIRS',
+    'VECTOR_BACKENDS',
     'CHUNK_SIZE',
     'CHUNK_OVERLAP',
-    'INDEX_NAME'
-] 
\ No newline at end of file
+    'MAX_CHUNK_TOKENS',
+    'CONTEXT_TOKEN_BUDGET',
+    'CONTEXT_CANDIDATES',
+    'INDEX_NAME',
+    'start_warmup',
+    'WARMUP_ENABLED'
+]
+
+def __getattr__(name: str) -> Any:
+    """Import the submodule that defines ``name`` and cache the attribute."""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .manifest import get_manifest_path, load_manifest
+
+# Constants
+ANSWER_CACHE_THRESHOLD = 0.95
+ANSWER_CACHE_TTL_SECONDS = int(os.environ.get('CODEBASE_RAG_ANSWER_CACHE_TTL', '86400'))
+ANSWER_CACHE_MAX_ENTRIES = 1024
+
+class AnswerCache:
+    """In-memory semantic cache of generated answers.
+
+    Entries are scoped to a (store, namespace) pair and the manifest
+    version the answer was generated against, so any re-index makes
+    older answers unreachable. The manifest is stat'ed on every lookup
+    and re-read when it changed, so re-indexing by another process
+    (``bulk_index.py``, another app or service worker) is noticed too.
+    A question hits when the cosine similarity of its embedding to a
+    cached question reaches the threshold.
+    Entries expire after ``ttl_seconds`` and the least recently used are
+    evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES):
+        """Create an empty cache.
+
+        Args:
+            ttl_seconds: Lifetime of an entry
+            max_entries: Maximum number of entries across all namespaces
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._versions: Dict[Tuple[str, str], Tuple[Optional[tuple], str]] = {}
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    @staticmethod
+    def _manifest_stamp(scope: Tuple[str, str]) -> Optional[tuple]:
+        try:
+            stat = os.stat(get_manifest_path(*scope))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _version(self, scope: Tuple[str, str]) -> str:
+        """Current manifest version of a scope, re-read only when the manifest file changed."""
+        stamp = self._manifest_stamp(scope)
+        cached = self._versions.get(scope)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        version = load_manifest(*scope)['version']
+        if cached is not None and cached[1] != version:
+            for entry_id in [k for k, e in self._entries.items() if e['scope'] == scope]:
+                del self._entries[entry_id]
+        self._versions[scope] = (stamp, version)
+        return version
+
+    def _expire(self, now: float) -> None:
+        for entry_id in [k for k, e in self._entries.items() if now - e['created'] > self.ttl_seconds]:
+            del self._entries[entry_id]
+
+    def lookup(self, store_name: str, namespace: str, embedding: np.ndarray,
+               threshold: float = ANSWER_CACHE_THRESHOLD) -> Optional[Dict[str, Any]]:
+        """Find a cached answer to a similar question.
+
+        Args:
+            store_name: Name of the vector store
+            namespace: Namespace the question was asked against
+            embedding: Embedding of the question
+            threshold: Minimum cosine similarity for a hit
+
+        Returns:
+            Cached entry (question, answer, sources, similarity, latency_ms, ...) or None
+        """
+        start = time.perf_counter()
+        query = embedding / (np.linalg.norm(embedding) or 1.0)
+        scope = (store_name, namespace)
+        with self._lock:
+            self._expire(time.time())
+            version = self._version(scope)
+            best, best_score = None, threshold
+            for entry_id, entry in self._entries.items():
+                if entry['scope'] != scope or entry['version'] != version:
+                    continue
+                score = float(np.dot(entry['embedding'], query))
+                if score >= best_score:
+                    best, best_score = entry_id, score
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best)
+            entry = self._entries[best]
+            self.hits += 1
+            self.saved_ms += max(entry['latency_ms'] - (time.perf_counter() - start) * 1000, 0.0)
+            return dict(entry, similarity=best_score)
+
+    def put(self, store_name: str, namespace: str, question: str, embedding: np.ndarray,
+            answer: str, latency_ms: float, sources: Optional[List[str]] = None) -> None:
+        """Cache an answer for the current manifest version of a namespace.
+
+        Args:
+            store_name: Name of the vector store
+            namespace: Namespace the question was asked against
+            question: Question text
+            embedding: Embedding of the question
+            answer: Generated answer
+            latency_ms: Retrieval plus generation time a hit will save
+            sources: File names the answer was generated from
+        """
+        scope = (store_name, namespace)
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._entries[self._next_id] = {
+                'scope': scope,
+                'question': question,
+                'answer': answer,
+                'embedding': vector,
+                'version': self._version(scope),
+                'created': time.time(),
+                'latency_ms': latency_ms,
+                'sources': sources or []
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, store_name: str, namespace: str, version: Optional[str] = None) -> None:
+        """Drop all answers of a namespace, e.g. after it was re-indexed.
+
+        Args:
+            store_name: Name of the vector store
+            namespace: Namespace to invalidate
+            version: New manifest version, or None to reload it from disk
+        """
+        scope = (store_name, namespace)
+        with self._lock:
+            for entry_id in [k for k, e in self._entries.items() if e['scope'] == scope]:
+                del self._entries[entry_id]
+            if version is None:
+                self._versions.pop(scope, None)
+            else:
+                self._versions[scope] = (self._manifest_stamp(scope), version)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, hit rate and latency saved by hits in this process."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'saved_ms': round(self.saved_ms, 1),
+            'entries': len(self._entries)
+        }
+
+_cache = AnswerCache()
+
+def get_answer_cache() -> AnswerCache:
+    """Return the process-wide answer cache."""
+    return _cache
@@ -0,0 +1,277 @@
+import logging
+import mmap
+import os
+import pickle
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; fall back to zlib
+    zstandard = None
+
+from .config import DATA_DIR, namespace_file_name
+from .telemetry import incr
+
+# Constants
+CHUNK_STORE_DIR = os.path.join(DATA_DIR, 'chunks')
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+COMPACT_GARBAGE_FRACTION = 0.5
+COMPACT_MIN_BYTES = 1024 * 1024
+CODEC_RAW, CODEC_ZLIB, CODEC_ZSTD = 0, 1, 2
+
+logger = logging.getLogger(__name__)
+
+Location = Tuple[int, int, int, int, int]
+
+class ChunkStore:
+    """Append-only, compressed store of chunk texts keyed by chunk id.
+
+    Texts are compressed one by one (zstd when the ``zstandard`` package is
+    installed, zlib otherwise) and appended to segment files of at most
+    ``SEGMENT_MAX_BYTES``. An offset index maps each id to its segment,
+    offset, length, codec and raw length, and segments are read through
+    ``mmap``, so a lookup is a slice plus a decompression. Overwritten and
+    deleted records become garbage that ``save`` compacts away once it
+    dominates.
+    """
+
+    def __init__(self, path: str):
+        """Open a store directory, loading its offset index if it exists.
+
+        Args:
+            path: Directory holding the segments and ``index.pkl``
+        """
+        self.path = path
+        self.index_path = os.path.join(path, 'index.pkl')
+        self._lock = threading.RLock()
+        self.locations: Dict[str, Location] = {}
+        self.segment = 0
+        self.stored_bytes = 0
+        self.raw_bytes = 0
+        self.garbage_bytes = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                self.__dict__.update(pickle.load(f))
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._writer = None
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL) if zstandard is not None else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    @property
+    def size(self) -> int:
+        """Number of stored chunks."""
+        return len(self.locations)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"segment-{segment:06d}.dat")
+
+    def _compress(self, data: bytes) -> Tuple[bytes, int]:
+        if self._compressor is not None:
+            compressed, codec = self._compressor.compress(data), CODEC_ZSTD
+        else:
+            compressed, codec = zlib.compress(data, ZLIB_LEVEL), CODEC_ZLIB
+        return (compressed, codec) if len(compressed) < len(data) else (data, CODEC_RAW)
+
+    def _decompress(self, data: bytes, codec: int) -> bytes:
+        if codec == CODEC_ZLIB:
+            return zlib.decompress(data)
+        if codec == CODEC_ZSTD:
+            if self._decompressor is None:
+                raise RuntimeError(f"{self.path} holds zstd-compressed chunks; install zstandard to read them")
+            return self._decompressor.decompress(data)
+        return data
+
+    def _write(self, data: bytes) -> Tuple[int, int]:
+        """Append a record to the active segment, rolling over when it is full."""
+        if self._writer is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._writer = open(self._segment_path(self.segment), 'ab')
+        if self._writer.tell() and self._writer.tell() + len(data) > SEGMENT_MAX_BYTES:
+            self._writer.close()
+            self.segment += 1
+            self._writer = open(self._segment_path(self.segment), 'ab')
+        offset = self._writer.tell()
+        self._writer.write(data)
+        return self.segment, offset
+
+    def _discard(self, id_: str) -> None:
+        location = self.locations.pop(id_, None)
+        if location is not None:
+            self.stored_bytes -= location[2]
+            self.raw_bytes -= location[4]
+            self.garbage_bytes += location[2]
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]) -> None:
+        """Store chunk texts, replacing previous versions of the same ids.
+
+        Args:
+            ids: Chunk ids
+            texts: Chunk texts
+        """
+        with self._lock:
+            for id_, text in zip(ids, texts):
+                raw = text.encode('utf-8')
+                data, codec = self._compress(raw)
+                segment, offset = self._write(data)
+                self._discard(id_)
+                self.locations[id_] = (segment, offset, len(data), codec, len(raw))
+                self.stored_bytes += len(data)
+                self.raw_bytes += len(raw)
+            if self._writer is not None:
+                self._writer.flush()
+
+    def _view(self, segment: int, end: int) -> mmap.mmap:
+        view = self._maps.get(segment)
+        if view is None or len(view) < end:
+            if view is not None:
+                view.close()
+            with open(self._segment_path(segment), 'rb') as f:
+                view = self._maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return view
+
+    def get_many(self, ids: Sequence[str]) -> Dict[str, str]:
+        """Fetch chunk texts in one pass.
+
+        Args:
+            ids: Chunk ids
+
+        Returns:
+            Dictionary of id -> text for the ids that are stored
+        """
+        found: Dict[str, str] = {}
+        with self._lock:
+            for id_ in ids:
+                location = self.locations.get(id_)
+                if location is None or id_ in found:
+                    continue
+                segment, offset, length, codec, _ = location
+                data = self._view(segment, offset + length)[offset:offset + length]
+                found[id_] = self._decompress(data, codec).decode('utf-8')
+        incr('chunk_store_reads_total', len(found))
+        return found
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Drop chunks by id; their bytes are reclaimed by compaction.
+
+        Args:
+            ids: Chunk ids to delete
+        """
+        with self._lock:
+            for id_ in ids:
+                self._discard(id_)
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for view in self._maps.values():
+            view.close()
+        self._maps.clear()
+
+    def compact(self) -> None:
+        """Rewrite live records into fresh segments and delete the old ones."""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+            old_segments = range(self.segment + 1)
+            live = sorted(self.locations.items(), key=lambda item: item[1][:2])
+            records = [(id_, self._view(segment, offset + length)[offset:offset + length], codec, raw_length)
+                       for id_, (segment, offset, length, codec, raw_length) in live]
+            self._close()
+            self.segment += 1
+            self.locations, self.garbage_bytes = {}, 0
+            for id_, data, codec, raw_length in records:
+                segment, offset = self._write(data)
+                self.locations[id_] = (segment, offset, len(data), codec, raw_length)
+            if self._writer is not None:
+                self._writer.flush()
+            self._save_index()
+            for segment in old_segments:
+                if os.path.exists(self._segment_path(segment)):
+                    os.remove(self._segment_path(segment))
+            logger.info("Compacted chunk store %s to %d chunks", self.path, len(self.locations))
+
+    def _save_index(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        state = {key: getattr(self, key) for key in
+                 ('locations', 'segment', 'stored_bytes', 'raw_bytes', 'garbage_bytes')}
+        with open(self.index_path + '.tmp', 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(self.index_path + '.tmp', self.index_path)
+
+    def save(self) -> None:
+        """Flush segments and atomically write the offset index, compacting if mostly garbage."""
+        with self._lock:
+            if self.garbage_bytes > COMPACT_MIN_BYTES and \
+                    self.garbage_bytes > COMPACT_GARBAGE_FRACTION * (self.stored_bytes + self.garbage_bytes):
+                self.compact()
+                return
+            if self._writer is not None:
+                self._writer.flush()
+                os.fsync(self._writer.fileno())
+            self._save_index()
+
+    def stats(self) -> Dict[str, Any]:
+        """Chunk count, on-disk and uncompressed bytes and the codec in use."""
+        with self._lock:
+            return {
+                'chunks': len(self.locations),
+                'stored_bytes': self.stored_bytes,
+                'garbage_bytes': self.garbage_bytes,
+                'compression_ratio': round(self.raw_bytes / self.stored_bytes, 2) if self.stored_bytes else None,
+                'codec': 'zstd' if self._compressor is not None else 'zlib'
+            }
+
+def hydrate_matches(matches: List[Dict[str, Any]], chunk_store: Optional[ChunkStore]) -> List[Dict[str, Any]]:
+    """Fill in ``metadata['text']`` of matches from the chunk store.
+
+    Matches that already carry their text (namespaces indexed before the
+    chunk store existed) are kept as they are. Matches whose text cannot
+    be found are dropped.
+
+    Args:
+        matches: Matches with id, score and metadata
+        chunk_store: Chunk store of the namespace, or None
+
+    Returns:
+        Matches with text, in the original order
+    """
+    missing = [match['id'] for match in matches if 'text' not in match['metadata']]
+    if not missing:
+        return matches
+    texts = chunk_store.get_many(missing) if chunk_store is not None else {}
+    hydrated = []
+    for match in matches:
+        if 'text' not in match['metadata']:
+            text = texts.get(match['id'])
+            if text is None:
+                continue
+            match = dict(match, metadata=dict(match['metadata'], text=text))
+        hydrated.append(match)
+    if len(hydrated) < len(matches):
+        logger.warning("%d matches have no stored text; re-index the repository to restore them",
+                       len(matches) - len(hydrated))
+    return hydrated
+
+_stores: Dict[tuple, ChunkStore] = {}
+_stores_lock = threading.Lock()
+
+def get_chunk_store(store_name: str, namespace: str) -> ChunkStore:
+    """Return the process-wide chunk store of a namespace, opening it once.
+
+    Args:
+        store_name: Name of the vector store the chunks live in
+        namespace: Namespace of the chunks
+
+    Returns:
+        Chunk store under ``CHUNK_STORE_DIR``
+    """
+    key = (store_name, namespace)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ChunkStore(os.path.join(CHUNK_STORE_DIR, namespace_file_name(store_name, namespace)))
+        return _stores[key]
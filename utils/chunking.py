@@ -0,0 +1,177 @@
+import ast
+import json
+import os
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from .embeddings import MAX_SEQ_TOKENS, count_tokens
+
+# Constants
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+MAX_CHUNK_TOKENS = MAX_SEQ_TOKENS - 2  # room for the <s> and </s> special tokens
+BRACE_LANGUAGES = {'.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.c', '.h', '.go', '.rs', '.swift', '.vue'}
+
+Block = Tuple[int, int]  # [start, end) line range
+
+def _python_blocks(nodes: Sequence[ast.stmt], start: int, end: int, counts: List[int],
+                   max_tokens: int) -> List[Block]:
+    """Turn a statement list into line blocks, descending into oversized defs.
+
+    Comments and blank lines before a statement stay with that statement.
+    """
+    blocks = []
+    for i, node in enumerate(nodes):
+        node_start = min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])]) - 1
+        block_start = start if i == 0 else blocks[-1][1]
+        block_end = end if i == len(nodes) - 1 else node.end_lineno
+        body = getattr(node, 'body', None)
+        if (sum(counts[block_start:block_end]) > max_tokens and body
+                and isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))):
+            header_end = max(node_start + 1, body[0].lineno - 1)
+            blocks.append((block_start, header_end))
+            blocks.extend(_python_blocks(body, header_end, block_end, counts, max_tokens))
+        else:
+            blocks.append((block_start, block_end))
+    return blocks
+
+def _heuristic_blocks(lines: List[str], extension: str) -> List[Block]:
+    """Split at top-level boundaries found with a brace/indent scan.
+
+    A new block starts on a non-indented line when the brace depth is
+    back at zero (C-like languages), on any non-indented line that
+    follows an indented one (indent-structured text), or at Markdown
+    headings.
+    """
+    boundaries = [0]
+    depth = 0
+    previous_indented = False
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        starts_top_level = bool(stripped) and not line[:1].isspace()
+        if i > 0 and starts_top_level:
+            if extension == '.md':
+                if stripped.startswith('#'):
+                    boundaries.append(i)
+            elif extension in BRACE_LANGUAGES:
+                if depth == 0 and not stripped.startswith(('}', ')', ']')):
+                    boundaries.append(i)
+            elif previous_indented:
+                boundaries.append(i)
+        if extension in BRACE_LANGUAGES:
+            depth = max(0, depth + line.count('{') - line.count('}'))
+        if stripped:
+            previous_indented = line[:1].isspace()
+    boundaries.append(len(lines))
+    return [(s, e) for s, e in zip(boundaries, boundaries[1:]) if e > s]
+
+def _split_line(line: str, tokens: int, max_tokens: int,
+                counter: Callable[[Sequence[str]], List[int]]) -> List[str]:
+    """Split a single over-long line into pieces that fit the token budget."""
+    width = max(1, len(line) * max_tokens // max(tokens, 1))
+    while True:
+        pieces = [line[i:i + width] for i in range(0, len(line), width)]
+        if width == 1 or max(counter(pieces)) <= max_tokens:
+            return pieces
+        width = max(1, width * 3 // 4)
+
+def _pack(lines: List[str], counts: List[int], blocks: List[Block], max_tokens: int,
+          counter: Callable[[Sequence[str]], List[int]]) -> List[str]:
+    """Greedily merge consecutive blocks into chunks of at most max_tokens."""
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush() -> None:
+        nonlocal current, current_tokens
+        text = '\n'.join(current)
+        if text.strip():
+            chunks.append(text)
+        current, current_tokens = [], 0
+
+    for start, end in blocks:
+        block_tokens = sum(counts[start:end])
+        if block_tokens <= max_tokens and current_tokens + block_tokens > max_tokens:
+            flush()
+        if block_tokens <= max_tokens:
+            current.extend(lines[start:end])
+            current_tokens += block_tokens
+            continue
+        for i in range(start, end):
+            if counts[i] > max_tokens:
+                flush()
+                chunks.extend(_split_line(lines[i], counts[i], max_tokens, counter))
+                continue
+            if current_tokens + counts[i] > max_tokens:
+                flush()
+            current.append(lines[i])
+            current_tokens += counts[i]
+    flush()
+    return chunks
+
+def _split_lines(content: str) -> List[str]:
+    """Split on newlines the way ``ast`` numbers lines."""
+    lines = [line.rstrip('\r') for line in content.split('\n')]
+    if lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+def _notebook_cells(content: str) -> Optional[List[str]]:
+    """Return the cell sources of a notebook, or None if it is not valid JSON."""
+    try:
+        cells = json.loads(content).get('cells', [])
+    except (ValueError, AttributeError):
+        return None
+    sources = []
+    for cell in cells:
+        source = cell.get('source', '')
+        source = ''.join(source) if isinstance(source, list) else source
+        if source.strip():
+            sources.append(source)
+    return sources
+
+def chunk_file(name: str, content: str, max_tokens: int = MAX_CHUNK_TOKENS,
+               counter: Callable[[Sequence[str]], List[int]] = count_tokens) -> List[str]:
+    """Split a source file into syntax-aligned chunks of at most max_tokens.
+
+    Python is split along ``ast`` statements (descending into classes and
+    functions that are too large), notebooks along cells, and everything
+    else along top-level brace/indent boundaries. Blocks are then packed
+    greedily up to the token budget, so no chunk is truncated by the
+    embedding model.
+
+    Args:
+        name: File name, used to pick the splitting strategy
+        content: File content
+        max_tokens: Token budget per chunk
+        counter: Function returning token counts for a list of texts
+
+    Returns:
+        List of chunks
+    """
+    extension = os.path.splitext(name)[1]
+    if extension == '.ipynb':
+        cells = _notebook_cells(content)
+        if cells is not None:
+            lines: List[str] = []
+            blocks: List[Block] = []
+            for source in cells:
+                cell_lines = _split_lines(source) + ['']
+                blocks.append((len(lines), len(lines) + len(cell_lines)))
+                lines.extend(cell_lines)
+            return _pack(lines, counter(lines), blocks, max_tokens, counter)
+
+    lines = _split_lines(content)
+    if not lines:
+        return []
+    counts = counter(lines)
+    blocks = None
+    if extension == '.py':
+        try:
+            tree = ast.parse(content)
+            if tree.body:
+                blocks = _python_blocks(tree.body, 0, len(lines), counts, max_tokens)
+        except (SyntaxError, ValueError):
+            blocks = None
+    if blocks is None:
+        blocks = _heuristic_blocks(lines, extension)
+    return _pack(lines, counts, blocks, max_tokens, counter)
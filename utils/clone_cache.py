@@ -0,0 +1,239 @@
+import contextlib
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; fall back to in-process locking only
+    fcntl = None
+
+from .config import DATA_DIR
+
+# Constants
+CLONE_DIR = os.path.join(DATA_DIR, 'clones')
+CLONE_CACHE_MAX_BYTES = int(os.environ.get('CODEBASE_RAG_CLONE_CACHE_MB', '10240')) * 1024 * 1024
+CLONE_DEPTH = 1
+SIZE_FILE = 'codebase_rag_size'
+REPO_URL_PATTERN = re.compile(r"github\.com[/:]([^/]+)/([^/]+?)(?:\.git)?/?$")
+
+def get_repo_slug(repo_url: str) -> Tuple[str, str]:
+    """Extract (owner, repo) from a GitHub URL, lowercased.
+
+    Args:
+        repo_url: GitHub repository URL
+
+    Returns:
+        Tuple of owner and repository name
+    """
+    match = REPO_URL_PATTERN.search(repo_url.strip())
+    if not match:
+        raise ValueError(f"Not a GitHub repository URL: {repo_url}")
+    return match.group(1).lower(), match.group(2).lower()
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                total += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                pass
+    return total
+
+class CloneCache:
+    """Persistent cache of shallow, blobless, single-branch clones.
+
+    Checkouts live under ``<root>/<owner>/<repo>``. A cached checkout is
+    updated with a depth-limited fetch and a hard reset to the fetched
+    head. Clones of the same repository are serialized with a thread lock
+    and an ``flock`` on a sidecar lock file, so concurrent sessions and
+    processes never clone into the same directory. After every clone the
+    least recently used checkouts are removed until the cache fits
+    ``max_bytes``. Checkouts in use are leased (a shared ``flock`` on a
+    second sidecar file plus an in-process count) for as long as the
+    caller reads them, and eviction skips leased checkouts.
+    """
+
+    def __init__(self, root: str = CLONE_DIR, max_bytes: int = CLONE_CACHE_MAX_BYTES,
+                 depth: int = CLONE_DEPTH):
+        """Create a clone cache.
+
+        Args:
+            root: Directory holding the checkouts
+            max_bytes: Disk quota of all checkouts together
+            depth: History depth of clones and fetches
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.depth = depth
+        self._locks: Dict[str, threading.Lock] = {}
+        self._leases: Dict[str, int] = {}
+        self._locks_lock = threading.Lock()
+
+    def path_for(self, repo_url: str) -> str:
+        """Return the checkout directory of a repository URL."""
+        owner, repo = get_repo_slug(repo_url)
+        return os.path.join(self.root, owner, repo)
+
+    @contextlib.contextmanager
+    def _locked(self, path: str, blocking: bool = True) -> Iterator[bool]:
+        with self._locks_lock:
+            lock = self._locks.setdefault(path, threading.Lock())
+        if not lock.acquire(blocking):
+            yield False
+            return
+        try:
+            if fcntl is None:
+                yield True
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.lock', 'a') as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    yield False
+                    return
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            lock.release()
+
+    @contextlib.contextmanager
+    def _leased(self, path: str) -> Iterator[None]:
+        """Protect a checkout from eviction while the block runs."""
+        with self._locks_lock:
+            self._leases[path] = self._leases.get(path, 0) + 1
+        try:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.lease', 'a') as lease_file:
+                fcntl.flock(lease_file, fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lease_file, fcntl.LOCK_UN)
+        finally:
+            with self._locks_lock:
+                self._leases[path] -= 1
+                if not self._leases[path]:
+                    del self._leases[path]
+
+    @contextlib.contextmanager
+    def _unleased(self, path: str) -> Iterator[bool]:
+        """Yield whether no process holds a lease on a checkout, keeping new leases out meanwhile."""
+        if self._leases.get(path):
+            yield False
+            return
+        if fcntl is None:
+            yield True
+            return
+        with open(path + '.lease', 'a') as lease_file:
+            try:
+                fcntl.flock(lease_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lease_file, fcntl.LOCK_UN)
+
+    @contextlib.contextmanager
+    def checkout(self, repo_url: str) -> Iterator[Tuple[str, bool]]:
+        """Clone a repository or update its cached checkout, and lease it.
+
+        The checkout cannot be evicted until the ``with`` block exits, so
+        read it inside the block.
+
+        Args:
+            repo_url: GitHub repository URL
+
+        Yields:
+            Tuple of (checkout path, whether it was freshly cloned)
+        """
+        from git import Repo
+        path = self.path_for(repo_url)
+        with self._leased(path):
+            with self._locked(path):
+                cloned = not os.path.isdir(os.path.join(path, '.git'))
+                if cloned:
+                    shutil.rmtree(path, ignore_errors=True)
+                    Repo.clone_from(repo_url, path, depth=self.depth, single_branch=True,
+                                    filter='blob:none', no_tags=True)
+                else:
+                    repo = Repo(path)
+                    branch = repo.active_branch.name
+                    repo.git.fetch('origin', branch, depth=self.depth, no_tags=True)
+                    repo.git.reset('--hard', 'FETCH_HEAD')
+                with open(os.path.join(path, '.git', SIZE_FILE), 'w') as f:
+                    f.write(str(_tree_size(path)))
+                os.utime(path)
+            self.evict(keep=path)
+            yield path, cloned
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for owner in os.listdir(self.root):
+            owner_dir = os.path.join(self.root, owner)
+            if not os.path.isdir(owner_dir):
+                continue
+            for repo in os.listdir(owner_dir):
+                path = os.path.join(owner_dir, repo)
+                if not os.path.isdir(path):
+                    continue
+                try:
+                    with open(os.path.join(path, '.git', SIZE_FILE)) as f:
+                        size = int(f.read())
+                except (OSError, ValueError):
+                    size = _tree_size(path)
+                entries.append((os.path.getmtime(path), size, path))
+        return entries
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """Remove least recently used checkouts until the cache fits its quota.
+
+        Checkouts that are leased or being cloned or updated are skipped.
+
+        Args:
+            keep: Checkout that must not be removed
+
+        Returns:
+            Paths of the removed checkouts
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            with self._locked(path, blocking=False) as acquired, self._unleased(path) as unleased:
+                if not acquired or not unleased:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed.append(path)
+        return removed
+
+_cache: Optional[CloneCache] = None
+_cache_lock = threading.Lock()
+
+def get_clone_cache() -> CloneCache:
+    """Return the process-wide clone cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CloneCache()
+    return _cache
@@ -0,0 +1,22 @@
+import os
+import re
+
+# Constants
+DATA_DIR = os.environ.get('CODEBASE_RAG_HOME', os.path.join(os.path.expanduser('~'), '.codebase_rag'))
+UNSAFE_NAME_PATTERN = re.compile(r'[^A-Za-z0-9_.-]')
+
+def safe_name(name: str) -> str:
+    """Replace characters that are not safe in file names with underscores."""
+    return UNSAFE_NAME_PATTERN.sub('_', name)
+
+def namespace_file_name(store_name: str, namespace: str) -> str:
+    """File name stem of the per-namespace files (manifest, lexical index, chunk store).
+
+    Args:
+        store_name: Name of the vector store (VectorStore.name)
+        namespace: Namespace of the vectors; '' gives the prefix shared by all namespaces of the store
+
+    Returns:
+        Sanitized ``<store>__<namespace>``
+    """
+    return safe_name(f"{store_name}__{namespace}")
@@ -0,0 +1,96 @@
+import re
+from typing import Any, Callable, Dict, List, Sequence, Set
+
+from .chunking import CHUNK_OVERLAP
+from .embeddings import count_tokens
+
+# Constants
+CONTEXT_TOKEN_BUDGET = 4000
+CONTEXT_CANDIDATES = 20
+NEAR_DUPLICATE_THRESHOLD = 0.9
+SHINGLE_SIZE = 5
+MIN_OVERLAP_CHARS = 32
+SHINGLE_PATTERN = re.compile(r"\w+")
+
+def _merge_text(first: str, second: str) -> str:
+    """Join adjacent chunks, removing text repeated across the boundary."""
+    for size in range(min(len(first), len(second), CHUNK_OVERLAP), MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return first + '\n' + second
+
+def _shingles(text: str) -> Set[int]:
+    words = SHINGLE_PATTERN.findall(text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        return {hash(tuple(words))}
+    return {hash(tuple(words[i:i + SHINGLE_SIZE])) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def merge_adjacent_chunks(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge matches from the same file whose chunk indexes are consecutive.
+
+    Files of different namespaces (repositories) are never merged.
+
+    Args:
+        matches: Matches with id, score and metadata (file_name, chunk_index, text)
+
+    Returns:
+        Merged matches; each keeps the best score of its parts and lists
+        the merged indexes under metadata['chunk_indexes']
+    """
+    by_file: Dict[tuple, List[Dict[str, Any]]] = {}
+    for match in matches:
+        key = (match.get('namespace'), match['metadata'].get('file_name', match['id']))
+        by_file.setdefault(key, []).append(match)
+    merged = []
+    for file_matches in by_file.values():
+        file_matches.sort(key=lambda m: m['metadata'].get('chunk_index', 0))
+        run = None
+        for match in file_matches:
+            index = match['metadata'].get('chunk_index', 0)
+            if run is not None and index == run['metadata']['chunk_indexes'][-1] + 1:
+                run['metadata']['text'] = _merge_text(run['metadata']['text'], match['metadata']['text'])
+                run['metadata']['chunk_indexes'].append(index)
+                run['score'] = max(run['score'], match['score'])
+                continue
+            if run is not None and index == run['metadata']['chunk_indexes'][-1]:
+                continue
+            run = dict(match, metadata=dict(match['metadata'], chunk_indexes=[index]))
+            merged.append(run)
+    return merged
+
+def assemble_context(matches: List[Dict[str, Any]], token_budget: int = CONTEXT_TOKEN_BUDGET,
+                     duplicate_threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                     counter: Callable[[Sequence[str]], List[int]] = count_tokens) -> List[Dict[str, Any]]:
+    """Pack retrieved chunks into a token budget.
+
+    Adjacent chunks of the same file are merged (dropping overlapping
+    text), near-duplicates are removed by word-shingle Jaccard
+    similarity, and the remaining chunks are added best score first
+    while they fit the budget.
+
+    Args:
+        matches: Matches with id, score and metadata
+        token_budget: Maximum total tokens of context text
+        duplicate_threshold: Jaccard similarity above which a chunk is dropped
+        counter: Function returning token counts for a list of texts
+
+    Returns:
+        Selected matches, best score first
+    """
+    candidates = sorted(merge_adjacent_chunks(matches), key=lambda m: m['score'], reverse=True)
+    kept_shingles: List[Set[int]] = []
+    unique = []
+    for match in candidates:
+        shingles = _shingles(match['metadata']['text'])
+        if any(len(shingles & other) / len(shingles | other) >= duplicate_threshold for other in kept_shingles):
+            continue
+        kept_shingles.append(shingles)
+        unique.append(match)
+
+    selected = []
+    used = 0
+    for match, tokens in zip(unique, counter([m['metadata']['text'] for m in unique])):
+        if used + tokens <= token_budget:
+            selected.append(match)
+            used += tokens
+    return selected
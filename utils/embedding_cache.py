@@ -0,0 +1,155 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .config import DATA_DIR
+
+# Constants
+EMBEDDING_CACHE_PATH = os.path.join(DATA_DIR, 'embedding_cache.sqlite3')
+EMBEDDING_CACHE_MAX_BYTES = int(os.environ.get('CODEBASE_RAG_EMBEDDING_CACHE_MB', '2048')) * 1024 * 1024
+EVICT_TO_FRACTION = 0.9
+ROW_OVERHEAD_BYTES = 64
+SQLITE_MAX_VARIABLES = 900
+
+def make_cache_key(model_name: str, text: str) -> bytes:
+    """Content address of an embedding: SHA-256 of model name and text."""
+    return hashlib.sha256(model_name.encode('utf-8') + b'\0' + text.encode('utf-8')).digest()
+
+class EmbeddingCache:
+    """Persistent embedding cache in SQLite with size-bounded LRU eviction.
+
+    Keys are content addresses from ``make_cache_key``, so identical
+    chunks are embedded once no matter which repository, branch or fork
+    they come from.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        """Open or create a cache database.
+
+        Args:
+            path: SQLite database file
+            max_bytes: Approximate size limit of the stored vectors
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS embeddings ('
+            'key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL) WITHOUT ROWID'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)')
+        self._rows, self._row_bytes = self._conn.execute(
+            'SELECT COUNT(*), COALESCE(MAX(length(vector)), 0) FROM embeddings'
+        ).fetchone()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _chunks(items: List, size: int = SQLITE_MAX_VARIABLES) -> Iterable[List]:
+        for i in range(0, len(items), size):
+            yield items[i:i + size]
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Look up many keys in one pass and mark the hits as recently used.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Dictionary of key -> float32 vector for the keys that were found
+        """
+        found: Dict[bytes, np.ndarray] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for part in self._chunks(unique):
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                found.update((key, np.frombuffer(vector, dtype=np.float32)) for key, vector in rows)
+            if found:
+                now = time.time_ns()
+                self._conn.execute('BEGIN')
+                self._conn.executemany('UPDATE embeddings SET last_used = ? WHERE key = ?',
+                                       [(now, key) for key in found])
+                self._conn.execute('COMMIT')
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, items: Dict[bytes, np.ndarray]) -> None:
+        """Store vectors and evict least recently used rows if over budget.
+
+        Args:
+            items: Dictionary of key -> vector
+        """
+        if not items:
+            return
+        now = time.time_ns()
+        rows = [(key, np.ascontiguousarray(vector, dtype=np.float32).tobytes(), now)
+                for key, vector in items.items()]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute('BEGIN')
+            self._conn.executemany('INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)', rows)
+            self._conn.execute('COMMIT')
+            self._rows += self._conn.total_changes - before
+            self._row_bytes = max(self._row_bytes, len(rows[0][1]))
+            self._evict()
+
+    def _evict(self) -> None:
+        row_bytes = self._row_bytes + ROW_OVERHEAD_BYTES
+        if self._rows * row_bytes <= self.max_bytes:
+            return
+        excess = self._rows - int(self.max_bytes * EVICT_TO_FRACTION) // row_bytes
+        self._conn.execute(
+            'DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)',
+            (excess,)
+        )
+        self._rows -= excess
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters of this process and the approximate cache size."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': self._rows,
+            'approx_bytes': self._rows * (self._row_bytes + ROW_OVERHEAD_BYTES)
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+_cache_enabled = EMBEDDING_CACHE_MAX_BYTES > 0
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Return the process-wide embedding cache, or None if it is disabled.
+
+    The cache is opened on first use. Setting ``CODEBASE_RAG_EMBEDDING_CACHE_MB=0``
+    disables it.
+    """
+    global _cache
+    if not _cache_enabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
+
+def set_embedding_cache(cache: Optional[EmbeddingCache]) -> None:
+    """Replace the process-wide embedding cache (None disables caching)."""
+    global _cache, _cache_enabled
+    _cache = cache
+    _cache_enabled = cache is not None
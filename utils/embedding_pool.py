@@ -0,0 +1,154 @@
+import atexit
+import multiprocessing as mp
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embeddings import EMBEDDING_BATCH_SIZE, MODEL_NAME, get_model, set_encoder_pool
+
+# Constants
+EMBEDDING_WORKERS = max(1, (os.cpu_count() or 1) // 4)
+TORCH_THREADS_PER_WORKER = 4
+SHARD_SIZE = 128
+
+_worker_model_name: Optional[str] = None
+
+def _init_worker(model_name: str, torch_threads: int) -> None:
+    """Pin torch threads and load the model once per worker process."""
+    global _worker_model_name
+    import torch
+    torch.set_num_threads(torch_threads)
+    _worker_model_name = model_name
+    get_model(model_name)
+
+def _worker_dimension() -> int:
+    return get_model(_worker_model_name).get_sentence_embedding_dimension()
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attach to a segment the parent owns without registering it with a resource tracker.
+
+    The parent unlinks the segment. A registration by the worker would
+    either be reported as a leaked segment (and unlinked a second time)
+    at shutdown, or, when the worker shares the parent's tracker, make
+    the parent's unlink fail to unregister it. Python 3.13 has
+    ``track=False`` for this; earlier versions skip the register call.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+def _encode_shard(texts: Sequence[str], shm_name: str, shape: Tuple[int, int], row: int, batch_size: int) -> int:
+    """Encode a shard and write it straight into the shared output matrix."""
+    shm = _attach_shared_memory(shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        out[row:row + len(texts)] = get_model(_worker_model_name).encode(
+            list(texts), batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False
+        )
+        del out
+    finally:
+        shm.close()
+    return len(texts)
+
+class EmbeddingPool:
+    """Shard embedding batches across worker processes.
+
+    Each worker loads the model once in its initializer and writes its
+    rows directly into a shared-memory float32 matrix, so results are not
+    pickled back to the parent. Intended for CPU-only hosts where a single
+    ``encode`` call does not saturate every core.
+    """
+
+    def __init__(self, num_workers: int = EMBEDDING_WORKERS, torch_threads: int = TORCH_THREADS_PER_WORKER,
+                 model_name: str = MODEL_NAME, shard_size: int = SHARD_SIZE):
+        """Start the worker processes.
+
+        Args:
+            num_workers: Number of worker processes
+            torch_threads: torch intra-op threads per worker
+            model_name: Name or path of the SentenceTransformer model
+            shard_size: Number of texts sent to a worker per task
+        """
+        self.num_workers = num_workers
+        self.torch_threads = torch_threads
+        self.model_name = model_name
+        self.shard_size = shard_size
+        self._executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=mp.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(model_name, torch_threads)
+        )
+        self._dimension: Optional[int] = None
+
+    @property
+    def preferred_batch_size(self) -> int:
+        """Batch size that gives every worker one shard."""
+        return self.num_workers * self.shard_size
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = self._executor.submit(_worker_dimension).result()
+        return self._dimension
+
+    def encode(self, texts: Sequence[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> np.ndarray:
+        """Encode texts across the worker processes.
+
+        Args:
+            texts: Input texts to embed
+            batch_size: Number of texts per forward pass inside a worker
+
+        Returns:
+            C-contiguous float32 matrix of shape (len(texts), dimension)
+        """
+        shape = (len(texts), self.dimension)
+        if not texts:
+            return np.empty(shape, dtype=np.float32)
+        shm = shared_memory.SharedMemory(create=True, size=shape[0] * shape[1] * 4)
+        try:
+            futures = [
+                self._executor.submit(_encode_shard, texts[row:row + self.shard_size], shm.name, shape, row, batch_size)
+                for row in range(0, len(texts), self.shard_size)
+            ]
+            for future in futures:
+                future.result()
+            return np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self._executor.shutdown(wait=True)
+
+def start_embedding_workers(num_workers: int = EMBEDDING_WORKERS, torch_threads: int = TORCH_THREADS_PER_WORKER,
+                            model_name: str = MODEL_NAME) -> EmbeddingPool:
+    """Start an EmbeddingPool and route get_embeddings_batch through it.
+
+    Args:
+        num_workers: Number of worker processes
+        torch_threads: torch intra-op threads per worker
+        model_name: Name or path of the SentenceTransformer model
+
+    Returns:
+        The installed pool
+    """
+    pool = EmbeddingPool(num_workers, torch_threads, model_name)
+    set_encoder_pool(pool)
+    atexit.register(pool.close)
+    return pool
+
+def stop_embedding_workers(pool: EmbeddingPool) -> None:
+    """Shut a pool down and go back to in-process encoding."""
+    set_encoder_pool(None)
+    pool.close()
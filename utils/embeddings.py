@@ -1,14 +1,184 @@
-from sentence_transformers import SentenceTransformer
-from typing import List
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+from .embedding_cache import get_embedding_cache, make_cache_key
+from .telemetry import incr, span
+
+# Constants
+MODEL_NAME = 'all-mpnet-base-v2'
+EMBEDDING_DIMENSION = 768
+EMBEDDING_BATCH_SIZE = 64
+MAX_SEQ_TOKENS = 384
+POOL_MIN_TEXTS = 256
+QUERY_CACHE_SIZE = 1024
+
+_models: Dict[str, 'SentenceTransformer'] = {}
+_models_lock = threading.Lock()
+_encoder_pool: Optional[Any] = None
+_query_cache: 'OrderedDict[tuple, np.ndarray]' = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+def get_model(model_name: str = MODEL_NAME) -> 'SentenceTransformer':
+    """Return the process-wide SentenceTransformer for a model name.
+
+    The model is loaded on first use and shared by every later caller,
+    so indexing and querying never pay the load cost more than once.
+    ``sentence_transformers`` (and torch) is imported here rather than
+    at module import.
+
+    Args:
+        model_name: Name or path of the SentenceTransformer model
+
+    Returns:
+        Loaded SentenceTransformer model
+    """
+    model = _models.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(model_name)
+                _models[model_name] = model
+    return model
+
+def set_model(model: Any, model_name: str = MODEL_NAME) -> None:
+    """Install a preloaded model under a name, e.g. a small or offline encoder.
+
+    Any object with SentenceTransformer's ``encode`` and ``tokenizer``
+    works. Cached question embeddings of that name are dropped.
+
+    Args:
+        model: Model to serve for ``model_name``
+        model_name: Name callers look the model up by
+    """
+    with _models_lock:
+        _models[model_name] = model
+    with _query_cache_lock:
+        for key in [key for key in _query_cache if key[0] == model_name]:
+            del _query_cache[key]
+
+def set_encoder_pool(pool: Optional[Any]) -> None:
+    """Route large get_embeddings_batch calls through a multi-process pool.
+    
+    Args:
+        pool: EmbeddingPool instance, or None to encode in-process again
+    """
+    global _encoder_pool
+    _encoder_pool = pool
+
+def get_encode_batch_hint() -> int:
+    """Number of texts worth collecting before calling get_embeddings_batch."""
+    if _encoder_pool is not None:
+        return max(POOL_MIN_TEXTS, _encoder_pool.preferred_batch_size)
+    return EMBEDDING_BATCH_SIZE
+
+def count_tokens(texts: Sequence[str], model_name: str = MODEL_NAME) -> List[int]:
+    """Count tokenizer tokens (without special tokens) for each text.
+    
+    Args:
+        texts: Texts to tokenize
+        model_name: Name or path of the SentenceTransformer model
+        
+    Returns:
+        Token count per text
+    """
+    if not texts:
+        return []
+    encoded = get_model(model_name).tokenizer(list(texts), add_special_tokens=False)['input_ids']
+    return [len(ids) for ids in encoded]
 
 def get_embeddings(text: str) -> List[float]:
     """Generate embeddings using SentenceTransformer.
-    
+
     Args:
         text: Input text to embed
-        
+
     Returns:
         List of embedding values
     """
-    model = SentenceTransformer('all-mpnet-base-v2')
-    return model.encode(text).tolist() 
\ No newline at end of file
+    return get_model().encode(text).tolist()
+
+def embed_query(question: str, model_name: str = MODEL_NAME) -> np.ndarray:
+    """Embed a question, reusing recent results from an in-memory LRU.
+
+    Args:
+        question: Query text
+        model_name: Name or path of the SentenceTransformer model
+
+    Returns:
+        Read-only float32 embedding vector
+    """
+    key = (model_name, question)
+    with _query_cache_lock:
+        embedding = _query_cache.get(key)
+        if embedding is not None:
+            _query_cache.move_to_end(key)
+            return embedding
+    with span('embed_query'):
+        embedding = np.asarray(get_model(model_name).encode(question), dtype=np.float32)
+    embedding.flags.writeable = False
+    with _query_cache_lock:
+        _query_cache[key] = embedding
+        if len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+    return embedding
+
+def _encode(texts: Sequence[str], batch_size: int, model_name: str) -> np.ndarray:
+    """Encode texts in-process or through the installed worker pool."""
+    pool = _encoder_pool
+    if pool is not None and pool.model_name == model_name and len(texts) >= POOL_MIN_TEXTS:
+        return pool.encode(texts, batch_size=batch_size)
+    model = get_model(model_name)
+    if not texts:
+        return np.empty((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    embeddings = model.encode(
+        list(texts),
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        show_progress_bar=False
+    )
+    return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+def get_embeddings_batch(texts: Sequence[str], batch_size: int = EMBEDDING_BATCH_SIZE,
+                         model_name: str = MODEL_NAME, use_cache: bool = True) -> np.ndarray:
+    """Generate embeddings for many texts in a single encode call.
+
+    The on-disk embedding cache is consulted in bulk first; only texts
+    that are not cached (deduplicated) are encoded.
+
+    Args:
+        texts: Input texts to embed
+        batch_size: Number of texts encoded per forward pass
+        model_name: Name or path of the SentenceTransformer model
+        use_cache: Whether to read and fill the embedding cache
+
+    Returns:
+        C-contiguous float32 matrix of shape (len(texts), dimension)
+    """
+    with span('embed', texts=len(texts)) as attrs:
+        cache = get_embedding_cache() if use_cache else None
+        if cache is None or not texts:
+            attrs['encoded'] = len(texts)
+            incr('texts_embedded_total', len(texts))
+            return _encode(texts, batch_size, model_name)
+        keys = [make_cache_key(model_name, text) for text in texts]
+        vectors = cache.get_many(keys)
+        texts_by_key = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                texts_by_key.setdefault(key, text)
+        if texts_by_key:
+            encoded = dict(zip(texts_by_key, _encode(list(texts_by_key.values()), batch_size, model_name)))
+            cache.put_many(encoded)
+            vectors.update(encoded)
+        attrs.update(encoded=len(texts_by_key), cache_hits=len(texts) - len(texts_by_key))
+        incr('texts_embedded_total', len(texts_by_key))
+        incr('embedding_cache_hits_total', len(texts) - len(texts_by_key))
+        return np.ascontiguousarray(np.stack([vectors[key] for key in keys]), dtype=np.float32)
@@ -0,0 +1,120 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Optional, Tuple
+
+# Constants
+NOTEBOOK_MAX_FILE_SIZE = 32 * 1024 * 1024
+NOTEBOOK_CELL_TYPES = ('code', 'markdown')
+LONG_LINE_CHARS = 500
+MINIFIED_LONG_LINE_FRACTION = 0.5
+BLOB_ENTROPY_BITS = 5.5
+HEX_BLOB_FRACTION = 0.5
+ENTROPY_SAMPLE_CHARS = 64 * 1024
+HEADER_CHARS = 1024
+PROSE_EXTENSIONS = {'.md'}
+GENERATED_NAME_PATTERN = re.compile(
+    r"(\.min\.[a-z]+|[.-]bundle\.js|\.pb\.go|_pb2(_grpc)?\.py|\.generated\.[a-z]+|\.g\.dart)$"
+    r"|(^|/)(package-lock\.json|yarn\.lock|pnpm-lock\.yaml|poetry\.lock|Pipfile\.lock|Cargo\.lock|go\.sum"
+    r"|composer\.lock|Gemfile\.lock)$"
+)
+GENERATED_HEADER_PATTERN = re.compile(
+    r"^\s*(//|#|/?\*|<!--).*(Code generated .* DO NOT EDIT|@generated|<auto-generated|autogenerated by)",
+    re.IGNORECASE | re.MULTILINE
+)
+HEX_RUN_PATTERN = re.compile(r"[0-9a-fA-F]{64,}")
+DATA_URI_PATTERN = re.compile(r"data:[\w.+-]+/[\w.+-]+;base64,[A-Za-z0-9+/=\s]+")
+
+def is_generated_name(rel_path: str) -> bool:
+    """Check whether a path names a lockfile, minified bundle or generated source.
+
+    Args:
+        rel_path: Path relative to the repository root
+
+    Returns:
+        True if the file should not be indexed
+    """
+    return GENERATED_NAME_PATTERN.search(rel_path.replace(os.sep, '/')) is not None
+
+def shannon_entropy(text: str) -> float:
+    """Shannon entropy of a text in bits per character."""
+    if not text:
+        return 0.0
+    total = len(text)
+    return -sum(count / total * math.log2(count / total) for count in Counter(text).values())
+
+def generated_reason(name: str, content: str) -> Optional[str]:
+    """Tell why a file looks generated, minified or like encoded data.
+
+    Args:
+        name: File name
+        content: Decoded file content
+
+    Returns:
+        'generated' (marker comment in the header), 'minified' (most bytes on lines
+        longer than ``LONG_LINE_CHARS``, code only), 'high-entropy' (base64 or
+        other encoded data above ``BLOB_ENTROPY_BITS``, judged only for
+        mostly-ASCII text since CJK prose is high-entropy too; or mostly runs
+        of 64+ hex digits, which carry at most 4 bits/char and so pass the
+        entropy check), or None for ordinary source
+    """
+    if GENERATED_HEADER_PATTERN.search(content[:HEADER_CHARS]):
+        return 'generated'
+    if os.path.splitext(name)[1] not in PROSE_EXTENSIONS and content:
+        long_chars = sum(len(line) for line in content.split('\n') if len(line) > LONG_LINE_CHARS)
+        if long_chars > MINIFIED_LONG_LINE_FRACTION * len(content):
+            return 'minified'
+    sample = content[:ENTROPY_SAMPLE_CHARS]
+    mostly_ascii = len(sample.encode('utf-8')) - len(sample) <= 0.05 * len(sample)
+    if mostly_ascii and shannon_entropy(sample) > BLOB_ENTROPY_BITS:
+        return 'high-entropy'
+    if sample and sum(map(len, HEX_RUN_PATTERN.findall(sample))) > HEX_BLOB_FRACTION * len(sample):
+        return 'high-entropy'
+    return None
+
+def extract_notebook(content: str) -> Optional[str]:
+    """Reduce a notebook to its code and markdown cell sources.
+
+    Outputs, execution counts, attachments, raw cells and metadata are
+    dropped and inline base64 data URIs in markdown are elided. The result
+    is a minimal notebook JSON that ``chunk_file`` splits along cells.
+
+    Args:
+        content: Notebook JSON
+
+    Returns:
+        Minimal notebook JSON, or None if the content is not a notebook
+    """
+    try:
+        cells = json.loads(content).get('cells', [])
+    except (ValueError, AttributeError):
+        return None
+    kept = []
+    for cell in cells:
+        if cell.get('cell_type') not in NOTEBOOK_CELL_TYPES:
+            continue
+        source = cell.get('source', '')
+        source = ''.join(source) if isinstance(source, list) else source
+        if cell['cell_type'] == 'markdown':
+            source = DATA_URI_PATTERN.sub('data:base64-omitted', source)
+        if source.strip():
+            kept.append({'cell_type': cell['cell_type'], 'source': source})
+    return json.dumps({'cells': kept}, ensure_ascii=False)
+
+def extract_content(name: str, content: str) -> Tuple[Optional[str], Optional[str]]:
+    """Turn a decoded file into the text worth indexing.
+
+    Args:
+        name: File name
+        content: Decoded file content
+
+    Returns:
+        Tuple of (text to index or None, reason the file was skipped or None)
+    """
+    if os.path.splitext(name)[1] == '.ipynb':
+        notebook = extract_notebook(content)
+        return (notebook, None) if notebook is not None else (None, 'invalid-notebook')
+    reason = generated_reason(name, content)
+    return (None, reason) if reason else (content, None)
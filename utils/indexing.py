@@ -0,0 +1,94 @@
+import logging
+import os
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+from .answer_cache import get_answer_cache
+from .chunk_store import get_chunk_store
+from .chunking import MAX_CHUNK_TOKENS, chunk_file
+from .lexical import get_lexical_index
+from .manifest import diff_manifest, get_blob_shas, load_manifest, save_manifest
+from .pipeline import IngestionPipeline
+from .repository import read_files
+from .telemetry import span
+from .vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+def index_repository(repo_path: str, store: VectorStore, namespace: str,
+                     max_chunk_tokens: int = MAX_CHUNK_TOKENS,
+                     progress: Optional[Callable[[IngestionPipeline, int], None]] = None) -> Optional[Dict[str, Any]]:
+    """Incrementally index a repository into a vector store.
+
+    Only files whose git blob SHA changed since the last run are read,
+    chunked and embedded. Vectors of removed files and chunks that a
+    modified file no longer produces are deleted. The namespace's lexical
+    index and chunk store are kept in sync and cached answers of the
+    namespace are invalidated. Changing the chunking settings (or a
+    missing lexical index or chunk store) re-chunks every file.
+
+    Args:
+        repo_path: Path to the cloned repository
+        store: Vector store backend
+        namespace: Namespace for the vectors
+        max_chunk_tokens: Token budget per chunk
+        progress: Called with the pipeline and the number of files to ingest
+            before ingestion starts; ``pipeline.stats()`` can be polled while it runs
+
+    Returns:
+        Indexing stats, or None on failure
+    """
+    try:
+        with span('index', store=store.name, namespace=namespace):
+            manifest = load_manifest(store.name, namespace)
+            files = manifest['files']
+            settings = {'max_chunk_tokens': max_chunk_tokens}
+            lexical_index = get_lexical_index(store.name, namespace)
+            chunk_store = get_chunk_store(store.name, namespace)
+            with span('walk', repo_path=repo_path) as attrs:
+                blob_shas = get_blob_shas(repo_path)
+                attrs['files'] = len(blob_shas)
+            added, modified, removed = diff_manifest(files, blob_shas)
+            if manifest['settings'] != settings or (files and 0 in (lexical_index.size, chunk_store.size)):
+                modified = sorted(path for path in blob_shas if path in files)
+            changed = added + modified
+
+            chunker = partial(chunk_file, max_tokens=max_chunk_tokens)
+            pipeline = IngestionPipeline(store, namespace, chunker=chunker, lexical_index=lexical_index,
+                                         chunk_store=chunk_store)
+            if progress is not None:
+                progress(pipeline, len(changed))
+            files_content = read_files((os.path.join(repo_path, path) for path in changed), repo_path)
+            pipeline_stats = pipeline.run(files_content)
+            chunk_ids = {path: [] for path in changed}
+            chunk_ids.update({name.replace(os.sep, '/'): ids for name, ids in pipeline.chunk_ids.items()})
+
+            stale = [id_ for path in removed for id_ in files[path]['chunks']]
+            for path in modified:
+                stale.extend(set(files[path]['chunks']) - set(chunk_ids[path]))
+            if stale:
+                store.delete(stale, namespace)
+                lexical_index.delete(stale)
+                chunk_store.delete(stale)
+            lexical_index.save()
+            chunk_store.save()
+
+            for path in removed:
+                del files[path]
+            for path in changed:
+                files[path] = {'sha': blob_shas[path], 'chunks': chunk_ids[path]}
+            version = save_manifest(store.name, namespace, files, settings)
+            get_answer_cache().invalidate(store.name, namespace, version)
+            return {
+                'added': len(added),
+                'modified': len(modified),
+                'removed': len(removed),
+                'unchanged': len(blob_shas) - len(changed),
+                'vectors': pipeline_stats['vectors'],
+                'deleted_vectors': len(stale),
+                'vectors_per_sec': pipeline_stats['vectors_per_sec'],
+                'stages': pipeline_stats['stages'],
+                'changed_files': changed
+            }
+    except Exception as e:
+        logger.error("Indexing error: %s", e)
+        return None
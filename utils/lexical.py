@@ -0,0 +1,223 @@
+import math
+import os
+import pickle
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .config import DATA_DIR, namespace_file_name
+
+# Constants
+LEXICAL_DIR = os.path.join(DATA_DIR, 'lexical')
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TERM_FREQUENCY = 65535
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+CAMEL_CASE_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+def tokenize_code(text: str) -> List[str]:
+    """Tokenize code into lowercase identifiers and their sub-words.
+
+    Every identifier is emitted whole and split on snake_case and
+    camelCase boundaries, so ``store_in_pinecone`` also matches ``pinecone``
+    and ``getHTTPResponse`` also matches ``http``.
+
+    Args:
+        text: Source text
+
+    Returns:
+        List of terms
+    """
+    terms = []
+    for identifier in IDENTIFIER_PATTERN.findall(text):
+        terms.append(identifier.lower())
+        parts = [part for piece in identifier.split('_') for part in CAMEL_CASE_PATTERN.findall(piece)]
+        if len(parts) > 1:
+            terms.extend(part.lower() for part in parts if len(part) > 1)
+    return terms
+
+class LexicalIndex:
+    """BM25 inverted index over chunks with array-backed postings.
+
+    Each term maps to two parallel ``array`` postings lists (document
+    numbers as uint32, term frequencies as uint16). Deleted documents are
+    tombstoned, which excludes them from scores and document frequencies,
+    and dropped from postings on the next compaction.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Create an empty index, loading it from ``path`` if it exists.
+
+        Args:
+            path: Pickle file used by ``save``
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self.ids: List[Optional[str]] = []
+        self.metadata: List[Optional[Dict[str, Any]]] = []
+        self.lengths = array('I')
+        self.rows: Dict[str, int] = {}
+        self.vocab: Dict[str, int] = {}
+        self.postings_docs: List[array] = []
+        self.postings_freqs: List[array] = []
+        self.total_length = 0
+        self._alive: Optional[np.ndarray] = None
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.__dict__.update(pickle.load(f))
+            self.rows = {id_: row for row, id_ in enumerate(self.ids) if id_ is not None}
+
+    @property
+    def size(self) -> int:
+        """Number of live documents."""
+        return len(self.rows)
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Boolean mask of documents that are not tombstoned."""
+        if self._alive is None:
+            self._alive = np.array([id_ is not None for id_ in self.ids], dtype=bool)
+        return self._alive
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], metadata: Sequence[Dict[str, Any]]) -> None:
+        """Index chunks, replacing any previous version of the same ids.
+
+        Args:
+            ids: Chunk ids
+            texts: Chunk texts
+            metadata: Chunk metadata returned with matches
+        """
+        with self._lock:
+            self.delete(ids)
+            for id_, text, meta in zip(ids, texts, metadata):
+                row = len(self.ids)
+                terms = Counter(tokenize_code(text))
+                length = sum(terms.values())
+                self.ids.append(id_)
+                self.metadata.append(meta)
+                self.lengths.append(length)
+                self.rows[id_] = row
+                self.total_length += length
+                for term, freq in terms.items():
+                    term_id = self.vocab.get(term)
+                    if term_id is None:
+                        term_id = self.vocab[term] = len(self.postings_docs)
+                        self.postings_docs.append(array('I'))
+                        self.postings_freqs.append(array('H'))
+                    self.postings_docs[term_id].append(row)
+                    self.postings_freqs[term_id].append(min(freq, MAX_TERM_FREQUENCY))
+            self._alive = None
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Tombstone chunks by id.
+
+        Args:
+            ids: Chunk ids to delete
+        """
+        with self._lock:
+            for id_ in ids:
+                row = self.rows.pop(id_, None)
+                if row is not None:
+                    self.total_length -= self.lengths[row]
+                    self.ids[row] = None
+                    self.metadata[row] = None
+                    self._alive = None
+            if len(self.ids) > 1024 and len(self.rows) < len(self.ids) // 2:
+                self.compact()
+
+    def compact(self) -> None:
+        """Rebuild postings without tombstoned documents."""
+        with self._lock:
+            remap = array('i', [-1]) * len(self.ids)
+            live = [row for row, id_ in enumerate(self.ids) if id_ is not None]
+            for new_row, row in enumerate(live):
+                remap[row] = new_row
+            vocab, postings_docs, postings_freqs = {}, [], []
+            for term, term_id in self.vocab.items():
+                docs, freqs = array('I'), array('H')
+                for doc, freq in zip(self.postings_docs[term_id], self.postings_freqs[term_id]):
+                    if remap[doc] >= 0:
+                        docs.append(remap[doc])
+                        freqs.append(freq)
+                if docs:
+                    vocab[term] = len(postings_docs)
+                    postings_docs.append(docs)
+                    postings_freqs.append(freqs)
+            self.ids = [self.ids[row] for row in live]
+            self.metadata = [self.metadata[row] for row in live]
+            self.lengths = array('I', (self.lengths[row] for row in live))
+            self.rows = {id_: row for row, id_ in enumerate(self.ids)}
+            self.vocab, self.postings_docs, self.postings_freqs = vocab, postings_docs, postings_freqs
+            self._alive = None
+
+    def query(self, text: str, top_k: int) -> List[Dict[str, Any]]:
+        """Return the top_k chunks by BM25 score.
+
+        Args:
+            text: Query text
+            top_k: Number of matches to return
+
+        Returns:
+            List of matches with id, score and metadata
+        """
+        with self._lock:
+            if not self.rows:
+                return []
+            documents = len(self.rows)
+            alive = self.alive
+            average_length = max(self.total_length / documents, 1.0)
+            lengths = np.frombuffer(self.lengths, dtype=np.uint32).astype(np.float32)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+            scores = np.zeros(len(self.ids), dtype=np.float32)
+            for term in set(tokenize_code(text)):
+                term_id = self.vocab.get(term)
+                if term_id is None:
+                    continue
+                docs = np.frombuffer(self.postings_docs[term_id], dtype=np.uint32)
+                freqs = np.frombuffer(self.postings_freqs[term_id], dtype=np.uint16).astype(np.float32)
+                live = alive[docs]
+                docs, freqs = docs[live], freqs[live]
+                df = len(docs)
+                idf = math.log(1 + (documents - df + 0.5) / (df + 0.5))
+                scores[docs] += idf * freqs * (BM25_K1 + 1) / (freqs + norm[docs])
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates) > top_k:
+                candidates = candidates[np.argpartition(scores[candidates], -top_k)[-top_k:]]
+            candidates = candidates[np.argsort(-scores[candidates])]
+            return [{'id': self.ids[row], 'score': float(scores[row]), 'metadata': self.metadata[row]}
+                    for row in candidates]
+
+    def save(self) -> None:
+        """Atomically write the index to its path."""
+        if not self.path:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            state = {key: getattr(self, key) for key in
+                     ('ids', 'metadata', 'lengths', 'vocab', 'postings_docs', 'postings_freqs', 'total_length')}
+            with open(self.path + '.tmp', 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(self.path + '.tmp', self.path)
+
+_indexes: Dict[tuple, LexicalIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_lexical_index(store_name: str, namespace: str) -> LexicalIndex:
+    """Return the process-wide lexical index of a namespace, loading it once.
+
+    Args:
+        store_name: Name of the vector store the chunks live in
+        namespace: Namespace of the chunks
+
+    Returns:
+        Lexical index persisted next to the namespace manifest
+    """
+    key = (store_name, namespace)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = LexicalIndex(os.path.join(LEXICAL_DIR, f"{namespace_file_name(store_name, namespace)}.pkl"))
+        return _indexes[key]
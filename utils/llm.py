@@ -1,6 +1,21 @@
-import google.generativeai as genai
-from typing import List, Dict, Any
-import streamlit as st
+import logging
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, List, Dict, Any, Iterator, Optional, Protocol
+from .telemetry import get_telemetry, span
+
+# Constants
+GEMINI_MODEL = 'gemini-2.0-flash'
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
+
+_models: Dict[str, 'genai.GenerativeModel'] = {}
+_models_lock = threading.Lock()
 
 def initialize_gemini(api_key: str) -> None:
     """Initialize Gemini API.
@@ -8,24 +23,137 @@ def initialize_gemini(api_key: str) -> None:
     Args:
         api_key: Gemini API key
     """
+    import google.generativeai as genai
     genai.configure(api_key=api_key)
+    with _models_lock:
+        _models.clear()
+
+def get_generative_model(model_name: str = GEMINI_MODEL) -> 'genai.GenerativeModel':
+    """Return the process-wide GenerativeModel for a model name.
+    
+    Args:
+        model_name: Gemini model name
+        
+    Returns:
+        Cached GenerativeModel
+    """
+    model = _models.get(model_name)
+    if model is None:
+        import google.generativeai as genai
+        with _models_lock:
+            model = _models.setdefault(model_name, genai.GenerativeModel(model_name))
+    return model
+
+class LLM(Protocol):
+    """Interface for text generation backends.
+    
+    ``stream`` yields text deltas; when ``usage`` is given, backends that
+    know the exact output token count store it under 'output_tokens'.
+    """
+
+    def generate(self, prompt: str) -> str:
+        ...
+
+    def stream(self, prompt: str, usage: Optional[Dict[str, int]] = None) -> Iterator[str]:
+        ...
+
+class GeminiLLM:
+    """LLM backed by a Gemini GenerativeModel."""
+
+    def __init__(self, model_name: str = GEMINI_MODEL):
+        self.model_name = model_name
+
+    def generate(self, prompt: str) -> str:
+        return get_generative_model(self.model_name).generate_content(prompt).text
 
-def generate_response(question: str, context_chunks: List[Dict[str, Any]]) -> str:
+    def stream(self, prompt: str, usage: Optional[Dict[str, int]] = None) -> Iterator[str]:
+        for chunk in get_generative_model(self.model_name).generate_content(prompt, stream=True):
+            metadata = getattr(chunk, 'usage_metadata', None)
+            if usage is not None and metadata and metadata.candidates_token_count:
+                usage['output_tokens'] = metadata.candidates_token_count
+            if chunk.text:
+                yield chunk.text
+
+def build_prompt(question: str, context_chunks: List[Dict[str, Any]]) -> str:
+    """Build the RAG prompt from the question and retrieved chunks.
+    
+    Args:
+        question: User's question
+        context_chunks: Relevant context chunks from vector store; chunks
+            from a multi-repository query are labeled with their repository
+        
+    Returns:
+        Prompt text
+    """
+    context = "\n\n".join([
+        f"[{chunk['namespace']}: {chunk['metadata'].get('file_name', chunk['id'])}]\n{chunk['metadata']['text']}"
+        if chunk.get('namespace') else chunk['metadata']['text']
+        for chunk in context_chunks
+    ])
+    return f"Context: {context}\n\nQuestion: {question}\n\nPlease answer based on the code context."
+
+def generate_response(question: str, context_chunks: List[Dict[str, Any]], llm: Optional[LLM] = None) -> str:
     """Generate response using Gemini.
     
     Args:
         question: User's question
         context_chunks: Relevant context chunks from vector store
+        llm: Generation backend, defaults to Gemini
         
     Returns:
         Generated response
     """
     try:
-        context = "\n\n".join([chunk['metadata']['text'] for chunk in context_chunks])
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        prompt = f"Context: {context}\n\nQuestion: {question}\n\nPlease answer based on the code context."
-        response = model.generate_content(prompt)
-        return response.text
+        with span('generate', streamed=False):
+            return (llm or GeminiLLM()).generate(build_prompt(question, context_chunks))
+    except Exception as e:
+        logger.error("LLM error: %s", e)
+        return "Error generating response. Please try again."
+
+def stream_response(question: str, context_chunks: List[Dict[str, Any]], llm: Optional[LLM] = None,
+                    stats: Optional[Dict[str, float]] = None) -> Iterator[str]:
+    """Stream a response as text deltas while recording latency metrics.
+    
+    When the stream ends, ``stats`` holds ttft_ms (time to first token),
+    total_ms, output_tokens, tokens_per_sec (measured after the first
+    token) and error (whether generation failed). Token counts come from
+    the backend when it reports them and are estimated from the text
+    otherwise.
+    
+    Args:
+        question: User's question
+        context_chunks: Relevant context chunks from vector store
+        llm: Generation backend, defaults to Gemini
+        stats: Dictionary that receives the metrics
+        
+    Yields:
+        Response text deltas
+    """
+    stats = stats if stats is not None else {}
+    usage: Dict[str, int] = {}
+    parts: List[str] = []
+    start = time.perf_counter()
+    first = None
+    error = None
+    stats['error'] = False
+    try:
+        for delta in (llm or GeminiLLM()).stream(build_prompt(question, context_chunks), usage):
+            if first is None:
+                first = time.perf_counter()
+            parts.append(delta)
+            yield delta
     except Exception as e:
-        st.error(f"LLM error: {str(e)}")
-        return "Error generating response. Please try again." 
\ No newline at end of file
+        logger.error("LLM error: %s", e)
+        error = str(e)
+        stats['error'] = True
+        yield "Error generating response. Please try again."
+    end = time.perf_counter()
+    tokens = usage.get('output_tokens') or len(WORD_PATTERN.findall(''.join(parts)))
+    stats['ttft_ms'] = round(((first or end) - start) * 1000, 1)
+    stats['total_ms'] = round((end - start) * 1000, 1)
+    stats['output_tokens'] = tokens
+    stats['tokens_per_sec'] = round(tokens / (end - first), 1) if first and end > first else 0.0
+    telemetry = get_telemetry()
+    telemetry.record('generate', end - start, error, streamed=True, output_tokens=tokens, ttft_ms=stats['ttft_ms'])
+    telemetry.observe('generate_ttft_seconds', (first or end) - start)
+    telemetry.incr('generated_tokens_total', tokens)
@@ -0,0 +1,578 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .config import safe_name
+
+# Constants
+IVF_MIN_VECTORS = 50_000
+IVF_NPROBE = 8
+IVF_KMEANS_ITERATIONS = 10
+IVF_REBUILD_FRACTION = 0.1
+SCAN_BLOCK_ROWS = 65_536
+UPSERT_BLOCK_ROWS = 1024
+QUANTIZATIONS = ('float32', 'int16', 'int8')
+QUANTIZE_MIN_VECTORS = 10_000
+QUANTIZE_SAMPLE_ROWS = 50_000
+RESCORE_MULTIPLIER = 4
+CODE_SCAN_BYTES = 1024 * 1024
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so that dot product equals cosine similarity."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+def _top_k(scores: np.ndarray, rows: np.ndarray, top_k: int) -> List[tuple]:
+    """Return (row, score) pairs for the highest scores, best first."""
+    if len(scores) > top_k:
+        best = np.argpartition(scores, -top_k)[-top_k:]
+        scores, rows = scores[best], rows[best]
+    order = np.argsort(-scores)
+    return [(int(rows[i]), float(scores[i])) for i in order]
+
+def train_ivf(matrix: np.ndarray, alive: np.ndarray, nlist: int,
+              iterations: int = IVF_KMEANS_ITERATIONS, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Partition unit vectors with spherical k-means.
+
+    Args:
+        matrix: Row-normalized float32 vectors (may be a memmap)
+        alive: Boolean mask of rows to index
+        nlist: Number of partitions
+        iterations: k-means iterations on the training sample
+        seed: Random seed for sampling and initialization
+
+    Returns:
+        Dictionary with centroids, rows grouped by partition and CSR offsets
+    """
+    rng = np.random.default_rng(seed)
+    candidates = np.flatnonzero(alive)
+    sample = np.sort(rng.choice(candidates, size=min(len(candidates), nlist * 256), replace=False))
+    train = np.asarray(matrix[sample])
+    centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(train @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, train)
+        empty = np.bincount(assignment, minlength=nlist) == 0
+        sums[empty] = train[rng.choice(len(train), size=int(empty.sum()))]
+        centroids = _normalize(sums)
+
+    assignment = np.full(len(matrix), -1, dtype=np.int32)
+    for start in range(0, len(matrix), SCAN_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + SCAN_BLOCK_ROWS])
+        assignment[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    assignment[~alive] = -1
+    rows = np.flatnonzero(assignment >= 0)
+    order = rows[np.argsort(assignment[rows], kind='stable')].astype(np.int64)
+    offsets = np.zeros(nlist + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(assignment[rows], minlength=nlist))
+    return {'centroids': centroids, 'order': order, 'offsets': offsets}
+
+def train_quantizer(matrix: np.ndarray, alive: np.ndarray, kind: str, pca_dimension: Optional[int] = None,
+                    seed: int = 0) -> Dict[str, np.ndarray]:
+    """Fit a compact code for unit vectors and encode every row.
+
+    The optional PCA projection keeps the top ``pca_dimension`` principal
+    directions of a sample; dot products in the projected space rank
+    rows like the full dot product up to a per-query constant. Codes are
+    fixed point with one symmetric scale per (projected) dimension.
+    int16 is at least as precise as IEEE half floats for unit vectors,
+    and numpy decodes it several times faster, which is what the scan
+    costs.
+
+    Args:
+        matrix: Row-normalized float32 vectors (may be a memmap)
+        alive: Boolean mask of rows to encode (dead rows get zero codes)
+        kind: 'int16' or 'int8'
+        pca_dimension: Projected dimension, or None to keep all dimensions
+        seed: Random seed for the fitting sample
+
+    Returns:
+        Dictionary with codes, scales, mean and components (empty when unused)
+    """
+    rng = np.random.default_rng(seed)
+    candidates = np.flatnonzero(alive)
+    sample = np.asarray(matrix[np.sort(rng.choice(candidates, size=min(len(candidates), QUANTIZE_SAMPLE_ROWS),
+                                                  replace=False))])
+    dimension = matrix.shape[1]
+    mean = np.zeros(dimension, dtype=np.float32)
+    components = np.empty((0, dimension), dtype=np.float32)
+    if pca_dimension and pca_dimension < dimension:
+        mean = sample.mean(axis=0).astype(np.float32)
+        centered = sample - mean
+        eigenvalues, eigenvectors = np.linalg.eigh(centered.T @ centered)
+        top = np.argsort(eigenvalues)[::-1][:pca_dimension]
+        components = np.ascontiguousarray(eigenvectors[:, top].T, dtype=np.float32)
+        sample = centered @ components.T
+
+    dtype = np.int8 if kind == 'int8' else np.int16
+    levels = np.iinfo(dtype).max
+    scales = (np.abs(sample).max(axis=0) / levels).astype(np.float32)
+    scales[scales == 0] = 1.0
+    codes = np.zeros((len(matrix), sample.shape[1]), dtype=dtype)
+    for start in range(0, len(matrix), SCAN_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + SCAN_BLOCK_ROWS])
+        if len(components):
+            block = (block - mean) @ components.T
+        codes[start:start + len(block)] = np.clip(np.rint(block / scales), -levels, levels).astype(dtype)
+    codes[~alive] = 0
+    return {'codes': codes, 'scales': scales, 'mean': mean, 'components': components}
+
+def _code_query(quantizer: Dict[str, np.ndarray], query: np.ndarray) -> np.ndarray:
+    """Project a query so that ``codes @ result`` ranks rows like ``vectors @ query``."""
+    if len(quantizer['components']):
+        query = quantizer['components'] @ query
+    if len(quantizer['scales']):
+        query = query * quantizer['scales']
+    return query.astype(np.float32)
+
+def _score_codes(codes: np.ndarray, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Dot products of code rows with a projected query.
+
+    Codes are decoded block by block into one reused float32 buffer that
+    stays in the CPU cache, and each block is scored with a single BLAS
+    matrix-vector product, so no full-size float32 copy is materialized.
+
+    Args:
+        codes: Fixed-point codes from ``train_quantizer``
+        query: Query from ``_code_query``
+        rows: Rows to score, or None for all rows
+
+    Returns:
+        float32 scores, one per scored row
+    """
+    count = len(codes) if rows is None else len(rows)
+    scores = np.empty(count, dtype=np.float32)
+    block_rows = max(1, CODE_SCAN_BYTES // (4 * codes.shape[1]))
+    buffer = np.empty((min(block_rows, count), codes.shape[1]), dtype=np.float32)
+    for start in range(0, count, block_rows):
+        block = codes[start:start + block_rows] if rows is None else codes[rows[start:start + block_rows]]
+        decoded = buffer[:len(block)]
+        np.copyto(decoded, block, casting='unsafe')
+        np.dot(decoded, query, out=scores[start:start + len(block)])
+    return scores
+
+class _Namespace:
+    """On-disk state of one namespace: vectors, ids, metadata and IVF."""
+
+    def __init__(self, path: str, dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self.lock = threading.RLock()
+        self.vectors_path = os.path.join(path, 'vectors.f32')
+        self.meta_path = os.path.join(path, 'meta.json')
+        self.ivf_path = os.path.join(path, 'ivf.npz')
+        self.quantizer_path = os.path.join(path, 'quantizer.npz')
+        self.ids: List[Optional[str]] = []
+        self.metadata: List[Optional[Dict[str, Any]]] = []
+        self.rows: Dict[str, int] = {}
+        self.ivf: Optional[Dict[str, np.ndarray]] = None
+        self.ivf_rows = 0
+        self.dirty_rows: set = set()
+        self.quantizer: Optional[Dict[str, Any]] = None
+        self.quantized_rows = 0
+        self.dirty_code_rows: set = set()
+        self._matrix: Optional[np.memmap] = None
+        self._alive: Optional[np.ndarray] = None
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.ids = state['ids']
+            self.metadata = state['metadata']
+            self.dirty_rows = set(state.get('dirty_rows', []))
+            self.dirty_code_rows = set(state.get('dirty_code_rows', []))
+            self.rows = {id_: row for row, id_ in enumerate(self.ids) if id_ is not None}
+        if os.path.exists(self.ivf_path):
+            with np.load(self.ivf_path) as data:
+                self.ivf = {key: data[key] for key in ('centroids', 'order', 'offsets')}
+                self.ivf_rows = int(data['rows'])
+        if os.path.exists(self.quantizer_path):
+            with np.load(self.quantizer_path) as data:
+                self.quantizer = {key: data[key] for key in ('codes', 'scales', 'mean', 'components')}
+                self.quantizer['kind'] = str(data['kind'])
+                self.quantizer['pca_dimension'] = int(data['pca_dimension'])
+                self.quantized_rows = int(data['rows'])
+        self._truncate_vectors()
+
+    def _truncate_vectors(self) -> None:
+        """Drop rows appended after the last save, e.g. by an aborted upsert."""
+        expected = self.size * self.dimension * 4
+        if os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) > expected:
+            with open(self.vectors_path, 'r+b') as f:
+                f.truncate(expected)
+
+    def save(self) -> None:
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'ids': self.ids, 'metadata': self.metadata,
+                       'dirty_rows': sorted(self.dirty_rows),
+                       'dirty_code_rows': sorted(self.dirty_code_rows)}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @property
+    def alive(self) -> np.ndarray:
+        if self._alive is None or len(self._alive) != self.size:
+            self._alive = np.array([id_ is not None for id_ in self.ids], dtype=bool)
+        return self._alive
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Memory-mapped view of all stored rows."""
+        if self.size == 0:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        if self._matrix is None or self._matrix.shape[0] != self.size:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r+',
+                                     shape=(self.size, self.dimension))
+        return self._matrix
+
+    def write(self, ids: List[str], values: np.ndarray, metadata: List[Dict[str, Any]]) -> None:
+        values = _normalize(values.reshape(len(ids), self.dimension))
+        appended = []
+        for i, id_ in enumerate(ids):
+            row = self.rows.get(id_)
+            if row is None:
+                appended.append(i)
+                continue
+            self.matrix[row] = values[i]
+            self.metadata[row] = metadata[i]
+            if row < self.ivf_rows:
+                self.dirty_rows.add(row)
+            if row < self.quantized_rows:
+                self.dirty_code_rows.add(row)
+        if appended:
+            self._truncate_vectors()
+            with open(self.vectors_path, 'ab') as f:
+                f.write(values[appended].tobytes())
+            for i in appended:
+                self.rows[ids[i]] = len(self.ids)
+                self.ids.append(ids[i])
+                self.metadata.append(metadata[i])
+        if self._matrix is not None:
+            self._matrix.flush()
+
+    def delete(self, ids: Sequence[str]) -> None:
+        for id_ in ids:
+            row = self.rows.pop(id_, None)
+            if row is not None:
+                self.ids[row] = None
+                self.metadata[row] = None
+                if self._alive is not None:
+                    self._alive[row] = False
+
+    def compact(self) -> None:
+        """Rewrite the vectors file without deleted rows."""
+        keep = np.flatnonzero(self.alive)
+        tmp_path = self.vectors_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for start in range(0, len(keep), SCAN_BLOCK_ROWS):
+                f.write(np.asarray(self.matrix[keep[start:start + SCAN_BLOCK_ROWS]]).tobytes())
+        self._matrix = None
+        os.replace(tmp_path, self.vectors_path)
+        self.ids = [self.ids[row] for row in keep]
+        self.metadata = [self.metadata[row] for row in keep]
+        self.rows = {id_: row for row, id_ in enumerate(self.ids)}
+        self._alive = None
+        self.drop_ivf()
+        self.drop_quantizer()
+
+    def build_ivf(self, nlist: int) -> None:
+        self.ivf = train_ivf(self.matrix, self.alive, nlist)
+        self.ivf_rows = self.size
+        self.dirty_rows = set()
+        np.savez(self.ivf_path, rows=self.ivf_rows, **self.ivf)
+
+    def drop_ivf(self) -> None:
+        self.ivf, self.ivf_rows, self.dirty_rows = None, 0, set()
+        if os.path.exists(self.ivf_path):
+            os.remove(self.ivf_path)
+
+    def build_quantizer(self, kind: str, pca_dimension: Optional[int]) -> None:
+        self.quantizer = train_quantizer(self.matrix, self.alive, kind, pca_dimension)
+        self.quantizer.update(kind=kind, pca_dimension=pca_dimension or 0)
+        self.quantized_rows = self.size
+        self.dirty_code_rows = set()
+        np.savez(self.quantizer_path, rows=self.quantized_rows, **self.quantizer)
+
+    def drop_quantizer(self) -> None:
+        self.quantizer, self.quantized_rows, self.dirty_code_rows = None, 0, set()
+        if os.path.exists(self.quantizer_path):
+            os.remove(self.quantizer_path)
+
+class LocalVectorStore:
+    """Vector store kept on local disk in memory-mapped float32 files.
+
+    Each namespace lives in its own directory. Small namespaces are searched
+    with an exact vectorized cosine scan; once a namespace holds at least
+    ``ivf_min_vectors`` rows, queries go through an IVF index that only scans
+    the ``nprobe`` closest k-means partitions plus rows written since the
+    index was built.
+
+    With ``quantization`` set to 'int16' or 'int8' (optionally after a
+    PCA projection to ``pca_dimension``), namespaces of at least
+    ``quantize_min_vectors`` rows are first scored on compact in-memory
+    codes; only the best ``rescore_multiplier * top_k`` candidates are
+    re-scored against the full-precision vectors on disk. The float32
+    vectors are kept, so the codes (``quantizer.npz``: 1 or 2 bytes per
+    dimension, or per PCA dimension) add disk and RAM rather than save
+    it; what they cut is the bytes each query scans, which matters once
+    the float32 vectors no longer stay in the page cache.
+    """
+
+    def __init__(self, path: str, dimension: int = 768, ivf_min_vectors: int = IVF_MIN_VECTORS,
+                 nprobe: int = IVF_NPROBE, quantization: str = 'float32', pca_dimension: Optional[int] = None,
+                 quantize_min_vectors: int = QUANTIZE_MIN_VECTORS, rescore_multiplier: int = RESCORE_MULTIPLIER):
+        """Open or create a local vector store.
+
+        Args:
+            path: Directory holding the namespaces
+            dimension: Embedding dimension
+            ivf_min_vectors: Namespace size at which the IVF index is used
+            nprobe: Number of IVF partitions scanned per query
+            quantization: Code type scanned first: 'float32' (none), 'int16' or 'int8'
+            pca_dimension: Dimension of the PCA projection applied before quantization
+            quantize_min_vectors: Namespace size at which compact codes are used
+            rescore_multiplier: Candidates re-scored at full precision, as a multiple of top_k
+        """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}")
+        if quantization == 'float32' and pca_dimension:
+            quantization = 'int16'
+        self.path = path
+        self.dimension = dimension
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self.pca_dimension = pca_dimension if pca_dimension and pca_dimension < dimension else None
+        self.quantize_min_vectors = quantize_min_vectors
+        self.rescore_multiplier = rescore_multiplier
+        self.name = f"local:{os.path.abspath(path)}"
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _namespace(self, namespace: str) -> _Namespace:
+        with self._lock:
+            state = self._namespaces.get(namespace)
+            if state is None:
+                dirname = safe_name(namespace) or '_default'
+                state = _Namespace(os.path.join(self.path, dirname), self.dimension)
+                self._namespaces[namespace] = state
+            return state
+
+    def upsert(self, vectors: Iterable[Dict[str, Any]], namespace: str) -> Dict[str, float]:
+        """Insert or overwrite vectors.
+
+        The namespace is saved after every block, also when ``vectors``
+        raises, so an aborted upsert keeps the blocks written so far.
+
+        Args:
+            vectors: Vector records with id, values and metadata
+            namespace: Namespace for the vectors
+
+        Returns:
+            Throughput stats: vectors, batches, seconds and vectors_per_sec
+        """
+        start = time.perf_counter()
+        state = self._namespace(namespace)
+        upserted, batches = 0, 0
+        block: List[Dict[str, Any]] = []
+        with state.lock:
+            try:
+                for vector in vectors:
+                    block.append(vector)
+                    if len(block) >= UPSERT_BLOCK_ROWS:
+                        self._write_block(state, block)
+                        state.save()
+                        upserted, batches, block = upserted + len(block), batches + 1, []
+                if block:
+                    self._write_block(state, block)
+                    upserted, batches = upserted + len(block), batches + 1
+            finally:
+                state.save()
+        seconds = time.perf_counter() - start
+        return {
+            'vectors': upserted,
+            'batches': batches,
+            'seconds': seconds,
+            'vectors_per_sec': upserted / seconds if seconds > 0 else 0.0
+        }
+
+    @staticmethod
+    def _write_block(state: _Namespace, block: List[Dict[str, Any]]) -> None:
+        latest = {vector['id']: vector for vector in block}
+        ids = list(latest)
+        values = np.asarray([latest[id_]['values'] for id_ in ids], dtype=np.float32)
+        state.write(ids, values, [latest[id_].get('metadata', {}) for id_ in ids])
+
+    def delete(self, ids: Sequence[str], namespace: str) -> None:
+        """Delete vectors by id.
+
+        Args:
+            ids: Vector ids to delete
+            namespace: Namespace of the vectors
+        """
+        state = self._namespace(namespace)
+        with state.lock:
+            state.delete(ids)
+            if state.size - len(state.rows) > max(UPSERT_BLOCK_ROWS, state.size // 2):
+                state.compact()
+            state.save()
+
+    def build_index(self, namespace: str, nlist: Optional[int] = None) -> None:
+        """(Re)build the IVF index of a namespace.
+
+        Args:
+            namespace: Namespace to index
+            nlist: Number of partitions, defaults to sqrt of the live row count
+        """
+        state = self._namespace(namespace)
+        with state.lock:
+            live = int(state.alive.sum())
+            if live == 0:
+                state.drop_ivf()
+                return
+            state.build_ivf(nlist or int(np.clip(np.sqrt(live), 1, 4096)))
+
+    def _candidate_rows(self, state: _Namespace, query: np.ndarray, alive: np.ndarray) -> Optional[np.ndarray]:
+        """Rows to score for a query, or None for an exhaustive scan."""
+        live = int(alive.sum())
+        if live < self.ivf_min_vectors:
+            return None
+        stale = state.size - state.ivf_rows + len(state.dirty_rows)
+        if state.ivf is None or stale > IVF_REBUILD_FRACTION * live:
+            state.build_ivf(int(np.clip(np.sqrt(live), 1, 4096)))
+        centroids, order, offsets = state.ivf['centroids'], state.ivf['order'], state.ivf['offsets']
+        nprobe = min(self.nprobe, len(centroids))
+        probed = np.argpartition(centroids @ query, -nprobe)[-nprobe:]
+        parts = [order[offsets[c]:offsets[c + 1]] for c in probed]
+        parts.append(np.arange(state.ivf_rows, state.size, dtype=np.int64))
+        parts.append(np.fromiter(state.dirty_rows, dtype=np.int64, count=len(state.dirty_rows)))
+        rows = np.unique(np.concatenate(parts))
+        return rows[alive[rows]]
+
+    def _quantizer(self, state: _Namespace, alive: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Compact codes of a namespace, (re)built when missing or stale; None for exact scoring."""
+        if self.quantization == 'float32':
+            return None
+        live = int(alive.sum())
+        if live < self.quantize_min_vectors:
+            return None
+        quantizer = state.quantizer
+        stale = state.size - state.quantized_rows + len(state.dirty_code_rows)
+        if (quantizer is None or quantizer['kind'] != self.quantization
+                or quantizer['pca_dimension'] != (self.pca_dimension or 0)
+                or stale > IVF_REBUILD_FRACTION * live):
+            state.build_quantizer(self.quantization, self.pca_dimension)
+        return state.quantizer
+
+    def _shortlist(self, state: _Namespace, quantizer: Dict[str, Any], query: np.ndarray,
+                   rows: Optional[np.ndarray], alive: np.ndarray, size: int) -> np.ndarray:
+        """Best ``size`` rows by their compact codes, plus every row written since the codes were built."""
+        codes, coded = quantizer['codes'], state.quantized_rows
+        code_query = _code_query(quantizer, query)
+        if rows is None:
+            scores = _score_codes(codes[:coded], code_query)
+            rows = np.flatnonzero(alive)
+            coded_rows = rows[rows < coded]
+            scores = scores[coded_rows]
+        else:
+            coded_rows = rows[rows < coded]
+            scores = _score_codes(codes, code_query, coded_rows)
+        stale = rows[rows >= coded]
+        if state.dirty_code_rows:
+            dirty = np.fromiter(state.dirty_code_rows, dtype=np.int64, count=len(state.dirty_code_rows))
+            stale = np.concatenate([stale, dirty[alive[dirty]]])
+        best = np.array([row for row, _ in _top_k(scores, coded_rows, size)], dtype=np.int64)
+        return np.unique(np.concatenate([best, stale]))
+
+    def query(self, vector: Sequence[float], top_k: int, namespace: str) -> List[Dict[str, Any]]:
+        """Return the top_k most cosine-similar vectors.
+
+        Args:
+            vector: Query embedding
+            top_k: Number of matches to return
+            namespace: Namespace to search in
+
+        Returns:
+            List of matches with id, score and metadata
+        """
+        state = self._namespace(namespace)
+        query = _normalize(np.asarray(vector, dtype=np.float32).reshape(1, -1))[0]
+        with state.lock:
+            if state.size == 0:
+                return []
+            alive = state.alive
+            matrix = state.matrix
+            rows = self._candidate_rows(state, query, alive)
+            quantizer = self._quantizer(state, alive)
+            if quantizer is not None:
+                rows = self._shortlist(state, quantizer, query, rows, alive, top_k * self.rescore_multiplier)
+                scores = np.asarray(matrix[rows]) @ query
+            elif rows is None:
+                scores = np.empty(state.size, dtype=np.float32)
+                for start in range(0, state.size, SCAN_BLOCK_ROWS):
+                    scores[start:start + SCAN_BLOCK_ROWS] = matrix[start:start + SCAN_BLOCK_ROWS] @ query
+                rows = np.flatnonzero(alive)
+                scores = scores[rows]
+            else:
+                scores = np.asarray(matrix[rows]) @ query
+            return [{'id': state.ids[row], 'score': score, 'metadata': state.metadata[row]}
+                    for row, score in _top_k(scores, rows, top_k)]
+
+    def measure_recall(self, namespace: str, queries: int = 100, top_k: int = 10, noise: float = 0.05,
+                       seed: int = 0) -> Dict[str, float]:
+        """Measure recall@k of ``query`` against an exact full-precision scan.
+
+        Queries are stored vectors perturbed with Gaussian noise, so they
+        resemble real traffic without being exact duplicates.
+
+        Args:
+            namespace: Namespace to evaluate
+            queries: Number of sampled queries
+            top_k: Matches compared per query
+            noise: Standard deviation of the noise added to each dimension
+            seed: Random seed
+
+        Returns:
+            Dictionary with recall_at_k, queries, top_k and mean_query_ms
+        """
+        state = self._namespace(namespace)
+        rng = np.random.default_rng(seed)
+        with state.lock:
+            live_rows = np.flatnonzero(state.alive)
+            if len(live_rows) == 0:
+                return {'recall_at_k': 0.0, 'queries': 0, 'top_k': top_k, 'mean_query_ms': 0.0}
+            sample = rng.choice(live_rows, size=min(queries, len(live_rows)), replace=False)
+            vectors = np.asarray(state.matrix[np.sort(sample)])
+        vectors = _normalize(vectors + rng.normal(0, noise, vectors.shape).astype(np.float32))
+        hits, seconds = 0, 0.0
+        for query in vectors:
+            with state.lock:
+                scores = np.empty(state.size, dtype=np.float32)
+                for start in range(0, state.size, SCAN_BLOCK_ROWS):
+                    scores[start:start + SCAN_BLOCK_ROWS] = state.matrix[start:start + SCAN_BLOCK_ROWS] @ query
+                rows = np.flatnonzero(state.alive)
+                exact = {state.ids[row] for row, _ in _top_k(scores[rows], rows, top_k)}
+            start = time.perf_counter()
+            found = {match['id'] for match in self.query(query, top_k, namespace)}
+            seconds += time.perf_counter() - start
+            hits += len(exact & found)
+        return {
+            'recall_at_k': hits / (len(vectors) * top_k),
+            'queries': len(vectors),
+            'top_k': top_k,
+            'mean_query_ms': seconds / len(vectors) * 1000
+        }
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import DATA_DIR, namespace_file_name
+from .repository import IGNORED_DIRS, is_indexable
+
+# Constants
+MANIFEST_DIR = os.path.join(DATA_DIR, 'manifests')
+SYMLINK_MODE = 0o120000
+
+_namespaces: Dict[str, Tuple[float, Optional[str]]] = {}
+_namespaces_lock = threading.Lock()
+
+def get_manifest_path(store_name: str, namespace: str) -> str:
+    """Return the manifest file of a namespace in a given vector store.
+
+    Args:
+        store_name: Name of the vector store (VectorStore.name)
+        namespace: Namespace of the vectors
+
+    Returns:
+        Path to the JSON manifest
+    """
+    return os.path.join(MANIFEST_DIR, f"{namespace_file_name(store_name, namespace)}.json")
+
+def list_namespaces(store_name: str) -> List[str]:
+    """List the namespaces of a vector store that have a manifest.
+
+    Manifests are only parsed when they changed since the last call.
+
+    Args:
+        store_name: Name of the vector store
+
+    Returns:
+        Sorted namespace names
+    """
+    if not os.path.isdir(MANIFEST_DIR):
+        return []
+    prefix = namespace_file_name(store_name, '')
+    namespaces = []
+    with _namespaces_lock:
+        for entry in os.scandir(MANIFEST_DIR):
+            if not entry.name.startswith(prefix) or not entry.name.endswith('.json'):
+                continue
+            mtime = entry.stat().st_mtime
+            cached = _namespaces.get(entry.path)
+            if cached is None or cached[0] != mtime:
+                with open(entry.path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                namespace = manifest.get('namespace') if manifest.get('store') == store_name else None
+                cached = _namespaces[entry.path] = (mtime, namespace)
+            if cached[1] is not None:
+                namespaces.append(cached[1])
+    return sorted(namespaces)
+
+def load_manifest(store_name: str, namespace: str) -> Dict[str, Any]:
+    """Load the manifest mapping file paths to blob SHAs and chunk ids.
+
+    Args:
+        store_name: Name of the vector store
+        namespace: Namespace of the vectors
+
+    Returns:
+        Dictionary with 'files' (path -> {'sha': blob SHA, 'chunks': chunk
+        ids}), 'settings' (chunking settings the files were indexed with)
+        and 'version' (see ``manifest_version``, empty if never indexed)
+    """
+    path = get_manifest_path(store_name, namespace)
+    if not os.path.exists(path):
+        return {'files': {}, 'settings': {}, 'version': ''}
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest.setdefault('settings', {})
+    manifest.setdefault('version', manifest_version(manifest['files'], manifest['settings']))
+    return manifest
+
+def manifest_version(files: Dict[str, Dict[str, Any]], settings: Dict[str, Any]) -> str:
+    """Hash of the indexed file SHAs and settings; changes whenever the index content does."""
+    digest = hashlib.sha1(json.dumps(settings, sort_keys=True).encode('utf-8'))
+    for path in sorted(files):
+        digest.update(f"\0{path}\0{files[path]['sha']}".encode('utf-8'))
+    return digest.hexdigest()
+
+def save_manifest(store_name: str, namespace: str, files: Dict[str, Dict[str, Any]],
+                  settings: Dict[str, Any]) -> str:
+    """Atomically write the manifest of a namespace.
+
+    Args:
+        store_name: Name of the vector store
+        namespace: Namespace of the vectors
+        files: Dictionary of path -> {'sha': blob SHA, 'chunks': chunk ids}
+        settings: Chunking settings the files were indexed with
+
+    Returns:
+        Version of the saved manifest
+    """
+    path = get_manifest_path(store_name, namespace)
+    version = manifest_version(files, settings)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'store': store_name, 'namespace': namespace, 'files': files, 'settings': settings,
+                   'version': version}, f)
+    os.replace(path + '.tmp', path)
+    return version
+
+def delete_manifest(store_name: str, namespace: str) -> None:
+    """Remove the manifest of a namespace, forcing a full re-index."""
+    path = get_manifest_path(store_name, namespace)
+    if os.path.exists(path):
+        os.remove(path)
+
+def git_blob_sha(data: bytes) -> str:
+    """Compute the git blob SHA-1 of raw file contents."""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+def get_blob_shas(repo_path: str) -> Dict[str, str]:
+    """Map every indexable file at HEAD to its git blob SHA.
+
+    Falls back to hashing the working tree when the path is not a git
+    repository or the repository has no commits yet.
+
+    Args:
+        repo_path: Path to the repository
+
+    Returns:
+        Dictionary of repository-relative path -> blob SHA
+    """
+    from git import InvalidGitRepositoryError, Repo
+    try:
+        tree = Repo(repo_path).head.commit.tree
+    except (InvalidGitRepositoryError, ValueError):  # ValueError: HEAD points to an unborn branch
+        shas = {}
+        for root, dirnames, files in os.walk(repo_path):
+            dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+            for file in files:
+                rel_path = os.path.relpath(os.path.join(root, file), repo_path)
+                if is_indexable(rel_path):
+                    with open(os.path.join(root, file), 'rb') as f:
+                        shas[rel_path] = git_blob_sha(f.read())
+        return shas
+    return {
+        item.path: item.hexsha
+        for item in tree.traverse()
+        if item.type == 'blob' and item.mode != SYMLINK_MODE and is_indexable(item.path)
+    }
+
+def diff_manifest(files: Dict[str, Dict[str, Any]],
+                  blob_shas: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+    """Compare a manifest with the current blob SHAs.
+
+    Args:
+        files: Manifest entries of the last indexing run
+        blob_shas: Current path -> blob SHA mapping
+
+    Returns:
+        Tuple of (added, modified, removed) paths
+    """
+    added = sorted(path for path in blob_shas if path not in files)
+    modified = sorted(path for path, sha in blob_shas.items()
+                      if path in files and files[path]['sha'] != sha)
+    removed = sorted(path for path in files if path not in blob_shas)
+    return added, modified, removed
@@ -0,0 +1,255 @@
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .chunking import chunk_file
+from .embeddings import get_embeddings_batch, get_encode_batch_hint
+from .telemetry import get_telemetry, incr, span
+
+# Constants
+PIPELINE_QUEUE_SIZE = 256
+POLL_SECONDS = 0.1
+MAX_CHUNKS_PER_FILE = int(os.environ.get('CODEBASE_RAG_MAX_CHUNKS_PER_FILE', '200'))
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+class PipelineAborted(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+class StageStats:
+    """Counters for one pipeline stage."""
+
+    def __init__(self, name: str, inbox: Optional[queue.Queue] = None):
+        self.name = name
+        self.inbox = inbox
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'items': self.items,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'items_per_sec': self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0,
+            'queue_depth': self.inbox.qsize() if self.inbox is not None else 0,
+            'max_queue_depth': self.max_queue_depth
+        }
+
+class IngestionPipeline:
+    """Read -> chunk -> embed -> upsert connected by bounded queues.
+
+    Every stage runs on its own thread, so file I/O, tokenization,
+    encoding and network upserts overlap and wall time approaches that of
+    the slowest stage. A full queue blocks its producer, which keeps memory
+    bounded. ``stats()`` may be polled from another thread while ``run``
+    is in progress; the stage with the highest ``busy_seconds`` is the
+    bottleneck.
+    """
+
+    def __init__(self, store: Any, namespace: str,
+                 chunker: Callable[[str, str], List[str]] = None,
+                 embed_batch_size: Optional[int] = None,
+                 queue_size: int = PIPELINE_QUEUE_SIZE,
+                 lexical_index: Optional[Any] = None,
+                 chunk_store: Optional[Any] = None,
+                 max_chunks_per_file: int = MAX_CHUNKS_PER_FILE):
+        """Create a pipeline writing into one namespace.
+
+        Args:
+            store: Vector store backend
+            namespace: Namespace for the vectors
+            chunker: Function (file name, content) -> chunks, defaults to chunk_file
+            embed_batch_size: Number of chunks collected per encode call,
+                defaults to get_encode_batch_hint()
+            queue_size: Capacity of each inter-stage queue
+            lexical_index: LexicalIndex that receives every chunk, if any
+            chunk_store: ChunkStore that receives the chunk texts; when set,
+                vector metadata carries no text and matches are hydrated from
+                the store after retrieval
+            max_chunks_per_file: Chunks kept per file; the rest of a larger
+                file is not embedded
+        """
+        self.store = store
+        self.namespace = namespace
+        self.chunker = chunker or chunk_file
+        self.embed_batch_size = embed_batch_size or get_encode_batch_hint()
+        self.lexical_index = lexical_index
+        self.chunk_store = chunk_store
+        self.max_chunks_per_file = max_chunks_per_file
+        self.files_queue: queue.Queue = queue.Queue(queue_size)
+        self.chunks_queue: queue.Queue = queue.Queue(queue_size)
+        self.vectors_queue: queue.Queue = queue.Queue(max(2, queue_size // self.embed_batch_size))
+        self.stages = {
+            'read': StageStats('read'),
+            'chunk': StageStats('chunk', self.files_queue),
+            'embed': StageStats('embed', self.chunks_queue),
+            'upsert': StageStats('upsert', self.vectors_queue)
+        }
+        self.chunk_ids: Dict[str, List[str]] = {}
+        self.seconds = 0.0
+        self._start = 0.0
+        self._failed = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def _put(self, target: queue.Queue, item: Any, stats: StageStats) -> None:
+        while True:
+            try:
+                target.put(item, timeout=POLL_SECONDS)
+                stats.max_queue_depth = max(stats.max_queue_depth, target.qsize())
+                return
+            except queue.Full:
+                if self._failed.is_set():
+                    raise PipelineAborted()
+
+    def _get(self, source: queue.Queue) -> Any:
+        while True:
+            try:
+                return source.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if self._failed.is_set():
+                    raise PipelineAborted()
+
+    def _read(self, files: Iterable[Dict[str, Any]]) -> None:
+        stats, chunk_stats = self.stages['read'], self.stages['chunk']
+        iterator = iter(files)
+        while True:
+            start = time.perf_counter()
+            file_data = next(iterator, _DONE)
+            stats.busy_seconds += time.perf_counter() - start
+            if file_data is _DONE:
+                break
+            stats.items += 1
+            self._put(self.files_queue, file_data, chunk_stats)
+        self._put(self.files_queue, _DONE, chunk_stats)
+
+    def _chunk(self) -> None:
+        stats, embed_stats = self.stages['chunk'], self.stages['embed']
+        while True:
+            file_data = self._get(self.files_queue)
+            if file_data is _DONE:
+                break
+            start = time.perf_counter()
+            name = file_data['name']
+            chunks = self.chunker(name, file_data['content'])
+            if len(chunks) > self.max_chunks_per_file:
+                incr('chunks_capped_total', len(chunks) - self.max_chunks_per_file)
+                logger.info("Keeping %d of %d chunks of %s", self.max_chunks_per_file, len(chunks), name)
+                chunks = chunks[:self.max_chunks_per_file]
+            ids = [f"{name}_{i}" for i in range(len(chunks))]
+            metadata = [{'file_name': name, 'chunk_index': i} for i in range(len(chunks))]
+            if self.chunk_store is not None:
+                self.chunk_store.add(ids, chunks)
+            else:
+                for meta, chunk in zip(metadata, chunks):
+                    meta['text'] = chunk
+            if self.lexical_index is not None:
+                self.lexical_index.add(ids, chunks, metadata)
+            self.chunk_ids[name] = ids
+            seconds = time.perf_counter() - start
+            get_telemetry().observe('stage_seconds', seconds, stage='chunk')
+            stats.busy_seconds += seconds
+            stats.items += 1
+            for id_, meta, chunk in zip(ids, metadata, chunks):
+                self._put(self.chunks_queue, {'id': id_, 'metadata': meta, 'text': chunk}, embed_stats)
+        self._put(self.chunks_queue, _DONE, embed_stats)
+
+    def _embed(self) -> None:
+        stats, upsert_stats = self.stages['embed'], self.stages['upsert']
+        done = False
+        while not done:
+            batch = []
+            while len(batch) < self.embed_batch_size:
+                item = self._get(self.chunks_queue)
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+            if not batch:
+                continue
+            start = time.perf_counter()
+            embeddings = get_embeddings_batch([item.pop('text') for item in batch])
+            for item, embedding in zip(batch, embeddings):
+                item['values'] = embedding.tolist()
+            stats.busy_seconds += time.perf_counter() - start
+            stats.items += len(batch)
+            self._put(self.vectors_queue, batch, upsert_stats)
+        self._put(self.vectors_queue, _DONE, upsert_stats)
+
+    def _drain_vectors(self, stats: StageStats) -> Iterator[Dict[str, Any]]:
+        while True:
+            start = time.perf_counter()
+            batch = self._get(self.vectors_queue)
+            stats.busy_seconds -= time.perf_counter() - start
+            if batch is _DONE:
+                return
+            stats.items += len(batch)
+            yield from batch
+
+    def _upsert(self) -> None:
+        stats = self.stages['upsert']
+        start = time.perf_counter()
+        self.store.upsert(self._drain_vectors(stats), self.namespace)
+        stats.busy_seconds += time.perf_counter() - start
+        get_telemetry().record('upsert', stats.busy_seconds, vectors=stats.items, store=self.store.name)
+
+    def _run_stage(self, target: Callable[..., None], *args: Any) -> None:
+        try:
+            target(*args)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            self._errors.append(e)
+            self._failed.set()
+
+    def run(self, files: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Ingest files and block until every vector has been upserted.
+
+        Args:
+            files: File records with name and content, e.g. from read_files
+
+        Returns:
+            Pipeline stats (see ``stats``)
+        """
+        with span('ingest', store=self.store.name, namespace=self.namespace) as attrs:
+            self._run(files)
+            attrs.update(files=self.stages['chunk'].items, vectors=self.stages['upsert'].items)
+        return self.stats()
+
+    def _run(self, files: Iterable[Dict[str, Any]]) -> None:
+        start = self._start = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._run_stage, args=(self._read, files), name='ingest-read'),
+            threading.Thread(target=self._run_stage, args=(self._chunk,), name='ingest-chunk'),
+            threading.Thread(target=self._run_stage, args=(self._embed,), name='ingest-embed'),
+            threading.Thread(target=self._run_stage, args=(self._upsert,), name='ingest-upsert')
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.seconds = time.perf_counter() - start
+        if self._errors:
+            raise self._errors[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of per-stage counters and end-to-end throughput.
+
+        Safe to call from another thread while ``run`` is in progress.
+
+        Returns:
+            Dictionary with wall seconds, vectors, vectors_per_sec and stages
+        """
+        vectors = self.stages['upsert'].items
+        seconds = self.seconds or (time.perf_counter() - self._start if self._start else 0.0)
+        return {
+            'seconds': seconds,
+            'files': self.stages['chunk'].items,
+            'vectors': vectors,
+            'vectors_per_sec': vectors / seconds if seconds > 0 else 0.0,
+            'stages': {name: stage.as_dict() for name, stage in self.stages.items()}
+        }
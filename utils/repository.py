@@ -1,14 +1,47 @@
+import contextlib
+import logging
 import os
+import shutil
 import tempfile
-from git import Repo
-from typing import Dict, Any, List
-import streamlit as st
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+try:
+    import magic
+    _magic = magic.Magic(mime_encoding=True)
+except ImportError:  # libmagic is optional; fall back to a NUL-byte sniff
+    _magic = None
+
+from .clone_cache import get_clone_cache, get_repo_slug
+from .extraction import NOTEBOOK_MAX_FILE_SIZE, extract_content, is_generated_name
+from .telemetry import incr, span
+
+logger = logging.getLogger(__name__)
 
 # Constants
 SUPPORTED_EXTENSIONS = {'.py', '.js', '.tsx', '.jsx', '.ipynb', '.java', '.md',
                        '.cpp', '.ts', '.go', '.rs', '.vue', '.swift', '.c', '.h', '.md'}
 IGNORED_DIRS = {'node_modules', 'venv', 'env', 'dist', 'build', '.gitignore', '.git',
                 '__pycache__', '.next', '.vscode', 'vendor'}
+MAX_FILE_SIZE = 1024 * 1024
+READ_WORKERS = 8
+SNIFF_BYTES = 8192
+
+def is_indexable(rel_path: str) -> bool:
+    """Check whether a repository-relative path should be indexed.
+    
+    Args:
+        rel_path: Path relative to the repository root
+        
+    Returns:
+        True if the extension is supported, no path component is ignored
+        and the name is not a lockfile, bundle or generated source
+    """
+    parts = rel_path.replace(os.sep, '/').split('/')
+    return (os.path.splitext(parts[-1])[1] in SUPPORTED_EXTENSIONS
+            and not any(part in IGNORED_DIRS for part in parts[:-1])
+            and not is_generated_name(rel_path))
 
 def get_repo_name(repo_url: str) -> str:
     """Extract repository name from URL.
@@ -19,26 +52,134 @@ def get_repo_name(repo_url: str) -> str:
     Returns:
         Repository name
     """
-    return repo_url.split("/")[-1].lower()
+    return get_repo_slug(repo_url)[1]
 
-def get_file_content(file_path: str, repo_path: str) -> Dict[str, Any]:
-    """Get content of a single file.
+def get_repo_namespace(repo_url: str) -> str:
+    """Namespace of a repository in the shared index: ``owner/repo``.
+    
+    Args:
+        repo_url: GitHub repository URL
+        
+    Returns:
+        Lowercased owner and repository name joined by a slash
+    """
+    return '/'.join(get_repo_slug(repo_url))
+
+def is_binary(head: bytes) -> bool:
+    """Check whether the first bytes of a file look like binary data.
+    
+    Args:
+        head: Leading bytes of the file
+        
+    Returns:
+        True if the content is binary
+    """
+    if b'\0' in head:
+        return True
+    return _magic is not None and _magic.from_buffer(head) == 'binary'
+
+def get_file_content(file_path: str, repo_path: str, max_file_size: int = MAX_FILE_SIZE) -> Optional[Dict[str, Any]]:
+    """Get the indexable content of a single file.
+    
+    Binary files, files larger than ``max_file_size`` (notebooks: up to
+    ``NOTEBOOK_MAX_FILE_SIZE``, since outputs dominate their size) and
+    generated, minified or encoded files are skipped. Notebooks are
+    reduced to their code and markdown cells.
     
     Args:
         file_path: Path to the file
         repo_path: Root path of the repository
+        max_file_size: Largest file size in bytes that is read
         
     Returns:
-        Dictionary containing file name and content
+        Dictionary containing file name and content, or None if skipped
     """
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        return {"name": os.path.relpath(file_path, repo_path), "content": content}
+        name = os.path.relpath(file_path, repo_path)
+        limit = max(max_file_size, NOTEBOOK_MAX_FILE_SIZE) if file_path.endswith('.ipynb') else max_file_size
+        if os.path.getsize(file_path) > limit:
+            incr('files_skipped_total', reason='too-large')
+            return None
+        with open(file_path, "rb") as f:
+            data = f.read()
+        if is_binary(data[:SNIFF_BYTES]):
+            incr('files_skipped_total', reason='binary')
+            return None
+        incr('files_read_total')
+        incr('bytes_read_total', len(data))
+        content, reason = extract_content(name, data.decode("utf-8"))
+        if content is None:
+            incr('files_skipped_total', reason=reason)
+            logger.debug("Skipping %s: %s", name, reason)
+            return None
+        return {"name": name, "content": content}
     except Exception as e:
-        st.error(f"File processing error: {str(e)}")
+        incr('file_errors_total')
+        logger.warning("File processing error: %s", e)
         return None
 
+def iter_repository_files(repo_path: str) -> Iterator[str]:
+    """Walk a repository and yield paths of indexable files.
+    
+    Ignored directories are pruned in place so the walk never descends
+    into them.
+    
+    Args:
+        repo_path: Path to the repository
+        
+    Yields:
+        Absolute paths of files with a supported extension and a name
+        that does not mark them as generated
+    """
+    for root, dirnames, files in os.walk(repo_path):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+        for file in files:
+            if os.path.splitext(file)[1] in SUPPORTED_EXTENSIONS and not is_generated_name(file):
+                yield os.path.join(root, file)
+
+def read_files(file_paths: Iterable[str], repo_path: str, max_workers: int = READ_WORKERS,
+               max_file_size: int = MAX_FILE_SIZE) -> Iterator[Dict[str, Any]]:
+    """Read files through a thread pool, yielding records as they complete.
+    
+    At most ``2 * max_workers`` reads are in flight, so memory stays
+    bounded no matter how many paths are supplied.
+    
+    Args:
+        file_paths: Paths of the files to read
+        repo_path: Root path of the repository
+        max_workers: Number of reader threads
+        max_file_size: Largest file size in bytes that is read
+        
+    Yields:
+        Dictionaries containing file name and content
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for file_path in file_paths:
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.result():
+                        yield future.result()
+            pending.add(executor.submit(get_file_content, file_path, repo_path, max_file_size))
+        for future in as_completed(pending):
+            if future.result():
+                yield future.result()
+
+def iter_files_content(repo_path: str, max_workers: int = READ_WORKERS,
+                       max_file_size: int = MAX_FILE_SIZE) -> Iterator[Dict[str, Any]]:
+    """Stream the contents of all supported code files in a repository.
+    
+    Args:
+        repo_path: Path to the repository
+        max_workers: Number of reader threads
+        max_file_size: Largest file size in bytes that is read
+        
+    Yields:
+        Dictionaries containing file names and contents
+    """
+    yield from read_files(iter_repository_files(repo_path), repo_path, max_workers, max_file_size)
+
 def get_main_files_content(repo_path: str) -> List[Dict[str, Any]]:
     """Get content of all supported code files from repository.
     
@@ -48,36 +189,64 @@ def get_main_files_content(repo_path: str) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries containing file names and contents
     """
-    files_content = []
     try:
-        for root, _, files in os.walk(repo_path):
-            if any(ignored_dir in root for ignored_dir in IGNORED_DIRS):
-                continue
-            for file in files:
-                if os.path.splitext(file)[1] in SUPPORTED_EXTENSIONS:
-                    file_content = get_file_content(os.path.join(root, file), repo_path)
-                    if file_content:
-                        files_content.append(file_content)
+        with span('walk', repo_path=repo_path) as attrs:
+            files = list(iter_files_content(repo_path))
+            attrs['files'] = len(files)
+        return files
     except Exception as e:
-        st.error(f"Repository walk error: {str(e)}")
-    return files_content
+        logger.error("Repository walk error: %s", e)
+        return []
 
-def clone_repository(repo_url: str) -> str:
-    """Clone a GitHub repository.
+@contextlib.contextmanager
+def checkout_repository(repo_url: str) -> Iterator[Optional[str]]:
+    """Clone a GitHub repository, or update its cached checkout, for the ``with`` block.
+    
+    Checkouts are shallow, blobless and single-branch, kept under
+    ``~/.codebase_rag/clones/<owner>/<repo>`` and refreshed with a
+    depth-limited fetch on every call. The checkout is leased until the
+    block exits, so the clone cache does not evict it while it is read.
+    
+    Args:
+        repo_url: URL of the GitHub repository
+        
+    Yields:
+        Path to the cloned repository, or None if cloning failed
+    """
+    with contextlib.ExitStack() as stack:
+        try:
+            with span('clone', repo_url=repo_url) as attrs:
+                repo_path, cloned = stack.enter_context(get_clone_cache().checkout(repo_url))
+                attrs['cloned'] = cloned
+            logger.info("Repository %s %s", get_repo_name(repo_url), 'cloned' if cloned else 'updated')
+        except Exception as e:
+            logger.error("Repository cloning error: %s", e)
+            repo_path = None
+        yield repo_path
+
+def clone_repository(repo_url: str) -> Optional[str]:
+    """Clone a GitHub repository into a directory owned by the caller.
+    
+    Deprecated: use ``checkout_repository``, which reads the cached
+    checkout in place. The cached checkout can be evicted once its lease
+    ends, so this copies it into a new temporary directory that the
+    caller must remove.
     
     Args:
         repo_url: URL of the GitHub repository
         
     Returns:
-        Path to the cloned repository
+        Path to the copy of the repository, or None if cloning failed
     """
-    try:
-        repo_name = get_repo_name(repo_url)
-        repo_path = os.path.join(tempfile.gettempdir(), repo_name)
-        if not os.path.exists(repo_path):
-            Repo.clone_from(repo_url, repo_path)
-            st.success(f"Repository {repo_name} cloned successfully!")
-        return repo_path
-    except Exception as e:
-        st.error(f"Repository cloning error: {str(e)}")
-        return None 
\ No newline at end of file
+    warnings.warn("clone_repository is deprecated; use checkout_repository", DeprecationWarning, stacklevel=2)
+    with checkout_repository(repo_url) as repo_path:
+        if not repo_path:
+            return None
+        copy_path = tempfile.mkdtemp(prefix=f"{get_repo_name(repo_url)}-")
+        try:
+            shutil.copytree(repo_path, copy_path, symlinks=True, dirs_exist_ok=True)
+        except OSError as e:
+            logger.error("Repository copy error: %s", e)
+            shutil.rmtree(copy_path, ignore_errors=True)
+            return None
+        return copy_path
@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .telemetry import incr, span
+
+# Constants
+RERANK_MODEL_NAME = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+RERANK_CANDIDATES = 50
+RERANK_TOP_K = 8
+RERANK_BATCH_SIZE = 16
+RERANK_MAX_LENGTH = 512
+RERANK_LATENCY_BUDGET_MS = float(os.environ.get('CODEBASE_RAG_RERANK_BUDGET_MS', '250'))
+COST_SMOOTHING = 0.2
+
+_rerankers: Dict[str, Any] = {}
+_rerankers_lock = threading.Lock()
+_pair_seconds: Dict[str, float] = {}
+
+def get_reranker(model_name: str = RERANK_MODEL_NAME) -> Any:
+    """Return the process-wide cross-encoder for a model name, loading it once.
+
+    Args:
+        model_name: Name or path of the CrossEncoder model
+
+    Returns:
+        Loaded CrossEncoder model
+    """
+    model = _rerankers.get(model_name)
+    if model is None:
+        with _rerankers_lock:
+            model = _rerankers.get(model_name)
+            if model is None:
+                from sentence_transformers import CrossEncoder
+                model = CrossEncoder(model_name, max_length=RERANK_MAX_LENGTH, device='cpu')
+                _rerankers[model_name] = model
+    return model
+
+def set_reranker(model: Any, model_name: str = RERANK_MODEL_NAME) -> None:
+    """Install a preloaded re-ranker under a name, e.g. an offline stand-in.
+
+    Any object with CrossEncoder's ``predict`` works. The learned per-pair
+    cost of that name is reset.
+
+    Args:
+        model: Model to serve for ``model_name``
+        model_name: Name callers look the model up by
+    """
+    with _rerankers_lock:
+        _rerankers[model_name] = model
+        _pair_seconds.pop(model_name, None)
+
+def rerank_matches(question: str, matches: List[Dict[str, Any]], top_k: int = RERANK_TOP_K,
+                   budget_ms: Optional[float] = RERANK_LATENCY_BUDGET_MS, batch_size: int = RERANK_BATCH_SIZE,
+                   model_name: str = RERANK_MODEL_NAME) -> List[Dict[str, Any]]:
+    """Re-score retrieved chunks with a cross-encoder and keep the best.
+
+    Candidates are scored in batches in their retrieval order. Before
+    each batch after the first, its cost is predicted from a running
+    average of seconds per pair; when it would overrun ``budget_ms`` the
+    remaining (lower-ranked) candidates are dropped. Scoring time is
+    therefore bounded by the budget plus at most one batch.
+
+    Args:
+        question: Query text
+        matches: Retrieved matches with text, best first
+        top_k: Number of matches to keep
+        budget_ms: Latency budget for scoring, or None for no limit
+        batch_size: Pairs scored per model call
+        model_name: Name or path of the CrossEncoder model
+
+    Returns:
+        Up to top_k matches ordered by cross-encoder score, which replaces
+        ``score``; the retrieval score is kept as ``retrieval_score``
+    """
+    if not matches:
+        return []
+    with span('rerank', candidates=len(matches), top_k=top_k) as attrs:
+        model = get_reranker(model_name)
+        start = time.perf_counter()
+        deadline = start + budget_ms / 1000 if budget_ms is not None else None
+        scored = []
+        for i in range(0, len(matches), batch_size):
+            batch = matches[i:i + batch_size]
+            pair_seconds = _pair_seconds.get(model_name)
+            if scored and deadline is not None and pair_seconds is not None and \
+                    time.perf_counter() + pair_seconds * len(batch) > deadline:
+                incr('rerank_truncated_total')
+                break
+            batch_start = time.perf_counter()
+            scores = model.predict([(question, match['metadata']['text']) for match in batch], batch_size=batch_size)
+            cost = (time.perf_counter() - batch_start) / len(batch)
+            _pair_seconds[model_name] = cost if pair_seconds is None else \
+                (1 - COST_SMOOTHING) * pair_seconds + COST_SMOOTHING * cost
+            scored.extend(zip(scores, batch))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        attrs.update(scored=len(scored), kept=min(top_k, len(scored)))
+        return [dict(match, score=float(score), retrieval_score=match['score']) for score, match in scored[:top_k]]
@@ -0,0 +1,139 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from .chunk_store import get_chunk_store, hydrate_matches
+from .embeddings import embed_query
+from .lexical import LexicalIndex, get_lexical_index
+from .telemetry import span
+from .vector_store import VectorStore, query_store
+
+# Constants
+RRF_K = 60
+DENSE_TOP_K = 10
+LEXICAL_TOP_K = 20
+FANOUT_WORKERS = int(os.environ.get('CODEBASE_RAG_FANOUT_WORKERS', '32'))
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='retrieval')
+_fanout_executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='fanout')
+
+def reciprocal_rank_fusion(result_lists: Sequence[List[Dict[str, Any]]], top_k: int,
+                           k: int = RRF_K) -> List[Dict[str, Any]]:
+    """Fuse ranked match lists with reciprocal rank fusion.
+
+    Each match scores ``sum(1 / (k + rank))`` over the lists it appears
+    in; metadata is taken from the first list that contains it. Matches
+    are identified by namespace (if set) and id.
+
+    Args:
+        result_lists: Ranked match lists (best first)
+        top_k: Number of fused matches to return
+        k: RRF damping constant
+
+    Returns:
+        Fused matches with the RRF score, best first
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for matches in result_lists:
+        for rank, match in enumerate(matches, start=1):
+            entry = fused.setdefault((match.get('namespace'), match['id']), dict(match, score=0.0))
+            entry['score'] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda m: m['score'], reverse=True)[:top_k]
+
+def hybrid_query(question: str, store: VectorStore, namespace: str, lexical_index: Optional[LexicalIndex],
+                 top_k: int, dense_top_k: int = DENSE_TOP_K,
+                 lexical_top_k: int = LEXICAL_TOP_K) -> List[Dict[str, Any]]:
+    """Query the vector store and the lexical index in parallel and fuse.
+
+    Chunk texts are fetched from the chunk store for the fused matches only.
+
+    Args:
+        question: Query text
+        store: Vector store backend
+        namespace: Namespace to search in
+        lexical_index: BM25 index of the namespace, or None for dense only
+        top_k: Number of fused matches to return
+        dense_top_k: Matches requested from the vector store
+        lexical_top_k: Matches requested from the lexical index
+
+    Returns:
+        Fused matches, best first
+    """
+    if lexical_index is None or lexical_index.size == 0:
+        return query_store(question, store, namespace, top_k=max(top_k, dense_top_k))
+    with span('retrieve', top_k=top_k) as attrs:
+        dense = _executor.submit(query_store, question, store, namespace, dense_top_k, hydrate=False)
+        try:
+            with span('lexical_query'):
+                lexical = lexical_index.query(question, lexical_top_k)
+        except Exception as e:
+            logger.error("Lexical query error: %s", e)
+            lexical = []
+        matches = reciprocal_rank_fusion([dense.result(), lexical], top_k)
+        matches = hydrate_matches(matches, get_chunk_store(store.name, namespace))
+        attrs['matches'] = len(matches)
+        return matches
+
+def _search_namespace(store: VectorStore, namespace: str, vector: Any, dense_top_k: int, question: str,
+                      lexical_top_k: int) -> List[List[Dict[str, Any]]]:
+    """Dense and lexical matches of one namespace, each tagged with the namespace."""
+    results = []
+    try:
+        results.append(store.query(vector, dense_top_k, namespace))
+    except Exception as e:
+        logger.error("Vector store query error in %s: %s", namespace, e)
+        results.append([])
+    lexical_index = get_lexical_index(store.name, namespace)
+    try:
+        results.append(lexical_index.query(question, lexical_top_k) if lexical_index.size else [])
+    except Exception as e:
+        logger.error("Lexical query error in %s: %s", namespace, e)
+        results.append([])
+    return [[dict(match, namespace=namespace) for match in matches] for matches in results]
+
+def fanout_query(question: str, store: VectorStore, namespaces: Sequence[str], top_k: int,
+                 dense_top_k: int = DENSE_TOP_K, lexical_top_k: int = LEXICAL_TOP_K) -> List[Dict[str, Any]]:
+    """Search many namespaces of one store concurrently and merge the results.
+
+    The question is embedded once. Every namespace is queried for dense and
+    lexical matches on a shared pool of ``FANOUT_WORKERS`` threads; dense
+    matches of all namespaces are ranked together by cosine similarity,
+    lexical matches by BM25 score, and the two global rankings are fused
+    with reciprocal rank fusion. A namespace that fails to answer is
+    logged and skipped.
+
+    Args:
+        question: Query text
+        store: Vector store holding the namespaces
+        namespaces: Namespaces to search, e.g. one per repository
+        top_k: Number of fused matches to return
+        dense_top_k: Dense matches requested per namespace
+        lexical_top_k: Lexical matches requested per namespace
+
+    Returns:
+        Fused matches, best first; each carries the ``namespace`` it came from
+    """
+    with span('fanout', store=store.name, namespaces=len(namespaces), top_k=top_k) as attrs:
+        vector = embed_query(question)
+        futures = [_fanout_executor.submit(_search_namespace, store, namespace, vector, dense_top_k, question,
+                                           lexical_top_k) for namespace in dict.fromkeys(namespaces)]
+        dense, lexical = [], []
+        for future in futures:
+            namespace_dense, namespace_lexical = future.result()
+            dense.extend(namespace_dense)
+            lexical.extend(namespace_lexical)
+        dense.sort(key=lambda m: m['score'], reverse=True)
+        lexical.sort(key=lambda m: m['score'], reverse=True)
+        fused = reciprocal_rank_fusion([dense, lexical], top_k)
+        by_namespace: Dict[str, List[Dict[str, Any]]] = {}
+        for match in fused:
+            by_namespace.setdefault(match['namespace'], []).append(match)
+        hydrated = {(match['namespace'], match['id']): match
+                    for namespace, matches in by_namespace.items()
+                    for match in hydrate_matches(matches, get_chunk_store(store.name, namespace))}
+        matches = [hydrated[key] for key in ((m['namespace'], m['id']) for m in fused) if key in hydrated]
+        attrs.update(matches=len(matches), repositories=len({m['namespace'] for m in matches}))
+        return matches
@@ -0,0 +1,227 @@
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Constants
+TRACE_FILE = os.environ.get('CODEBASE_RAG_TRACE_FILE')
+METRIC_PREFIX = 'codebase_rag_'
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+                   300.0)
+RECENT_SAMPLES = 1024
+RECENT_SPANS = 200
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+class Histogram:
+    """Cumulative bucket counts plus a window of recent samples for percentiles."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent: deque = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def percentile(self, q: float) -> float:
+        """Percentile (0-100) of the recent samples."""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+class Telemetry:
+    """Process-wide spans, counters and histograms.
+
+    ``span`` times a block, records it in the ``stage_seconds`` histogram
+    under its name, counts failures in ``errors_total`` and, when a trace
+    file is set, appends the span as one JSON line. Nested spans on the
+    same thread record their parent. Metrics can be exported as a
+    snapshot dict (``snapshot``) or Prometheus text (``prometheus``).
+    """
+
+    def __init__(self, trace_file: Optional[str] = TRACE_FILE):
+        """Create an empty registry.
+
+        Args:
+            trace_file: JSONL file spans are appended to, or None to disable tracing
+        """
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.counters: Dict[Tuple[str, LabelKey], float] = {}
+        self.histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self.recent_spans: deque = deque(maxlen=RECENT_SPANS)
+        self._trace = None
+        self.set_trace_file(trace_file)
+
+    def set_trace_file(self, path: Optional[str]) -> None:
+        """Start appending spans to a JSONL file (None stops tracing)."""
+        with self._lock:
+            if self._trace is not None:
+                self._trace.close()
+            self._trace = None
+            if path:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._trace = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add to a counter."""
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record a histogram sample (seconds for latency histograms)."""
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block as a pipeline stage.
+
+        Args:
+            name: Stage name, e.g. 'clone', 'embed', 'query'
+            **attrs: Attributes written with the span
+
+        Yields:
+            The attribute dict, so the block can add results (counts, sizes)
+        """
+        stack: List[str] = self._local.__dict__.setdefault('stack', [])
+        span_id = uuid.uuid4().hex[:16]
+        parent = stack[-1] if stack else None
+        stack.append(span_id)
+        start = time.perf_counter()
+        error = None
+        try:
+            yield attrs
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            self._record(name, time.perf_counter() - start, error, attrs, span_id, parent)
+
+    def record(self, name: str, seconds: float, error: Optional[str] = None, **attrs: Any) -> None:
+        """Record a stage that was timed by the caller, e.g. a streamed generation.
+
+        Args:
+            name: Stage name
+            seconds: Duration of the stage
+            error: Error description if the stage failed
+            **attrs: Attributes written with the span
+        """
+        stack = self._local.__dict__.get('stack')
+        self._record(name, seconds, error, attrs, uuid.uuid4().hex[:16], stack[-1] if stack else None)
+
+    def _record(self, name: str, seconds: float, error: Optional[str], attrs: Dict[str, Any],
+                span_id: str, parent: Optional[str]) -> None:
+        self.observe('stage_seconds', seconds, stage=name)
+        if error is not None:
+            self.incr('errors_total', stage=name)
+        record = {'name': name, 'span_id': span_id, 'parent_id': parent, 'start': time.time() - seconds,
+                  'duration_ms': round(seconds * 1000, 3), 'status': 'error' if error else 'ok',
+                  'thread': threading.current_thread().name, 'attrs': attrs}
+        if error is not None:
+            record['error'] = error
+        with self._lock:
+            self.recent_spans.append(record)
+            if self._trace is not None:
+                self._trace.write(json.dumps(record, default=str) + '\n')
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-stage latency summary, counters and recent spans for display."""
+        with self._lock:
+            stages = {}
+            histograms = {}
+            for (name, labels), histogram in self.histograms.items():
+                summary = {
+                    'count': histogram.count,
+                    'total_s': round(histogram.sum, 3),
+                    'p50_ms': round(histogram.percentile(50) * 1000, 2),
+                    'p95_ms': round(histogram.percentile(95) * 1000, 2),
+                    'p99_ms': round(histogram.percentile(99) * 1000, 2)
+                }
+                if name == 'stage_seconds':
+                    stages[dict(labels)['stage']] = summary
+                else:
+                    histograms[_format_key(name, labels)] = summary
+            counters = {_format_key(name, labels): value for (name, labels), value in self.counters.items()}
+            return {'stages': stages, 'histograms': histograms, 'counters': counters,
+                    'recent_spans': list(self.recent_spans)[-20:]}
+
+    def prometheus(self) -> str:
+        """Render all counters and histograms in the Prometheus text format."""
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted({name for name, _ in self.counters}):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} counter")
+                for (key_name, labels), value in sorted(self.counters.items()):
+                    if key_name == name:
+                        lines.append(f"{metric}{_format_labels(labels)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} histogram")
+                for (key_name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if key_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f"{metric}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        """Clear all metrics and recent spans."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.recent_spans.clear()
+
+def _format_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+def _format_key(name: str, labels: LabelKey) -> str:
+    return name + _format_labels(labels)
+
+_telemetry = Telemetry()
+
+def get_telemetry() -> Telemetry:
+    """Return the process-wide telemetry registry."""
+    return _telemetry
+
+def span(name: str, **attrs: Any):
+    """Time a block as a stage of the process-wide registry (see ``Telemetry.span``)."""
+    return _telemetry.span(name, **attrs)
+
+def incr(name: str, value: float = 1, **labels: Any) -> None:
+    """Add to a counter of the process-wide registry."""
+    _telemetry.incr(name, value, **labels)
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    """Record a histogram sample in the process-wide registry."""
+    _telemetry.observe(name, value, **labels)
@@ -1,13 +1,40 @@
-from typing import List, Dict, Any
-import streamlit as st
-import pinecone
-from pinecone import ServerlessSpec
-from .embeddings import get_embeddings
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Iterator, Optional, Protocol, Sequence
+from .chunk_store import get_chunk_store, hydrate_matches
+from .chunking import CHUNK_SIZE, CHUNK_OVERLAP
+from .config import DATA_DIR
+from .embeddings import embed_query, EMBEDDING_DIMENSION
+from .lexical import get_lexical_index
+from .local_store import LocalVectorStore
+from .pipeline import IngestionPipeline
+from .telemetry import get_telemetry, incr, span
 # Constants
-CHUNK_SIZE = 1000
-CHUNK_OVERLAP = 200
+UPSERT_BATCH_SIZE = 100
+UPSERT_MAX_BATCH_BYTES = 1024 * 1024
+UPSERT_WORKERS = 4
+UPSERT_MAX_RETRIES = 3
+UPSERT_BACKOFF_SECONDS = 0.5
+PINECONE_DELETE_BATCH_SIZE = 1000
+VECTOR_BACKENDS = ('pinecone', 'local')
+INDEX_NAME = os.environ.get('CODEBASE_RAG_INDEX_NAME', 'codebase-rag')
+LOCAL_QUANTIZATION = os.environ.get('CODEBASE_RAG_LOCAL_QUANTIZATION', 'float32')
+LOCAL_PCA_DIMENSION = int(os.environ.get('CODEBASE_RAG_LOCAL_PCA_DIM', '0')) or None
 
-def initialize_pinecone(api_key: str) -> pinecone.Pinecone:
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    import pinecone
+
+_stores: Dict[tuple, tuple] = {}
+_stores_lock = threading.Lock()
+
+def initialize_pinecone(api_key: str) -> 'pinecone.Pinecone':
     """Initialize Pinecone client.
     
     Args:
@@ -16,49 +43,252 @@ def initialize_pinecone(api_key: str) -> pinecone.Pinecone:
     Returns:
         Initialized Pinecone client
     """
+    import pinecone
     return pinecone.Pinecone(api_key=api_key)
 
-def store_in_pinecone(files_content: List[Dict[str, Any]], index_name: str, namespace: str, pc: pinecone.Pinecone) -> bool:
-    """Store file chunks in Pinecone.
+def iter_upsert_batches(vectors: Iterable[Dict[str, Any]], batch_size: int = UPSERT_BATCH_SIZE,
+                        max_batch_bytes: int = UPSERT_MAX_BATCH_BYTES) -> Iterator[List[Dict[str, Any]]]:
+    """Group vectors into upsert batches bounded by count and metadata size.
     
     Args:
-        files_content: List of file contents to store
-        index_name: Name of the Pinecone index
+        vectors: Vector records with id, values and metadata
+        batch_size: Maximum number of vectors per batch
+        max_batch_bytes: Maximum serialized id and metadata bytes per batch
+        
+    Yields:
+        Lists of vector records ready for a single upsert call
+    """
+    batch, batch_bytes = [], 0
+    for vector in vectors:
+        size = len(vector['id']) + len(json.dumps(vector.get('metadata', {})))
+        if batch and (len(batch) >= batch_size or batch_bytes + size > max_batch_bytes):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(vector)
+        batch_bytes += size
+    if batch:
+        yield batch
+
+def _upsert_with_retry(index: Any, batch: List[Dict[str, Any]], namespace: str, max_retries: int) -> int:
+    """Upsert one batch, retrying with jittered exponential backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            start = time.perf_counter()
+            index.upsert(vectors=batch, namespace=namespace)
+            get_telemetry().observe('upsert_batch_seconds', time.perf_counter() - start)
+            return len(batch)
+        except Exception:
+            incr('upsert_retries_total')
+            if attempt == max_retries:
+                raise
+            time.sleep(UPSERT_BACKOFF_SECONDS * 2 ** attempt * (1 + random.random()))
+    return 0
+
+def upsert_vectors(index: Any, vectors: Iterable[Dict[str, Any]], namespace: str,
+                   batch_size: int = UPSERT_BATCH_SIZE, max_batch_bytes: int = UPSERT_MAX_BATCH_BYTES,
+                   max_workers: int = UPSERT_WORKERS, max_retries: int = UPSERT_MAX_RETRIES) -> Dict[str, float]:
+    """Upsert vectors in concurrent batches through a bounded worker pool.
+    
+    Batches are submitted as soon as they fill, so the producer of
+    ``vectors`` (usually the embedding loop) keeps running while earlier
+    batches are in flight. At most ``2 * max_workers`` batches are queued.
+    
+    Args:
+        index: Index handle exposing ``upsert(vectors=..., namespace=...)``
+        vectors: Vector records with id, values and metadata
         namespace: Namespace for the vectors
-        pc: Pinecone client
+        batch_size: Maximum number of vectors per batch
+        max_batch_bytes: Maximum serialized id and metadata bytes per batch
+        max_workers: Number of concurrent upsert requests
+        max_retries: Retries per batch before giving up
         
     Returns:
-        Success status
+        Throughput stats: vectors, batches, seconds and vectors_per_sec
     """
-    try:
-        if index_name not in [index.name for index in pc.list_indexes()]:
-            pc.create_index(
-                name=index_name,
+    start = time.perf_counter()
+    upserted, batches = 0, 0
+    pending = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch in iter_upsert_batches(vectors, batch_size, max_batch_bytes):
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                upserted += sum(future.result() for future in done)
+            pending.add(executor.submit(_upsert_with_retry, index, batch, namespace, max_retries))
+            batches += 1
+        upserted += sum(future.result() for future in pending)
+    seconds = time.perf_counter() - start
+    return {
+        'vectors': upserted,
+        'batches': batches,
+        'seconds': seconds,
+        'vectors_per_sec': upserted / seconds if seconds > 0 else 0.0
+    }
+
+class VectorStore(Protocol):
+    """Interface shared by the Pinecone and local vector store backends.
+    
+    Matches are plain dictionaries with ``id``, ``score`` and ``metadata``.
+    """
+    name: str
+
+    def upsert(self, vectors: Iterable[Dict[str, Any]], namespace: str) -> Dict[str, float]:
+        ...
+
+    def query(self, vector: Sequence[float], top_k: int, namespace: str) -> List[Dict[str, Any]]:
+        ...
+
+    def delete(self, ids: Sequence[str], namespace: str) -> None:
+        ...
+
+class PineconeVectorStore:
+    """VectorStore adapter for a Pinecone serverless index."""
+
+    def __init__(self, pc: 'pinecone.Pinecone', index_name: str, dimension: int = EMBEDDING_DIMENSION):
+        """Wrap a Pinecone index.
+        
+        Args:
+            pc: Pinecone client
+            index_name: Name of the Pinecone index
+            dimension: Embedding dimension used when creating the index
+        """
+        self.pc = pc
+        self.index_name = index_name
+        self.dimension = dimension
+        self.name = f"pinecone:{index_name}"
+        self._index = None
+        self._index_ready = False
+
+    def ensure_index(self) -> None:
+        """Create the serverless index if it does not exist yet."""
+        if self._index_ready:
+            return
+        if self.index_name not in [index.name for index in self.pc.list_indexes()]:
+            from pinecone import ServerlessSpec
+            self.pc.create_index(
+                name=self.index_name,
                 spec=ServerlessSpec(cloud='aws',region='us-east-1'),
-                dimension=768,
+                dimension=self.dimension,
                 metric="cosine"
             )
+        self._index_ready = True
+
+    @property
+    def index(self) -> Any:
+        if self._index is None:
+            self._index = self.pc.Index(self.index_name)
+        return self._index
+
+    def upsert(self, vectors: Iterable[Dict[str, Any]], namespace: str) -> Dict[str, float]:
+        self.ensure_index()
+        return upsert_vectors(self.index, vectors, namespace)
+
+    def query(self, vector: Sequence[float], top_k: int, namespace: str) -> List[Dict[str, Any]]:
+        results = self.index.query(
+            vector=list(map(float, vector)),
+            top_k=top_k,
+            include_metadata=True,
+            namespace=namespace
+        )
+        return [{'id': match.id, 'score': match.score, 'metadata': dict(match.metadata or {})}
+                for match in results.matches]
+
+    def delete(self, ids: Sequence[str], namespace: str) -> None:
+        ids = list(ids)
+        for i in range(0, len(ids), PINECONE_DELETE_BATCH_SIZE):
+            self.index.delete(ids=ids[i:i+PINECONE_DELETE_BATCH_SIZE], namespace=namespace)
+
+def create_vector_store(backend: str, index_name: str, pc: Optional['pinecone.Pinecone'] = None) -> VectorStore:
+    """Return the vector store for a backend and index, creating it once.
+    
+    Stores are cached per process so index handles and loaded local
+    namespaces are reused across queries. Local stores use the
+    ``CODEBASE_RAG_LOCAL_QUANTIZATION`` and ``CODEBASE_RAG_LOCAL_PCA_DIM``
+    compact code settings.
+    
+    Args:
+        backend: One of VECTOR_BACKENDS
+        index_name: Name of the index (a directory for the local backend)
+        pc: Pinecone client, required for the pinecone backend
+        
+    Returns:
+        Vector store instance
+    """
+    key = (backend, index_name, id(pc))
+    with _stores_lock:
+        if key not in _stores:
+            if backend == 'local':
+                store = LocalVectorStore(os.path.join(DATA_DIR, 'vectors', index_name), dimension=EMBEDDING_DIMENSION,
+                                         quantization=LOCAL_QUANTIZATION, pca_dimension=LOCAL_PCA_DIMENSION)
+            elif backend == 'pinecone':
+                store = PineconeVectorStore(pc, index_name)
+            else:
+                raise ValueError(f"Unknown vector store backend: {backend}")
+            _stores[key] = (pc, store)
+        return _stores[key][1]
+
+def store_chunks(files_content: Iterable[Dict[str, Any]], store: VectorStore, namespace: str) -> bool:
+    """Chunk, embed and store files in a vector store.
+    
+    Args:
+        files_content: File contents to store
+        store: Vector store backend
+        namespace: Namespace for the vectors
         
-        index = pc.Index(index_name)
-        for file_data in files_content:
-            chunks = [file_data['content'][i:i+CHUNK_SIZE] 
-                     for i in range(0, len(file_data['content']), CHUNK_SIZE-CHUNK_OVERLAP)]
-            for i, chunk in enumerate(chunks):
-                embedding = get_embeddings(chunk)
-                index.upsert(
-                    vectors=[{
-                        'id': f"{file_data['name']}_{i}",
-                        'values': embedding,
-                        'metadata': {'file_name': file_data['name'], 'chunk_index': i, 'text': chunk}
-                    }],
-                    namespace=namespace
-                )
+    Returns:
+        Success status
+    """
+    try:
+        lexical_index = get_lexical_index(store.name, namespace)
+        chunk_store = get_chunk_store(store.name, namespace)
+        stats = IngestionPipeline(store, namespace, lexical_index=lexical_index,
+                                  chunk_store=chunk_store).run(files_content)
+        lexical_index.save()
+        chunk_store.save()
+        logger.info("Upserted %d vectors (%.0f vectors/sec)", stats['vectors'], stats['vectors_per_sec'])
         return True
     except Exception as e:
-        st.error(f"Pinecone storage error: {str(e)}")
+        logger.error("Vector store error: %s", e)
         return False
 
-def query_pinecone(question: str, index_name: str, namespace: str, pc: pinecone.Pinecone) -> List[Dict[str, Any]]:
+def query_store(question: str, store: VectorStore, namespace: str, top_k: int = 10,
+                hydrate: bool = True) -> List[Dict[str, Any]]:
+    """Query a vector store for relevant chunks.
+    
+    Args:
+        question: Query text
+        store: Vector store backend
+        namespace: Namespace to search in
+        top_k: Number of chunks to return
+        hydrate: Fetch chunk texts from the namespace's chunk store
+        
+    Returns:
+        List of relevant chunks with metadata
+    """
+    try:
+        vector = embed_query(question)
+        with span('query', store=store.name, top_k=top_k) as attrs:
+            matches = store.query(vector, top_k, namespace)
+            attrs['matches'] = len(matches)
+        return hydrate_matches(matches, get_chunk_store(store.name, namespace)) if hydrate else matches
+    except Exception as e:
+        logger.error("Vector store query error: %s", e)
+        return []
+
+def store_in_pinecone(files_content: List[Dict[str, Any]], index_name: str, namespace: str, pc: 'pinecone.Pinecone') -> bool:
+    """Store file chunks in Pinecone.
+    
+    Args:
+        files_content: List of file contents to store
+        index_name: Name of the Pinecone index
+        namespace: Namespace for the vectors
+        pc: Pinecone client
+        
+    Returns:
+        Success status
+    """
+    return store_chunks(files_content, create_vector_store('pinecone', index_name, pc), namespace)
+
+def query_pinecone(question: str, index_name: str, namespace: str, pc: 'pinecone.Pinecone') -> List[Dict[str, Any]]:
     """Query Pinecone for relevant chunks.
     
     Args:
@@ -70,16 +300,4 @@ def query_pinecone(question: str, index_name: str, namespace: str, pc: pinecone.
     Returns:
         List of relevant chunks with metadata
     """
-    try:
-        question_embedding = get_embeddings(question)
-        index = pc.Index(index_name)
-        results = index.query(
-            vector=question_embedding,
-            top_k=10,
-            include_metadata=True,
-            namespace=namespace
-        )
-        return results.matches
-    except Exception as e:
-        st.error(f"Pinecone query error: {str(e)}")
-        return [] 
\ No newline at end of file
+    return query_store(question, create_vector_store('pinecone', index_name, pc), namespace)
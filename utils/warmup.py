@@ -0,0 +1,57 @@
+import importlib
+import logging
+import os
+import threading
+from typing import Optional
+
+from .telemetry import span
+
+# Constants
+WARMUP_ENABLED = os.environ.get('CODEBASE_RAG_WARMUP', '').lower() in ('1', 'true', 'yes')
+WARMUP_RERANKER = os.environ.get('CODEBASE_RAG_WARMUP_RERANKER', '').lower() in ('1', 'true', 'yes')
+WARMUP_MODULES = ('pinecone', 'google.generativeai', 'git')
+WARMUP_TEXT = 'def warm_up(): return None'
+
+logger = logging.getLogger(__name__)
+
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+
+def _warm_up(reranker: bool) -> None:
+    with span('warmup', reranker=reranker):
+        for name in WARMUP_MODULES:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                logger.warning("Warm-up could not import %s: %s", name, e)
+        try:
+            from .embeddings import get_model
+            get_model().encode([WARMUP_TEXT])
+            if reranker:
+                from .rerank import get_reranker
+                get_reranker().predict([(WARMUP_TEXT, WARMUP_TEXT)])
+        except Exception as e:
+            logger.warning("Warm-up failed: %s", e)
+            return
+    logger.info("Warm-up finished")
+
+def start_warmup(reranker: bool = WARMUP_RERANKER) -> threading.Thread:
+    """Load the embedding model and client libraries in a background thread.
+
+    Callers that enable it (``CODEBASE_RAG_WARMUP=1`` in the app and the
+    service) start serving right away, and the first indexing run or
+    question finds the model loaded. Only the first call starts a
+    thread; later calls return it.
+
+    Args:
+        reranker: Also load the cross-encoder re-ranker
+
+    Returns:
+        The warm-up thread
+    """
+    global _thread
+    with _thread_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_warm_up, args=(reranker,), name='warmup', daemon=True)
+            _thread.start()
+        return _thread